@@ -0,0 +1,197 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : AsyncSDCManager.py
+# description     : python AsyncSDCManager class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.7
+# notes           : This class is an asyncio variant of SDCManager.
+#                   It works with an asyncio MQTT client (aiomqtt) or with LocalBroker clients.
+# ==============================================================================
+import asyncio
+import os
+
+try:
+    import aiomqtt
+except ImportError:
+    aiomqtt = None
+
+import AsyncSoftwareDefinedCache as ASDC
+from FeedbackEmitter import FeedbackEmitter
+from PIDController import DEFAULT_KD, DEFAULT_KI, DEFAULT_KP, MAX_INGEST_RATE, PIDController
+
+SDC_id = "SDC_1"
+client_id = "Client_1"
+
+MQTT_HOST = "163.180.117.236"
+MQTT_PORT = 1883
+
+MQTT_HOST_ON_EDGE = "163.180.117.185"
+MQTT_PORT_ON_EDGE = 11883
+
+# Assume 80% cache utilization: a consumer scenario reads up to 20% of the capacity at once,
+# so the cache fills in a band around the target, which stays below 100% (see FlowSimulator.py)
+TARGET_UTILIZATION = 0.8
+
+
+class AsyncSDCManager:
+
+    def __init__(self, sdc, core_client, local_client, sdc_id=SDC_id, client_id=client_id):
+        """initialize this class
+
+        :param sdc: AsyncSoftwareDefinedCache (already started)
+        :param core_client: connected asyncio MQTT client of the central (core-edge) broker
+        :param local_client: connected asyncio MQTT client of the local (edge-client) broker
+        :param sdc_id: the id of this SDC in the core-edge topics
+        :param client_id: the id of the client in the edge-client topics
+        """
+        self.sdc = sdc
+        self.core_client = core_client
+        self.local_client = local_client
+        self.sdc_id = sdc_id
+        self.client_id = client_id
+        # the output is the target ingest rate in capacities per second
+        self.flow_controller = PIDController(DEFAULT_KP, DEFAULT_KI, DEFAULT_KD, TARGET_UTILIZATION,
+                                             output_limits=(0.0, MAX_INGEST_RATE))
+        self.feedback_emitter = FeedbackEmitter(self.publish_feedback)
+        self._feedback_pending = None
+        self.is_testing = True
+
+    def core_topic(self, name):
+        return "core/edge/" + self.sdc_id + "/" + name
+
+    def local_topic(self, name):
+        return "edge/client/" + self.client_id + "/" + name
+
+    async def run(self):
+        """subscribe the topics and handle the messages of both brokers until cancelled
+        """
+        await self.core_client.subscribe(self.core_topic("data"))
+        await self.core_client.subscribe(self.core_topic("flow_control"))
+        await self.core_client.subscribe(self.core_topic("start_testing"))
+        await self.local_client.subscribe(self.local_topic("data_req"))
+        await self.local_client.subscribe(self.local_topic("done_to_test"))
+
+        self._feedback_pending = asyncio.Event()
+        await asyncio.gather(self._consume(self.core_client, self.on_message),
+                             self._consume(self.local_client, self.on_local_message),
+                             self._emit_feedback())
+
+    @staticmethod
+    async def _consume(client, handler):
+        async for msg in client.messages:
+            try:
+                await handler(str(msg.topic), msg.payload)
+            except Exception as e:
+                print("Exception: %s" % e)
+
+    def notify_storage_status(self, force=False):
+        # the feedback is published by _emit_feedback() if the utilization has changed enough
+        if self.feedback_emitter.offer(self.sdc.used / self.sdc.capacity, force):
+            self._feedback_pending.set()
+
+    async def publish_feedback(self, utilization):
+        # feedback: the target ingest rate computed from the utilization error (unit: byte/second)
+        target_ingest_rate = int(self.flow_controller.update(utilization) * self.sdc.capacity)
+        await self.core_client.publish(self.core_topic("feedback"), target_ingest_rate, qos=1)
+
+    async def _emit_feedback(self):
+        while True:
+            delay = self.feedback_emitter.emit_delay()
+            if delay is not None and delay <= 0:
+                await self.publish_feedback(self.feedback_emitter.take())
+                continue
+            self._feedback_pending.clear()
+            try:
+                await asyncio.wait_for(self._feedback_pending.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    # --------------------------------------------------MQTT Core-Edge------------------------------------------------#
+    async def on_message(self, topic, message):
+        if topic == self.core_topic("data"):
+            # suspends only this handler (backpressure) while the write-buffer is above its high-water mark
+            if not await self.sdc.put(message):
+                print("Write-buffer is full - data dropped (%s)" % len(message))
+            self.notify_storage_status()
+        elif topic == self.core_topic("flow_control"):
+            self.notify_storage_status(force=True)
+        elif topic == self.core_topic("start_testing"):
+            print("Start testing!!")
+            self.notify_storage_status(force=True)
+            await self.local_client.publish(self.local_topic("start_caching"), 1, qos=2)
+        else:
+            print("Unknown - topic: %s, message: %s" % (topic, message))
+
+    # --------------------------------------------------MQTT Edge-Client----------------------------------------------#
+    async def on_local_message(self, topic, message):
+        if topic == self.local_topic("data_req"):
+            read_size = int(message)
+            views, result = await self.sdc.read_views(read_size)
+
+            if result:
+                await self.local_client.publish(self.local_topic("data"), b''.join(views), qos=2)
+            else:
+                print("Cache misses (no data or not enough data)")
+                await self.local_client.publish(self.local_topic("data"), False, qos=2)
+        elif topic == self.local_topic("done_to_test"):
+            await self.core_client.publish(self.core_topic("done_to_test"), "done", qos=2)
+            self.is_testing = False
+        else:
+            print("Unknown - topic: %s, message: %s" % (topic, message))
+
+
+async def run_manager():
+    sdc = ASDC.AsyncSoftwareDefinedCache(os.path.join(".", "cache"), 5, use_mmap=True)
+    await sdc.start()
+    try:
+        async with aiomqtt.Client(MQTT_HOST, MQTT_PORT) as core_client, \
+                aiomqtt.Client(MQTT_HOST_ON_EDGE, MQTT_PORT_ON_EDGE) as local_client:
+            manager = AsyncSDCManager(sdc, core_client, local_client)
+            await manager.run()
+    finally:
+        await sdc.close()
+
+
+def main():
+    if aiomqtt is None:
+        print("aiomqtt is necessary to connect to MQTT brokers (pip install aiomqtt)")
+        return
+    asyncio.run(run_manager())
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as e:
+        print("Exception: %s" % e)
@@ -0,0 +1,253 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : AsyncSoftwareDefinedCache.py
+# description     : python AsyncSoftwareDefinedCache class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.7
+# notes           : This AsyncSoftwareDefinedCache is an asyncio variant of SoftwareDefinedCache.
+#                   The write-buffer and the flow of data run on one event loop (no writer thread),
+#                   and only the disk I/O of the segments runs in the default executor of the loop.
+# ==============================================================================
+import asyncio
+from collections import deque
+import json
+import logging
+
+from SegmentLog import DEFAULT_SEGMENT_SIZE, ChecksumError, SegmentLog
+from WriteBuffer import DEFAULT_BATCH_LATENCY, DEFAULT_BATCH_SIZE, DEFAULT_HIGH_WATER_MARK, DEFAULT_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSoftwareDefinedCache:
+
+    def __init__(self, directory, capacity, segment_size=None, use_mmap=False,
+                 write_buffer_high_water_mark=DEFAULT_HIGH_WATER_MARK, write_buffer_max_size=DEFAULT_MAX_SIZE,
+                 flush_batch_size=DEFAULT_BATCH_SIZE, flush_latency=DEFAULT_BATCH_LATENCY):
+        """initialize this class
+
+        start() has to be awaited on the event loop before put() and read_bytes() are used.
+        The appends and reads of segments run in the default executor of the loop, so a slow disk does not stall
+        the other coroutines (e.g., the other streams); one flush and one read can run at the same time,
+        like the writer and reader sides of SoftwareDefinedCache.
+
+        :param directory: the dir to create files for cache
+        :param capacity: the capacity of the cache (unit: MB)
+        :param segment_size: the size of a preallocated segment file (unit: byte, default: min(64 MB, capacity))
+        :param use_mmap: read segments through memory maps (read_views() returns zero-copy memoryviews)
+        :param write_buffer_high_water_mark: the buffered size to suspend producers (unit: byte)
+        :param write_buffer_max_size: the memory cap of the write-buffer (unit: byte)
+        :param flush_batch_size: flush the write-buffer when this amount of data is buffered (unit: byte)
+        :param flush_latency: flush the write-buffer when this time has passed since the first pending byte (unit: second)
+        """
+        self.directory = directory
+        self.capacity = (capacity << 20)
+        if segment_size is None:
+            segment_size = min(DEFAULT_SEGMENT_SIZE, self.capacity)
+        self._log = SegmentLog(directory, segment_size, use_mmap)
+        self.high_water_mark = write_buffer_high_water_mark
+        self.max_size = write_buffer_max_size
+        self.batch_size = flush_batch_size
+        self.batch_latency = flush_latency
+        self._chunks = deque()
+        self._buffered = 0
+        self._first_pending_time = 0
+        self.flush_count = 0
+        self._loop = None
+        self._flush_task = None
+        # events and locks are created in start() because they belong to the running event loop
+        self._data_arrived = None
+        self._buffer_not_full = None
+        self._cache_not_full = None
+        self._read_lock = None
+        self._write_lock = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._read_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._data_arrived = asyncio.Event()
+        self._buffer_not_full = asyncio.Event()
+        self._buffer_not_full.set()
+        self._cache_not_full = asyncio.Event()
+        self._cache_not_full.set()
+        self._flush_task = asyncio.ensure_future(self._flush_write_buffer())
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        async with self._read_lock, self._write_lock:
+            await self._run_in_executor(self._log.close)
+
+    async def _run_in_executor(self, function, *args):
+        # a cancelled caller still waits until the call is done, so it does not release its lock
+        # while the executor is using the segment log
+        future = self._loop.run_in_executor(None, function, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await future
+            raise
+
+    async def put(self, data):
+        """put data to the write-buffer, suspending the caller while the buffer is above its high-water mark
+
+        :return: True if data is buffered, False if it is rejected (memory cap of the write-buffer)
+        """
+        while self._buffered >= self.high_water_mark:
+            self._buffer_not_full.clear()
+            await self._buffer_not_full.wait()
+
+        if len(data) == 0:
+            return True
+        if self._buffered + len(data) > self.max_size:
+            return False
+
+        was_empty = self._buffered == 0
+        self._chunks.append(memoryview(data))
+        self._buffered += len(data)
+        if was_empty:
+            self._first_pending_time = self._loop.time()
+            self._data_arrived.set()
+        elif self._buffered >= self.batch_size > self._buffered - len(data):
+            self._data_arrived.set()
+        return True
+
+    async def _flush_write_buffer(self):
+        # group commit: flush when a batch is full or batch_latency has passed since the first pending byte
+        while True:
+            if self._buffered == 0:
+                self._data_arrived.clear()
+                await self._data_arrived.wait()
+
+            if self._buffered < self.batch_size:
+                timeout = self._first_pending_time + self.batch_latency - self._loop.time()
+                if timeout > 0:
+                    self._data_arrived.clear()
+                    try:
+                        await asyncio.wait_for(self._data_arrived.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+            remaining_capacity = self.capacity - self.used
+            if remaining_capacity <= 0:     # Cache is full
+                self._cache_not_full.clear()
+                await self._cache_not_full.wait()
+                continue
+
+            chunks = self._get(remaining_capacity)
+            async with self._write_lock:
+                await self._run_in_executor(self.store_data, chunks)
+            self.flush_count += 1
+
+    def _get(self, size):
+        chunks = []
+        while size > 0 and len(self._chunks) > 0:
+            chunk = self._chunks[0]
+            if len(chunk) <= size:
+                self._chunks.popleft()
+            else:
+                self._chunks[0] = chunk[size:]
+                chunk = chunk[:size]
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._buffered -= len(chunk)
+        if self._buffered > 0:
+            self._first_pending_time = self._loop.time()
+        if self._buffered < self.high_water_mark:
+            self._buffer_not_full.set()
+        return chunks
+
+    def store_data(self, data):
+        # data (bytes-like object or a list of them) is appended to the head segment of the log
+        # (blocking: the flush task runs it in the executor)
+        chunks = data if isinstance(data, list) else [data]
+        for chunk in chunks:
+            self._log.append(chunk)
+
+    async def read_bytes(self, size):
+        views, result = await self.read_views(size)
+        return b''.join(views), result
+
+    async def read_views(self, size):
+        """read size bytes as a list of bytes-like objects (one per segment) without joining them
+        """
+        async with self._read_lock:
+            # only the flush adds data meanwhile, so used cannot drop below size
+            if self.used < size:
+                return [], False
+            try:
+                views = await self._run_in_executor(self._log.read_views, size)
+            except ChecksumError as e:
+                # the unread data up to the end of the corrupt segment is discarded
+                # (the head segment is discarded only between two flushes)
+                logger.error("Corrupt segment: %s (the unread data through it is discarded)", e.segment_id)
+                if e.segment_id == self._log.head_segment_id:
+                    async with self._write_lock:
+                        await self._run_in_executor(self._log.discard_through, e.segment_id)
+                else:
+                    await self._run_in_executor(self._log.discard_through, e.segment_id)
+                self._cache_not_full.set()
+                return [], False
+        self._cache_not_full.set()
+        return views, True
+
+    # for monitoring cache status
+    def get_cache_status(self):
+        cache_status = {
+            "directory": self.directory,
+            "capacity": self.capacity,
+            "used": self.used,
+            "available": self.capacity-self.used,
+            "segment_size": self._log.segment_size,
+            "segments": self._log.segment_count,
+            "use_mmap": self._log.use_mmap,
+            "write_buffer": self._buffered,
+            "write_buffer_high_water_mark": self.high_water_mark,
+            "write_buffer_max_size": self.max_size,
+            "flush_batch_size": self.batch_size,
+            "flush_latency": self.batch_latency,
+            "flushes": self.flush_count
+        }
+        return json.dumps(cache_status)
+
+    @property
+    def used(self):
+        return self._log.size
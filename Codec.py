@@ -0,0 +1,110 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : Codec.py
+# description     : python compression codec classes
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : These classes are implementations of the compression codecs of cached segments
+#                   in the Python Programming Language.
+# ==============================================================================
+import lzma
+import zlib
+
+
+class Codec:
+    """the interface of compression codecs
+
+    A segment is compressed as a whole when it is sealed, and decompressed as a whole when it is read.
+    codec_id is stored in the segment header, so it must be unique and must not change (0 means raw data).
+    """
+    name = None
+    codec_id = None
+    # the exceptions decompress() raises for corrupt data
+    errors = ()
+
+    def compress(self, data):
+        raise NotImplementedError
+
+    def decompress(self, data):
+        raise NotImplementedError
+
+
+class ZlibCodec(Codec):
+    name = "zlib"
+    codec_id = 1
+    errors = (zlib.error,)
+
+    def __init__(self, level=1):
+        # level 1 compresses several times faster than the default level (6) for a slightly worse ratio
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class LZMACodec(Codec):
+    name = "lzma"
+    codec_id = 2
+    errors = (lzma.LZMAError,)
+
+    def __init__(self, preset=1):
+        # presets above 1 are much slower for a small gain on streamed payloads
+        self.preset = preset
+
+    def compress(self, data):
+        return lzma.compress(data, preset=self.preset)
+
+    def decompress(self, data):
+        return lzma.decompress(data)
+
+
+CODECS = {
+    ZlibCodec.name: ZlibCodec,
+    LZMACodec.name: LZMACodec,
+}
+
+
+def create_codec(codec):
+    """
+    :param codec: None, the name of a built-in codec ("zlib" or "lzma") or a Codec
+    :return: a Codec, or None if data is not compressed
+    """
+    if codec is None or isinstance(codec, Codec):
+        return codec
+    if codec not in CODECS:
+        raise ValueError("Unknown codec: %s" % codec)
+    return CODECS[codec]()
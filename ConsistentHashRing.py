@@ -0,0 +1,85 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : ConsistentHashRing.py
+# description     : python ConsistentHashRing class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This ConsistentHashRing routes keys (or stream ids) to nodes (e.g., cache shards).
+# ==============================================================================
+import bisect
+import hashlib
+
+
+def hash_key(key):
+    # a stable hash (the built-in hash() of str changes between processes)
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    return int.from_bytes(hashlib.md5(key).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+
+    def __init__(self, nodes=(), replicas=100):
+        """initialize this class
+
+        Each node is placed on the ring at `replicas` points (virtual nodes),
+        so adding or removing a node moves only about 1/N of the keys.
+
+        :param nodes: the names of the nodes (str)
+        :param replicas: the number of virtual nodes per node
+        """
+        self.replicas = replicas
+        self._points = []
+        self._nodes = []
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node):
+        for i in range(self.replicas):
+            point = hash_key("%s#%s" % (node, i))
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove_node(self, node):
+        indexes = [i for i, n in enumerate(self._nodes) if n == node]
+        for i in reversed(indexes):
+            del self._points[i]
+            del self._nodes[i]
+
+    def get_node(self, key):
+        if len(self._points) == 0:
+            raise KeyError("No node in the ring")
+        index = bisect.bisect(self._points, hash_key(key)) % len(self._points)
+        return self._nodes[index]
@@ -0,0 +1,411 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : EvictionPolicy.py
+# description     : python eviction policy classes (LRU, LFU, ARC and W-TinyLFU)
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : An eviction policy tracks in-memory access metadata of cached keys
+#                   and chooses victims when a cache (e.g., ObjectStore) needs room (unit: byte).
+# ==============================================================================
+from collections import OrderedDict
+import hashlib
+import struct
+
+
+class EvictionPolicy:
+    """the interface of eviction policies
+
+    The cache calls prepare_insert() before it evicts the victims to make room for a key,
+    insert() when the key is stored (or replaced), access() on a hit, miss() on a miss,
+    and remove() when a key is deleted by the cache itself.
+    evict() chooses a victim, forgets it, and returns it to be deleted by the cache.
+    """
+    name = None
+
+    def __init__(self, capacity):
+        """
+        :param capacity: the capacity of the cache (unit: byte)
+        """
+        self.capacity = capacity
+
+    def prepare_insert(self, key, size):
+        # e.g., adapt to the key before the victims of its insertion are chosen
+        pass
+
+    def insert(self, key, size):
+        raise NotImplementedError
+
+    def access(self, key):
+        raise NotImplementedError
+
+    def miss(self, key):
+        pass
+
+    def remove(self, key):
+        raise NotImplementedError
+
+    def evict(self):
+        """
+        :return: the key to evict, or None if there is no key
+        """
+        raise NotImplementedError
+
+
+class LRUPolicy(EvictionPolicy):
+    name = "lru"
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self._entries = OrderedDict()
+
+    def insert(self, key, size):
+        self._entries[key] = size
+        self._entries.move_to_end(key)
+
+    def access(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+    def remove(self, key):
+        self._entries.pop(key, None)
+
+    def evict(self):
+        if len(self._entries) == 0:
+            return None
+        return self._entries.popitem(last=False)[0]
+
+
+class LFUPolicy(EvictionPolicy):
+    """O(1) LFU: keys are grouped by frequency, and the least recently used key of the lowest frequency is evicted
+    """
+    name = "lfu"
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self._frequencies = {}
+        # frequency -> keys in LRU order
+        self._buckets = {}
+        self._min_frequency = 0
+
+    def _move(self, key, frequency):
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if len(bucket) == 0:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = frequency + 1
+        self._frequencies[key] = frequency + 1
+        self._buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+
+    def insert(self, key, size):
+        frequency = self._frequencies.get(key)
+        if frequency is not None:
+            self._move(key, frequency)
+            return
+        self._frequencies[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_frequency = 1
+
+    def access(self, key):
+        frequency = self._frequencies.get(key)
+        if frequency is not None:
+            self._move(key, frequency)
+
+    def remove(self, key):
+        frequency = self._frequencies.pop(key, None)
+        if frequency is None:
+            return
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if len(bucket) == 0:
+            del self._buckets[frequency]
+            if self._min_frequency == frequency:
+                self._min_frequency = min(self._buckets) if len(self._buckets) > 0 else 0
+
+    def evict(self):
+        if len(self._frequencies) == 0:
+            return None
+        bucket = self._buckets[self._min_frequency]
+        key = next(iter(bucket))
+        self.remove(key)
+        return key
+
+
+class ARCPolicy(EvictionPolicy):
+    """Adaptive Replacement Cache (Megiddo and Modha) with sizes in bytes
+
+    t1/t2 hold cached keys seen once/more than once, and b1/b2 are their ghost lists.
+    The target size of t1 (p) grows on a b1 ghost hit and shrinks on a b2 ghost hit,
+    in prepare_insert(), so that the evictions which make room for the key follow the new target.
+    """
+    name = "arc"
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self._t1 = OrderedDict()
+        self._t2 = OrderedDict()
+        self._b1 = OrderedDict()
+        self._b2 = OrderedDict()
+        self._sizes = {"t1": 0, "t2": 0, "b1": 0, "b2": 0}
+        self._p = 0
+        # the key of the last ghost hit, which goes to t2 when it is inserted
+        self._ghost_hit = None
+
+    def _pop(self, name, lst, key):
+        size = lst.pop(key)
+        self._sizes[name] -= size
+        return size
+
+    def _push(self, name, lst, key, size):
+        lst[key] = size
+        self._sizes[name] += size
+
+    def prepare_insert(self, key, size):
+        # the ghost entry is taken here, so the evictions of this insertion cannot trim it
+        self._ghost_hit = None
+        if key in self._b1:
+            ratio = max(1.0, self._sizes["b2"] / max(self._sizes["b1"], 1))
+            self._p = min(self.capacity, self._p + ratio * size)
+            self._pop("b1", self._b1, key)
+            self._ghost_hit = key
+        elif key in self._b2:
+            ratio = max(1.0, self._sizes["b1"] / max(self._sizes["b2"], 1))
+            self._p = max(0, self._p - ratio * size)
+            self._pop("b2", self._b2, key)
+            self._ghost_hit = key
+
+    def insert(self, key, size):
+        if key in self._t1:
+            self._pop("t1", self._t1, key)
+            self._push("t2", self._t2, key, size)
+        elif key in self._t2:
+            self._pop("t2", self._t2, key)
+            self._push("t2", self._t2, key, size)
+        elif key == self._ghost_hit:
+            self._push("t2", self._t2, key, size)
+        else:
+            # a ghost entry without prepare_insert() (e.g., a key restored from disk) is dropped
+            for name, lst in (("b1", self._b1), ("b2", self._b2)):
+                if key in lst:
+                    self._pop(name, lst, key)
+            self._push("t1", self._t1, key, size)
+        self._ghost_hit = None
+        self._trim_ghosts()
+
+    def access(self, key):
+        if key in self._t1:
+            self._push("t2", self._t2, key, self._pop("t1", self._t1, key))
+        elif key in self._t2:
+            self._t2.move_to_end(key)
+
+    def remove(self, key):
+        if key in self._t1:
+            self._pop("t1", self._t1, key)
+        elif key in self._t2:
+            self._pop("t2", self._t2, key)
+
+    def evict(self):
+        if len(self._t1) > 0 and (self._sizes["t1"] > self._p or len(self._t2) == 0):
+            key, size = self._t1.popitem(last=False)
+            self._sizes["t1"] -= size
+            self._push("b1", self._b1, key, size)
+        elif len(self._t2) > 0:
+            key, size = self._t2.popitem(last=False)
+            self._sizes["t2"] -= size
+            self._push("b2", self._b2, key, size)
+        else:
+            return None
+        self._trim_ghosts()
+        return key
+
+    def _trim_ghosts(self):
+        # |t1| + |b1| <= c and |t1| + |t2| + |b1| + |b2| <= 2c (in bytes)
+        while len(self._b1) > 0 and self._sizes["t1"] + self._sizes["b1"] > self.capacity:
+            self._sizes["b1"] -= self._b1.popitem(last=False)[1]
+        while len(self._b2) > 0 and sum(self._sizes.values()) > 2 * self.capacity:
+            self._sizes["b2"] -= self._b2.popitem(last=False)[1]
+
+
+class CountMinSketch:
+    """frequency sketch of TinyLFU; all counters are halved every sample_size increments (aging)
+
+    The row indexes of a key are the 32-bit words of one BLAKE2b digest of the key (salted by seed),
+    so they are independent of each other and the same in every process (unlike hash() of str and bytes).
+    """
+
+    def __init__(self, width, depth=4, max_count=15, seed=0):
+        self.width = width
+        self.depth = depth
+        self.max_count = max_count
+        self.sample_size = 10 * width
+        self._salt = struct.pack("<Q", seed)
+        self._words = struct.Struct("<%dI" % depth)
+        self._rows = [[0] * width for _ in range(depth)]
+        self._additions = 0
+
+    def _indexes(self, key):
+        data = key if isinstance(key, bytes) else str(key).encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=self._words.size, salt=self._salt).digest()
+        return [word % self.width for word in self._words.unpack(digest)]
+
+    def increment(self, key):
+        indexes = self._indexes(key)
+        minimum = min(row[i] for row, i in zip(self._rows, indexes))
+        if minimum < self.max_count:
+            # conservative update: only the minimum counters are incremented
+            for row, i in zip(self._rows, indexes):
+                if row[i] == minimum:
+                    row[i] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._rows = [[count >> 1 for count in row] for row in self._rows]
+            self._additions = 0
+
+    def estimate(self, key):
+        return min(row[i] for row, i in zip(self._rows, self._indexes(key)))
+
+
+class TinyLFUPolicy(EvictionPolicy):
+    """W-TinyLFU (Einziger et al.) with sizes in bytes
+
+    New keys enter an LRU window (1% of capacity). A key leaving the window is admitted to the main
+    segmented LRU (probation and protected, 80% of main) only if the frequency sketch estimates it
+    more popular than the probation victim.
+    """
+    name = "tinylfu"
+
+    def __init__(self, capacity, window_ratio=0.01, protected_ratio=0.8, sketch_width=4096):
+        super().__init__(capacity)
+        self.window_capacity = max(1, int(capacity * window_ratio))
+        self.main_capacity = capacity - self.window_capacity
+        self.protected_capacity = int(self.main_capacity * protected_ratio)
+        self._window = OrderedDict()
+        self._probation = OrderedDict()
+        self._protected = OrderedDict()
+        self._window_size = 0
+        self._probation_size = 0
+        self._protected_size = 0
+        self._sketch = CountMinSketch(sketch_width)
+
+    def insert(self, key, size):
+        self._sketch.increment(key)
+        if key in self._window:
+            self._window_size += size - self._window.pop(key)
+            self._window[key] = size
+        elif key in self._probation:
+            self._probation_size -= self._probation.pop(key)
+            self._promote(key, size)
+        elif key in self._protected:
+            self._protected_size += size - self._protected.pop(key)
+            self._protected[key] = size
+        else:
+            self._window[key] = size
+            self._window_size += size
+
+    def access(self, key):
+        self._sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._probation:
+            size = self._probation.pop(key)
+            self._probation_size -= size
+            self._promote(key, size)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+
+    def miss(self, key):
+        self._sketch.increment(key)
+
+    def _promote(self, key, size):
+        self._protected[key] = size
+        self._protected_size += size
+        while self._protected_size > self.protected_capacity and len(self._protected) > 1:
+            demoted, demoted_size = self._protected.popitem(last=False)
+            self._protected_size -= demoted_size
+            self._probation[demoted] = demoted_size
+            self._probation_size += demoted_size
+
+    def remove(self, key):
+        if key in self._window:
+            self._window_size -= self._window.pop(key)
+        elif key in self._probation:
+            self._probation_size -= self._probation.pop(key)
+        elif key in self._protected:
+            self._protected_size -= self._protected.pop(key)
+
+    def evict(self):
+        # keys leaving the window enter the main region while it has room,
+        # and then compete with the probation victim (admission)
+        while self._window_size > self.window_capacity and len(self._window) > 0:
+            candidate, candidate_size = self._window.popitem(last=False)
+            self._window_size -= candidate_size
+            if (self._probation_size + self._protected_size + candidate_size <= self.main_capacity or
+                    len(self._probation) == 0):
+                self._probation[candidate] = candidate_size
+                self._probation_size += candidate_size
+                continue
+            victim = next(iter(self._probation))
+            if self._sketch.estimate(candidate) > self._sketch.estimate(victim):
+                self._probation_size -= self._probation.pop(victim)
+                self._probation[candidate] = candidate_size
+                self._probation_size += candidate_size
+                return victim
+            return candidate
+
+        for lst in (self._probation, self._protected, self._window):
+            if len(lst) > 0:
+                key = next(iter(lst))
+                self.remove(key)
+                return key
+        return None
+
+
+EVICTION_POLICIES = {
+    LRUPolicy.name: LRUPolicy,
+    LFUPolicy.name: LFUPolicy,
+    ARCPolicy.name: ARCPolicy,
+    TinyLFUPolicy.name: TinyLFUPolicy,
+}
+
+
+def create_eviction_policy(policy, capacity):
+    """
+    :param policy: the name of a built-in policy ("lru", "lfu", "arc" or "tinylfu") or an EvictionPolicy
+    :param capacity: the capacity of the cache (unit: byte)
+    """
+    if isinstance(policy, EvictionPolicy):
+        return policy
+    if policy not in EVICTION_POLICIES:
+        raise ValueError("Unknown eviction policy: %s" % policy)
+    return EVICTION_POLICIES[policy](capacity)
@@ -0,0 +1,109 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : ExpiryQueue.py
+# description     : python ExpiryQueue class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This ExpiryQueue is a min-heap of expiration times used to expire cached entries
+#                   with a cost that scales with the number of expiring entries.
+# ==============================================================================
+import heapq
+import itertools
+
+
+class ExpiryQueue:
+
+    def __init__(self):
+        """initialize this class
+
+        Rescheduled or cancelled keys leave stale heap items, which are skipped when popped
+        and dropped by rebuilding the heap when they outnumber the scheduled keys.
+        This class is not thread-safe; the owner serializes the access.
+        """
+        self._heap = []
+        self._expire_at = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._expire_at)
+
+    def __contains__(self, key):
+        return key in self._expire_at
+
+    def schedule(self, key, expire_at):
+        """
+        :param key: the key of an entry
+        :param expire_at: the expiration time (unit: second, time.time() based)
+        """
+        self._expire_at[key] = expire_at
+        heapq.heappush(self._heap, (expire_at, next(self._counter), key))
+        self._compact()
+
+    def cancel(self, key):
+        self._expire_at.pop(key, None)
+        self._compact()
+
+    def next_expire_at(self):
+        """
+        :return: the earliest expiration time, or None if no key is scheduled
+        """
+        while len(self._heap) > 0:
+            expire_at, _, key = self._heap[0]
+            if self._expire_at.get(key) == expire_at:
+                return expire_at
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_expired(self, now, limit=None):
+        """pop the keys whose expiration time has passed
+
+        :param now: the current time (unit: second, time.time() based)
+        :param limit: the maximum number of keys to pop (None: all)
+        :return: a list of keys, the earliest first
+        """
+        keys = []
+        while len(self._heap) > 0 and (limit is None or len(keys) < limit):
+            expire_at, _, key = self._heap[0]
+            if expire_at > now:
+                break
+            heapq.heappop(self._heap)
+            if self._expire_at.get(key) == expire_at:
+                del self._expire_at[key]
+                keys.append(key)
+        return keys
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._expire_at) + 64:
+            self._heap = [item for item in self._heap if self._expire_at.get(item[2]) == item[0]]
+            heapq.heapify(self._heap)
@@ -0,0 +1,149 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : FeedbackEmitter.py
+# description     : python FeedbackEmitter class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This FeedbackEmitter decides when the utilization feedback is published
+#                   (rate limit, delta-threshold suppression and coalescing of pending updates).
+# ==============================================================================
+import threading
+import time
+
+DEFAULT_MAX_RATE = 50.0
+DEFAULT_MIN_DELTA = 0.01
+DEFAULT_MAX_INTERVAL = 0.5
+
+
+class FeedbackEmitter:
+
+    def __init__(self, emit, max_rate=DEFAULT_MAX_RATE, min_delta=DEFAULT_MIN_DELTA, max_interval=DEFAULT_MAX_INTERVAL):
+        """initialize this class
+
+        offer() records the latest utilization; only the latest pending value is emitted (coalescing).
+        A value is pending when it differs from the last emitted one by min_delta or more, or when it is forced.
+        Pending values are emitted at most max_rate times per second, and the latest value is emitted
+        at least every max_interval so that the controller keeps running while the utilization is stable.
+
+        :param emit: the function to publish a value, e.g., emit(utilization)
+        :param max_rate: the maximum number of emissions per second
+        :param min_delta: the minimum change of the value to emit it (e.g., 0.01 means 1% of the capacity)
+        :param max_interval: the maximum time between emissions (unit: second, None: no periodic emission)
+        """
+        self.emit = emit
+        self.max_rate = max_rate
+        self.min_delta = min_delta
+        self.max_interval = max_interval
+        self.offered_count = 0
+        self.emitted_count = 0
+        self._condition = threading.Condition()
+        self._latest = None
+        self._last_emitted = None
+        self._last_emit_time = None
+        self._pending = False
+        self._is_running = False
+
+    def offer(self, value, force=False):
+        """record the latest value (thread-safe, never blocks on publishing)
+
+        :param force: emit value as soon as the rate limit allows, even if it has not changed
+        :return: True if value is pending
+        """
+        with self._condition:
+            self.offered_count += 1
+            self._latest = value
+            if force or self._last_emitted is None or abs(value - self._last_emitted) >= self.min_delta:
+                if not self._pending:
+                    self._pending = True
+                    self._condition.notify()
+            return self._pending
+
+    def emit_delay(self, now=None):
+        """
+        :return: the time until the next emission (unit: second, <= 0: due now, None: nothing to emit)
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._condition:
+            if self._latest is None:
+                return None
+            if self._last_emit_time is None:
+                return 0
+            if self._pending:
+                return self._last_emit_time + 1.0 / self.max_rate - now
+            if self.max_interval is not None:
+                return self._last_emit_time + self.max_interval - now
+            return None
+
+    def take(self, now=None):
+        """mark the latest value as emitted
+
+        :return: the value to emit
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._condition:
+            self._pending = False
+            self._last_emitted = self._latest
+            self._last_emit_time = now
+            self.emitted_count += 1
+            return self._latest
+
+    def run(self, duration=None):
+        """Running as a thread, this function emits values until stop() or duration (unit: second) has passed.
+        """
+        deadline = None if duration is None else time.monotonic() + duration
+        with self._condition:
+            self._is_running = True
+        while True:
+            with self._condition:
+                if not self._is_running:
+                    break
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                delay = self.emit_delay(now)
+                if delay is None or delay > 0:
+                    if deadline is not None:
+                        delay = deadline - now if delay is None else min(delay, deadline - now)
+                    self._condition.wait(delay)
+                    continue
+                value = self.take(now)
+            # publishing is done without the lock, so offer() is never blocked by the network
+            self.emit(value)
+
+    def stop(self):
+        with self._condition:
+            self._is_running = False
+            self._condition.notify()
@@ -0,0 +1,86 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : FileDescriptorCache.py
+# description     : python FileDescriptorCache class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This class is an implementation of an LRU cache of open file descriptors
+#                   in the Python Programming Language.
+# ==============================================================================
+from collections import OrderedDict
+import os
+
+DEFAULT_MAX_OPEN_FILES = 64
+
+
+class FileDescriptorCache:
+
+    def __init__(self, max_size=DEFAULT_MAX_OPEN_FILES):
+        """initialize this class
+
+        The least recently used descriptor is closed when more than max_size descriptors are cached.
+        This class is not thread-safe; the owner serializes the access.
+
+        :param max_size: the maximum number of open descriptors (at least 1)
+        """
+        self.max_size = max(max_size, 1)
+        self._fds = OrderedDict()
+
+    def __len__(self):
+        return len(self._fds)
+
+    def get(self, key):
+        """
+        :return: the descriptor of key, or None if it is not cached
+        """
+        fd = self._fds.get(key)
+        if fd is not None:
+            self._fds.move_to_end(key)
+        return fd
+
+    def put(self, key, fd):
+        self.pop(key)
+        while len(self._fds) >= self.max_size:
+            os.close(self._fds.popitem(last=False)[1])
+        self._fds[key] = fd
+
+    def pop(self, key):
+        # close the descriptor of key (e.g., when the file is deleted)
+        fd = self._fds.pop(key, None)
+        if fd is not None:
+            os.close(fd)
+
+    def clear(self):
+        while len(self._fds) > 0:
+            os.close(self._fds.popitem()[1])
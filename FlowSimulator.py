@@ -0,0 +1,192 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : FlowSimulator.py
+# description     : python offline simulator of the flow control loop
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This simulator replays the four consumer scenarios of SDCManager against a simulated cache
+#                   and a producer which follows the target ingest rate of PIDController, to tune the gains offline.
+#                   Usage: python FlowSimulator.py [--kp KP] [--ki KI] [--kd KD] [--setpoint SETPOINT]
+# ==============================================================================
+import argparse
+import json
+import math
+import random
+import sys
+
+from PIDController import DEFAULT_KD, DEFAULT_KI, DEFAULT_KP, MAX_INGEST_RATE, PIDController
+
+# Assume 80% cache utilization: a consumer scenario reads up to 20% of the capacity at once,
+# so the cache fills in a band around the target, which stays below 100% (see FlowSimulator.py)
+TARGET_UTILIZATION = 0.8
+TEST_TIME = 30  # sec
+
+
+def consumer_scenario(scenario, rng):
+    """generate (interval, read_size) of a consumer scenario (the same as consume_data_scenario1..4 in SDCManager)
+    """
+    while True:
+        if scenario == 1:
+            # A cloud service periodically consumes an equal amount of cached data.
+            yield 0.03, (2 << 19)
+        elif scenario == 2:
+            # A cloud service periodically consumes an unequal amount of cached data.
+            yield 0.03, (rng.randint(1, 2) << rng.randint(16, 19))
+        elif scenario == 3:
+            # A cloud service aperiodically consumes an equal amount of cached data.
+            yield rng.randint(3, 100) / 1000.0, (2 << 19)
+        elif scenario == 4:
+            # A cloud service aperiodically consumes an unequal amount of cached data.
+            yield rng.randint(3, 100) / 1000.0, (rng.randint(1, 2) << rng.randint(16, 19))
+        else:
+            raise ValueError("Unknown scenario: %s" % scenario)
+
+
+def simulate(controller, scenario, capacity=(5 << 20), duration=TEST_TIME, time_step=0.001,
+             feedback_interval=0.01, feedback_delay=0.005, seed=1):
+    """simulate the feedback loop
+
+    The producer sends data at the last target ingest rate it received; data beyond the capacity overflows.
+    The consumer misses when the cache has less data than it requests.
+
+    :param controller: PIDController whose output is the target ingest rate (unit: capacity per second)
+    :param scenario: the consumer scenario (1 - 4)
+    :param capacity: the capacity of the cache (unit: byte)
+    :param duration: the simulated time (unit: second)
+    :param time_step: the resolution of the simulation (unit: second)
+    :param feedback_interval: the period of the feedback (unit: second)
+    :param feedback_delay: the delay until the producer applies a feedback (unit: second)
+    :return: dict of the results
+    """
+    rng = random.Random(seed)
+    consumer = consumer_scenario(scenario, rng)
+    controller.reset()
+
+    used = 0.0
+    rate = 0.0
+    pending_feedback = []
+    next_read_time, read_size = next(consumer)
+    next_feedback_time = 0.0
+    hits = misses = 0
+    overflow = 0.0
+    full_steps = 0
+    utilization_sum = utilization_square_sum = 0.0
+
+    steps = int(duration / time_step)
+    for step in range(steps):
+        now = step * time_step
+
+        while len(pending_feedback) > 0 and pending_feedback[0][0] <= now:
+            rate = pending_feedback.pop(0)[1]
+
+        used += rate * time_step
+        if used > capacity:
+            overflow += used - capacity
+            used = capacity
+            full_steps += 1
+
+        if now >= next_read_time:
+            if used >= read_size:
+                used -= read_size
+                hits += 1
+            else:
+                misses += 1
+            interval, read_size = next(consumer)
+            next_read_time = now + interval
+
+        if now >= next_feedback_time:
+            output = controller.update(used / capacity, now)
+            pending_feedback.append((now + feedback_delay, output * capacity))
+            next_feedback_time = now + feedback_interval
+
+        utilization = used / capacity
+        utilization_sum += utilization
+        utilization_square_sum += utilization * utilization
+
+    mean = utilization_sum / steps
+    return {
+        "scenario": scenario,
+        "mean_utilization": mean,
+        "utilization_stdev": math.sqrt(max(utilization_square_sum / steps - mean * mean, 0)),
+        "full_time_ratio": full_steps / steps,
+        "overflow_bytes": int(overflow),
+        "hits": hits,
+        "misses": misses,
+    }
+
+
+def create_controller(kp=DEFAULT_KP, ki=DEFAULT_KI, kd=DEFAULT_KD, max_rate=MAX_INGEST_RATE,
+                      setpoint=TARGET_UTILIZATION):
+    return PIDController(kp, ki, kd, setpoint, output_limits=(0.0, max_rate))
+
+
+def print_results(results):
+    print("%-9s %-10s %-10s %-10s %-14s %-8s %-8s" % ("scenario", "mean util", "stdev", "full time",
+                                                     "overflow (B)", "hits", "misses"))
+    for result in results:
+        print("%-9s %-10.3f %-10.3f %-10.3f %-14s %-8s %-8s" % (result["scenario"], result["mean_utilization"],
+                                                               result["utilization_stdev"],
+                                                               result["full_time_ratio"],
+                                                               format(result["overflow_bytes"], ","),
+                                                               result["hits"], result["misses"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the flow control loop for the four consumer scenarios")
+    parser.add_argument("--kp", type=float, default=DEFAULT_KP)
+    parser.add_argument("--ki", type=float, default=DEFAULT_KI)
+    parser.add_argument("--kd", type=float, default=DEFAULT_KD)
+    parser.add_argument("--max-rate", type=float, default=MAX_INGEST_RATE,
+                        help="the maximum ingest rate (unit: capacity per second)")
+    parser.add_argument("--setpoint", type=float, default=TARGET_UTILIZATION, help="the target utilization")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    controller = create_controller(args.kp, args.ki, args.kd, args.max_rate, args.setpoint)
+    results = [simulate(controller, scenario) for scenario in (1, 2, 3, 4)]
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print_results(results)
+
+    # the gains are not acceptable if data is dropped in any scenario
+    overflowed = [result["scenario"] for result in results if result["overflow_bytes"] > 0]
+    if len(overflowed) > 0:
+        print("WARNING: the cache overflows in scenario %s" % ", ".join(str(scenario) for scenario in overflowed),
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
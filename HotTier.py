@@ -0,0 +1,125 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : HotTier.py
+# description     : python HotTier class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This class is an implementation of the in-memory tier of the FIFO byte stream
+#                   in the Python Programming Language.
+# ==============================================================================
+from collections import deque
+import time
+
+DEFAULT_HOT_TIER_SIZE = 4 << 20
+DEFAULT_HOT_TIER_MAX_AGE = 5.0
+
+
+class HotTier:
+
+    def __init__(self, max_size=DEFAULT_HOT_TIER_SIZE, max_age=DEFAULT_HOT_TIER_MAX_AGE):
+        """initialize this class
+
+        The hot tier keeps the newest part of the byte stream in memory.
+        The oldest data is demoted (spilled to the disk tier) when the tier is above max_size
+        or when it has been in memory for max_age, so the disk tier always holds older data than this tier.
+        This class is not thread-safe; SoftwareDefinedCache serializes the access.
+
+        :param max_size: the maximum size of the tier (unit: byte)
+        :param max_age: the maximum time data stays in memory (unit: second)
+        """
+        self.max_size = max_size
+        self.max_age = max_age
+        self._chunks = deque()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, chunk, now=None):
+        if len(chunk) == 0:
+            return
+        if now is None:
+            now = time.monotonic()
+        self._chunks.append([chunk, now])
+        self._size += len(chunk)
+
+    def read(self, size):
+        """dequeue up to size bytes from the oldest data
+
+        :return: a list of chunks
+        """
+        chunks = []
+        while size > 0 and len(self._chunks) > 0:
+            entry = self._chunks[0]
+            chunk = entry[0]
+            if len(chunk) <= size:
+                self._chunks.popleft()
+            else:
+                entry[0] = chunk[size:]
+                chunk = chunk[:size]
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._size -= len(chunk)
+        return chunks
+
+    def demote(self, now=None):
+        """dequeue the data to spill (above max_size or older than max_age) from the oldest data
+
+        :return: a list of chunks
+        """
+        if now is None:
+            now = time.monotonic()
+        chunks = []
+        while len(self._chunks) > 0:
+            entry = self._chunks[0]
+            overflow = self._size - self.max_size
+            if entry[1] + self.max_age <= now or overflow >= len(entry[0]):
+                chunk = self._chunks.popleft()[0]
+            elif overflow > 0:
+                chunk = entry[0][:overflow]
+                entry[0] = entry[0][overflow:]
+            else:
+                break
+            chunks.append(chunk)
+            self._size -= len(chunk)
+        return chunks
+
+    def oldest_time(self):
+        if len(self._chunks) == 0:
+            return None
+        return self._chunks[0][1]
+
+    def clear(self):
+        self._chunks.clear()
+        self._size = 0
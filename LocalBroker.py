@@ -0,0 +1,144 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : LocalBroker.py
+# description     : python LocalBroker class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This LocalBroker is an in-process stand-in for an MQTT broker.
+#                   Its clients follow the asyncio MQTT client interface used by AsyncSDCManager
+#                   (subscribe, publish and the "messages" async iterator), so tests and benchmarks need no network.
+# ==============================================================================
+import asyncio
+
+
+def topic_matches(subscription, topic):
+    """check if a topic matches a subscription which may include MQTT wildcards ("+" and "#")
+    """
+    subscription_levels = subscription.split("/")
+    topic_levels = topic.split("/")
+    for i, level in enumerate(subscription_levels):
+        if level == "#":
+            return True
+        if i >= len(topic_levels):
+            return False
+        if level != "+" and level != topic_levels[i]:
+            return False
+    return len(subscription_levels) == len(topic_levels)
+
+
+def encode_payload(payload):
+    # same conversion as paho-mqtt
+    if payload is None:
+        return b''
+    if isinstance(payload, str):
+        return payload.encode("utf-8")
+    if isinstance(payload, (int, float)):
+        return str(payload).encode("ascii")
+    return bytes(payload)
+
+
+class LocalMessage:
+    __slots__ = ("topic", "payload", "qos")
+
+    def __init__(self, topic, payload, qos):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+
+
+class LocalBroker:
+
+    def __init__(self):
+        self._clients = []
+        self.published_count = 0
+
+    def client(self):
+        client = LocalBrokerClient(self)
+        self._clients.append(client)
+        return client
+
+    def route(self, topic, payload, qos=0):
+        self.published_count += 1
+        message = LocalMessage(topic, encode_payload(payload), qos)
+        for client in self._clients:
+            if client.is_subscribed(topic):
+                client.deliver(message)
+
+
+class LocalBrokerClient:
+
+    def __init__(self, broker):
+        self._broker = broker
+        self._subscriptions = set()
+        self._queue = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._broker._clients.remove(self)
+
+    async def subscribe(self, topic, qos=0):
+        self._subscriptions.add(topic)
+
+    async def unsubscribe(self, topic):
+        self._subscriptions.discard(topic)
+
+    async def publish(self, topic, payload=None, qos=0, retain=False):
+        self._broker.route(topic, payload, qos)
+
+    def is_subscribed(self, topic):
+        for subscription in self._subscriptions:
+            if topic_matches(subscription, topic):
+                return True
+        return False
+
+    def deliver(self, message):
+        self.queue.put_nowait(message)
+
+    @property
+    def queue(self):
+        # created lazily because it belongs to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    @property
+    def messages(self):
+        return self._iterate_messages()
+
+    async def _iterate_messages(self):
+        while True:
+            message = await self.queue.get()
+            yield message
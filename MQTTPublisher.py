@@ -0,0 +1,160 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : MQTTPublisher.py
+# description     : python MQTTPublisher class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This MQTTPublisher publishes messages through an already-connected paho-mqtt client
+#                   instead of opening a new connection per message (publish.single).
+# ==============================================================================
+import logging
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+# a message which is not acknowledged within this time (e.g., dropped on a disconnect) is no longer tracked
+# for the publish latency (unit: second)
+DEFAULT_PENDING_TIMEOUT = 60.0
+
+
+class MQTTPublisher:
+
+    def __init__(self, client, default_qos=2, topic_qos=None, max_inflight=100, metrics=None,
+                 pending_timeout=DEFAULT_PENDING_TIMEOUT):
+        """initialize this class
+
+        Messages are queued on the persistent connection of the client and sent by its network loop,
+        so several messages can be in flight at the same time.
+
+        :param client: paho-mqtt client (its network loop is run by the owner, e.g., loop_start())
+        :param default_qos: the QoS of topics which are not in topic_qos
+        :param topic_qos: {topic filter (MQTT wildcards are allowed): QoS}
+        :param max_inflight: the maximum number of QoS 1/2 messages in flight
+        :param metrics: Metrics to record the publish latency (until the delivery is acknowledged) and counters.
+                        The publisher becomes the on_publish callback of the client.
+        :param pending_timeout: the time after which an unacknowledged message is counted as lost
+                                instead of being tracked (unit: second)
+        """
+        self.client = client
+        self.default_qos = default_qos
+        self.topic_qos = dict(topic_qos or {})
+        self._qos_cache = {}
+        self.published_count = 0
+        # the messages which were not queued or sent at once (e.g., while the broker is disconnected)
+        self.failed_count = 0
+        client.max_inflight_messages_set(max_inflight)
+
+        self.metrics = metrics
+        if metrics is not None:
+            self._publish_latency = metrics.histogram("mqtt_publish")
+            self._published_messages = metrics.counter("mqtt_published_messages")
+            self._published_bytes = metrics.counter("mqtt_published_bytes")
+            self._lost_messages = metrics.counter("mqtt_unacknowledged_messages")
+            self._failed_publishes = metrics.counter("mqtt_failed_publishes")
+            # mid -> start time of the messages in flight, and mid -> time of the mids delivered before they are
+            # registered; both are in time order and expire after pending_timeout, so they stay bounded
+            self.pending_timeout = pending_timeout
+            self._lock = threading.Lock()
+            self._pending = {}
+            self._delivered = {}
+            client.on_publish = self._on_publish
+
+    def qos(self, topic):
+        qos = self._qos_cache.get(topic)
+        if qos is None:
+            qos = self.default_qos
+            for topic_filter, topic_filter_qos in self.topic_qos.items():
+                if mqtt.topic_matches_sub(topic_filter, topic):
+                    qos = topic_filter_qos
+                    break
+            self._qos_cache[topic] = qos
+        return qos
+
+    def publish(self, topic, payload=None, qos=None, retain=False):
+        """publish a message without waiting for its delivery
+
+        :param qos: the QoS of this message (default: the QoS configured for the topic)
+        :return: paho-mqtt MQTTMessageInfo (e.g., wait_for_publish() waits for the delivery)
+        """
+        if qos is None:
+            qos = self.qos(topic)
+        start_time = time.perf_counter()
+        info = self.client.publish(topic, payload, qos, retain)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            # counted instead of printed: every message fails while the broker is disconnected
+            self.failed_count += 1
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Publish (%s) is queued or failed: %s", topic, mqtt.error_string(info.rc))
+        self.published_count += 1
+        if self.metrics is not None:
+            if info.rc != mqtt.MQTT_ERR_SUCCESS:
+                self._failed_publishes.inc()
+            self._published_messages.inc()
+            if isinstance(payload, (bytes, bytearray, memoryview)):
+                self._published_bytes.inc(len(payload))
+            # the lock is not held while publishing, because on_publish may be called within client.publish()
+            with self._lock:
+                if self._delivered.pop(info.mid, None) is not None:
+                    self._publish_latency.record(time.perf_counter() - start_time)
+                else:
+                    # a mid is reused after it wraps around, so the entry of a lost message is replaced
+                    if self._pending.pop(info.mid, None) is not None:
+                        self._lost_messages.inc()
+                    self._pending[info.mid] = start_time
+                self._expire(start_time)
+        return info
+
+    def _expire(self, now):
+        # called with the lock held
+        deadline = now - self.pending_timeout
+        for entries in (self._pending, self._delivered):
+            while len(entries) > 0:
+                mid = next(iter(entries))
+                if entries[mid] >= deadline:
+                    break
+                del entries[mid]
+                if entries is self._pending:
+                    self._lost_messages.inc()
+
+    def _on_publish(self, client, userdata, mid):
+        now = time.perf_counter()
+        with self._lock:
+            start_time = self._pending.pop(mid, None)
+            if start_time is None:
+                self._delivered[mid] = now
+                return
+        self._publish_latency.record(now - start_time)
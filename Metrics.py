@@ -0,0 +1,225 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : Metrics.py
+# description     : python Counter, Gauge, Histogram and Metrics classes
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : These classes are implementations of the counters, gauges and latency histograms of SDC
+#                   in the Python Programming Language.
+# ==============================================================================
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# a power of two is divided into 2 ** SUB_BUCKET_BITS buckets (relative error < 1 / 2 ** SUB_BUCKET_BITS)
+SUB_BUCKET_BITS = 4
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class Counter:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+
+    def __init__(self, function):
+        """initialize this class
+
+        :param function: returns the current value (it is called only when a snapshot is taken)
+        """
+        self.function = function
+
+    @property
+    def value(self):
+        return self.function()
+
+
+class Histogram:
+
+    def __init__(self):
+        """initialize this class
+
+        An HDR-style histogram of latencies in microseconds: buckets are exact up to 2 * SUB_BUCKET_COUNT,
+        and log-linear above (SUB_BUCKET_COUNT buckets per power of two),
+        so recording is O(1) and the memory does not depend on the number of samples.
+        """
+        self._lock = threading.Lock()
+        self._counts = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def bucket_index(value):
+        if value < 2 * SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return (shift + 1) * SUB_BUCKET_COUNT + (value >> shift) - SUB_BUCKET_COUNT
+
+    @staticmethod
+    def bucket_value(index):
+        # the middle of the range of the bucket
+        if index < 2 * SUB_BUCKET_COUNT:
+            return index
+        shift = index // SUB_BUCKET_COUNT - 1
+        lower = (index % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT) << shift
+        return lower + ((1 << shift) - 1) // 2
+
+    def record(self, seconds):
+        """record a latency
+
+        :param seconds: the latency (unit: second)
+        """
+        value = int(seconds * 1e6)
+        if value < 0:
+            value = 0
+        index = self.bucket_index(value)
+        with self._lock:
+            if index >= len(self._counts):
+                self._counts.extend([0] * (index + 1 - len(self._counts)))
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, percentile):
+        """
+        :return: the latency at percentile (unit: microsecond), or None if nothing is recorded
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = max(int(self.count * percentile / 100.0 + 0.5), 1)
+            cumulative = 0
+            for index, count in enumerate(self._counts):
+                cumulative += count
+                if cumulative >= rank:
+                    return min(max(self.bucket_value(index), self.min), self.max)
+            return self.max
+
+    def snapshot(self):
+        snapshot = {
+            "count": self.count,
+            "min_us": self.min,
+            "mean_us": self.total / self.count if self.count > 0 else None,
+            "max_us": self.max,
+        }
+        for percentile in PERCENTILES:
+            snapshot["p%s_us" % percentile] = self.percentile(percentile)
+        return snapshot
+
+
+class Metrics:
+
+    def __init__(self):
+        """initialize this class
+
+        A registry of named counters, gauges and histograms.
+        A snapshot also reports the rate (per second) of each counter since the previous snapshot.
+        """
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._last_values = {}
+        self._last_time = time.monotonic()
+
+    def counter(self, name):
+        with self._lock:
+            if name not in self.counters:
+                self.counters[name] = Counter()
+            return self.counters[name]
+
+    def gauge(self, name, function):
+        with self._lock:
+            self.gauges[name] = Gauge(function)
+            return self.gauges[name]
+
+    def histogram(self, name):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            return self.histograms[name]
+
+    def snapshot(self, rates=True):
+        """
+        :param rates: report the rates of the counters since the previous snapshot with rates
+                      (only the periodic reporter should use it, so that the interval is regular)
+        """
+        with self._lock:
+            counters = {name: counter.value for name, counter in self.counters.items()}
+            snapshot = {"counters": counters}
+            if rates:
+                now = time.monotonic()
+                elapsed = now - self._last_time
+                snapshot["rates"] = {name: (value - self._last_values.get(name, 0)) / elapsed if elapsed > 0 else 0.0
+                                     for name, value in counters.items()}
+                self._last_values = counters
+                self._last_time = now
+            gauges = dict(self.gauges)
+            histograms = dict(self.histograms)
+        snapshot["gauges"] = {name: gauge.value for name, gauge in gauges.items()}
+        snapshot["histograms"] = {name: histogram.snapshot() for name, histogram in histograms.items()}
+        return snapshot
+
+    def report(self, interval, emit=None, stop_event=None):
+        """Running as a thread, this function emits a snapshot every interval.
+
+        :param interval: the period of snapshots (unit: second)
+        :param emit: called with each snapshot (default: logged as JSON at INFO level)
+        :param stop_event: threading.Event to stop reporting
+        """
+        if stop_event is None:
+            stop_event = threading.Event()
+        while not stop_event.wait(interval):
+            snapshot = self.snapshot()
+            if emit is not None:
+                emit(snapshot)
+            elif logger.isEnabledFor(logging.INFO):
+                logger.info("metrics %s", json.dumps(snapshot))
@@ -0,0 +1,266 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : ObjectStore.py
+# description     : python ObjectStore class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This ObjectStore is a key-addressable object cache (e.g., "index.html")
+#                   backed by a hash index into a SegmentLog.
+# ==============================================================================
+import logging
+import struct
+import threading
+import time
+
+from EvictionPolicy import create_eviction_policy
+from ExpiryQueue import ExpiryQueue
+from SegmentLog import DEFAULT_SEGMENT_SIZE, SegmentLog
+
+logger = logging.getLogger(__name__)
+
+RECORD_PUT = 1
+RECORD_DELETE = 2
+# type, key length, value length, expiration time (0: never)
+RECORD_HEADER = struct.Struct("<BIQd")
+
+
+class ObjectStore:
+
+    def __init__(self, directory, capacity, segment_size=DEFAULT_SEGMENT_SIZE, eviction_policy="lru",
+                 default_ttl=None):
+        """initialize this class
+
+        Every put() and delete() appends a record (header, key, value) to the log,
+        and the index maps a key to the location of its latest value.
+        A segment is deleted when it is the oldest one and none of its records is live anymore,
+        so a delete record never outlives the value it deletes. When more than half of the log is garbage,
+        the live records of the oldest segment are copied to the head so that the segment can be deleted (compaction).
+        The index is rebuilt from the log at startup.
+        Objects expire after their TTL; expire() deletes them in the order of their expiration times.
+
+        :param directory: the dir to create segment files
+        :param capacity: the capacity of the live objects (unit: byte)
+        :param segment_size: the size of a segment file (unit: byte), which is also the maximum record size
+        :param eviction_policy: "lru", "lfu", "arc", "tinylfu" or an EvictionPolicy instance
+        :param default_ttl: the TTL of objects put without ttl (unit: second, None: never expire)
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self.eviction_policy = create_eviction_policy(eviction_policy, capacity)
+        self.default_ttl = default_ttl
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+        self.expiration_count = 0
+        self._lock = threading.Lock()
+        self._log = SegmentLog(directory, segment_size)
+        self._expiry_queue = ExpiryQueue()
+        # key -> (segment_id, value offset, value length, record length, expiration time)
+        self._index = {}
+        # segment_id -> size of the live records in the segment
+        self._live = {}
+        self.used = 0
+        self._load_index()
+
+    def _load_index(self):
+        now = time.time()
+        for segment_id in self._log.segment_ids():
+            data = self._log.read_segment(segment_id)
+            offset = 0
+            while offset + RECORD_HEADER.size <= len(data):
+                record_type, key_length, value_length, expire_at = RECORD_HEADER.unpack_from(data, offset)
+                if record_type not in (RECORD_PUT, RECORD_DELETE):
+                    logger.error("Invalid record at %s:%s", segment_id, offset)
+                    break
+                key_offset = offset + RECORD_HEADER.size
+                key = bytes(data[key_offset:key_offset + key_length]).decode("utf-8")
+                record_length = RECORD_HEADER.size + key_length + value_length
+                self._unlink(key)
+                if record_type == RECORD_PUT and not 0 < expire_at <= now:
+                    self._link(key, (segment_id, key_offset + key_length, value_length, record_length, expire_at))
+                offset += record_length
+        self._release_segments()
+        # keys are registered in the order of their latest records
+        for key, location in self._index.items():
+            self.eviction_policy.insert(key, location[2])
+
+    def _link(self, key, location):
+        self._index[key] = location
+        self._live[location[0]] = self._live.get(location[0], 0) + location[3]
+        self.used += location[2]
+        if location[4] > 0:
+            self._expiry_queue.schedule(key, location[4])
+
+    def _unlink(self, key):
+        location = self._index.pop(key, None)
+        if location is not None:
+            self._live[location[0]] -= location[3]
+            self.used -= location[2]
+            if location[4] > 0:
+                self._expiry_queue.cancel(key)
+        return location
+
+    def _remove(self, key):
+        # delete a live key (eviction or expiration) and record it in the log
+        self._unlink(key)
+        self.eviction_policy.remove(key)
+        self._append_record(RECORD_DELETE, key)
+
+    def _append_record(self, record_type, key, value=b'', expire_at=0):
+        encoded_key = key.encode("utf-8")
+        record = b''.join([RECORD_HEADER.pack(record_type, len(encoded_key), len(value), expire_at),
+                           encoded_key, value])
+        segment_id, offset = self._log.append(record, contiguous=True)
+        return segment_id, offset + RECORD_HEADER.size + len(encoded_key), len(value), len(record), expire_at
+
+    def _release_segments(self):
+        # only the oldest segments are deleted (see __init__)
+        for segment_id in self._log.segment_ids()[:-1]:
+            if self._live.get(segment_id, 0) > 0:
+                break
+            self._log.remove_segment(segment_id)
+            self._live.pop(segment_id, None)
+
+    def _compact(self):
+        segment_ids = self._log.segment_ids()
+        if len(segment_ids) < 2 or self._log.size <= 2 * sum(self._live.values()) + self._log.segment_size:
+            return
+        for key, location in list(self._index.items()):
+            if location[0] == segment_ids[0]:
+                value = self._log.read_at(location[0], location[1], location[2])
+                new_location = self._append_record(RECORD_PUT, key, value, location[4])
+                self._unlink(key)
+                self._link(key, new_location)
+        self._release_segments()
+
+    def put(self, key, value, ttl=None):
+        """store value with key (the old value of key is replaced)
+
+        :param key: str
+        :param value: bytes-like object
+        :param ttl: the time to live of value (unit: second, default: default_ttl)
+        :return: True if value is stored, False if value is bigger than the capacity
+                 or its record (header, key and value) is bigger than a segment
+        """
+        # checked before anything is evicted, since append() cannot split a record over segments
+        record_length = RECORD_HEADER.size + len(key.encode("utf-8")) + len(value)
+        if len(value) > self.capacity or record_length > self._log.segment_size:
+            return False
+        if ttl is None:
+            ttl = self.default_ttl
+        expire_at = time.time() + ttl if ttl is not None else 0
+        with self._lock:
+            # e.g., ARC adapts its target to a ghost hit of key before the victims are chosen
+            self.eviction_policy.prepare_insert(key, len(value))
+            # evict by bytes until value fits (the old value of key is replaced, so it is not counted)
+            while True:
+                old_location = self._index.get(key)
+                old_size = old_location[2] if old_location is not None else 0
+                if self.used - old_size + len(value) <= self.capacity:
+                    break
+                victim = self.eviction_policy.evict()
+                if victim is None:
+                    return False
+                if self._unlink(victim) is not None:
+                    self._append_record(RECORD_DELETE, victim)
+                    self.eviction_count += 1
+            location = self._append_record(RECORD_PUT, key, value, expire_at)
+            self._unlink(key)
+            self._link(key, location)
+            self.eviction_policy.insert(key, len(value))
+            self._release_segments()
+            self._compact()
+        return True
+
+    def get(self, key):
+        """read the value of key
+
+        :return: bytes, or None if key is not cached
+        """
+        with self._lock:
+            location = self._index.get(key)
+            if location is not None and 0 < location[4] <= time.time():
+                # expired but not reaped yet
+                self._remove(key)
+                self.expiration_count += 1
+                location = None
+            if location is None:
+                self.miss_count += 1
+                self.eviction_policy.miss(key)
+                return None
+            self.hit_count += 1
+            self.eviction_policy.access(key)
+            return self._log.read_at(location[0], location[1], location[2])
+
+    def delete(self, key):
+        """delete key
+
+        :return: True if key was cached
+        """
+        with self._lock:
+            if key not in self._index:
+                return False
+            self._remove(key)
+            self._release_segments()
+            self._compact()
+        return True
+
+    def expire(self, now=None, limit=None):
+        """delete the objects whose TTL has passed, the earliest first
+
+        :param now: the current time (unit: second, default: time.time())
+        :param limit: the maximum number of objects to delete (None: all)
+        :return: the number of deleted objects
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            keys = self._expiry_queue.pop_expired(now, limit)
+            for key in keys:
+                self._remove(key)
+            self.expiration_count += len(keys)
+            if len(keys) > 0:
+                self._release_segments()
+                self._compact()
+        return len(keys)
+
+    def contains(self, key):
+        location = self._index.get(key)
+        return location is not None and not 0 < location[4] <= time.time()
+
+    def __len__(self):
+        return len(self._index)
+
+    def close(self):
+        self._log.close()
@@ -0,0 +1,113 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : PIDController.py
+# description     : python PIDController class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This PIDController computes the target ingest rate of a producer from the cache utilization error
+#                   (flow control of the feedback loop between SDCManager and the producer).
+# ==============================================================================
+import time
+
+# tuned with FlowSimulator for the flow control of SDCManager (output: target ingest rate in capacities per second);
+# no scenario overflows the cache with these gains, from a maximum ingest rate of 12 to 20
+DEFAULT_KP = 40.0
+DEFAULT_KI = 40.0
+DEFAULT_KD = 0.1
+MAX_INGEST_RATE = 20.0
+
+
+class PIDController:
+
+    def __init__(self, kp, ki, kd, setpoint, output_limits=(None, None)):
+        """initialize this class
+
+        output = kp * error + ki * integral(error) + kd * d(error)/dt, clamped to output_limits.
+        The derivative is taken on the measurement (no derivative kick when the setpoint changes),
+        and the integral is frozen while the output is saturated in the direction of the error (anti-windup).
+
+        :param kp: the proportional gain
+        :param ki: the integral gain (unit: 1/second)
+        :param kd: the derivative gain (unit: second)
+        :param setpoint: the target of the measurement (e.g., TARGET_UTILIZATION)
+        :param output_limits: (minimum, maximum) of the output (None: no limit)
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.setpoint = setpoint
+        self.output_limits = output_limits
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.output = 0.0
+        self._last_measurement = None
+        self._last_time = None
+
+    def clamp(self, value):
+        minimum, maximum = self.output_limits
+        if maximum is not None and value > maximum:
+            return maximum
+        if minimum is not None and value < minimum:
+            return minimum
+        return value
+
+    def update(self, measurement, now=None):
+        """compute the output for a new measurement
+
+        :param measurement: the current value (e.g., utilization of the cache)
+        :param now: the time of the measurement (unit: second, default: time.monotonic())
+        :return: the output (e.g., target ingest rate)
+        """
+        if now is None:
+            now = time.monotonic()
+        error = self.setpoint - measurement
+
+        dt = 0.0 if self._last_time is None else now - self._last_time
+        derivative = 0.0
+        if dt > 0:
+            derivative = -(measurement - self._last_measurement) / dt
+
+        integral = self.integral + error * dt
+        output = self.kp * error + self.ki * integral + self.kd * derivative
+        clamped_output = self.clamp(output)
+        # anti-windup: do not integrate further into saturation
+        if clamped_output == output or (output > clamped_output) != (error > 0):
+            self.integral = integral
+
+        self.output = clamped_output
+        self._last_measurement = measurement
+        self._last_time = now
+        return clamped_output
@@ -0,0 +1,159 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : ReadAhead.py
+# description     : python ReadAhead class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This class is an implementation of the adaptive read-ahead buffer of the disk tier
+#                   in the Python Programming Language.
+# ==============================================================================
+from collections import deque
+import time
+
+DEFAULT_READ_AHEAD_SIZE = 16 << 20
+DEFAULT_READ_AHEAD_TIME = 0.1
+# the number of contiguous requests to start prefetching
+SEQUENTIAL_READS = 2
+# the weight of the last request in the moving averages of the request size and interval
+SMOOTHING = 0.25
+
+
+class ReadAhead:
+
+    def __init__(self, max_size=DEFAULT_READ_AHEAD_SIZE, lookahead_time=DEFAULT_READ_AHEAD_TIME):
+        """initialize this class
+
+        The read-ahead buffer keeps a copy of the data right after the read cursor of the disk tier,
+        which is prefetched by a background thread, so that the next requests are served from memory.
+        Prefetching starts when SEQUENTIAL_READS requests in a row start where the previous one ended,
+        and the window is the data the consumer requests in lookahead_time at the observed request size
+        and rate (at least one request, at most max_size).
+        The buffered data is identified by its stream offset, so data consumed or deleted by others is dropped.
+        This class is not thread-safe; SoftwareDefinedCache serializes the access.
+
+        :param max_size: the maximum size of the buffer (unit: byte)
+        :param lookahead_time: the time of requests to prefetch (unit: second)
+        """
+        self.max_size = max_size
+        self.lookahead_time = lookahead_time
+        self._chunks = deque()
+        self._size = 0
+        self._start = 0
+        self._next_position = None
+        self._sequential_reads = 0
+        self._request_size = 0.0
+        self._request_interval = None
+        self._last_request_time = None
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def window(self):
+        if self._sequential_reads < SEQUENTIAL_READS:
+            return 0
+        depth = 1.0
+        if self._request_interval is not None and self._request_interval > 0:
+            depth = max(self.lookahead_time / self._request_interval, depth)
+        return min(int(self._request_size * depth), self.max_size)
+
+    def observe(self, position, size, now=None):
+        """record a request of size bytes at a stream offset (before it is read)
+        """
+        if now is None:
+            now = time.monotonic()
+        if position == self._next_position:
+            self._sequential_reads += 1
+        else:
+            self._sequential_reads = 1
+        self._next_position = position + size
+        self._request_size += SMOOTHING * (size - self._request_size) if self._request_size > 0 else size
+        if self._last_request_time is not None:
+            interval = now - self._last_request_time
+            if self._request_interval is None:
+                self._request_interval = interval
+            else:
+                self._request_interval += SMOOTHING * (interval - self._request_interval)
+        self._last_request_time = now
+
+    def read(self, position, size):
+        """dequeue up to size bytes of the prefetched data at a stream offset (stale data is dropped)
+
+        :return: a list of chunks
+        """
+        self._drop_stale(position)
+        chunks = []
+        while size > 0 and len(self._chunks) > 0:
+            chunk = self._chunks[0]
+            if len(chunk) <= size:
+                self._chunks.popleft()
+            else:
+                self._chunks[0] = chunk[size:]
+                chunk = chunk[:size]
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._size -= len(chunk)
+            self._start += len(chunk)
+        return chunks
+
+    def next_range(self, position, available):
+        """the data to prefetch next
+
+        :param position: the stream offset of the read cursor
+        :param available: the amount of unread data of the disk tier (unit: byte)
+        :return: (stream offset, size), where size is 0 if the window is full
+        """
+        self._drop_stale(position)
+        size = min(self.window, available) - self._size
+        return position + self._size, max(size, 0)
+
+    def fill(self, position, data):
+        """append prefetched data at a stream offset (ignored unless it continues the buffered data)
+        """
+        if len(data) == 0:
+            return
+        if self._size == 0:
+            self._start = position
+        elif position != self._start + self._size:
+            return
+        self._chunks.append(memoryview(data))
+        self._size += len(data)
+
+    def _drop_stale(self, position):
+        if self._size > 0 and self._start != position:
+            self.clear()
+
+    def clear(self):
+        self._chunks.clear()
+        self._size = 0
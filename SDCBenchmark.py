@@ -0,0 +1,680 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : SDCBenchmark.py
+# description     : python benchmarks for SoftwareDefinedCache
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : These benchmarks call SoftwareDefinedCache directly (no MQTT broker is necessary).
+#                   Usage: python SDCBenchmark.py
+# ==============================================================================
+import asyncio
+import contextlib
+import io
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import AsyncSDCManager
+import AsyncSoftwareDefinedCache as ASDC
+import Codec
+import EvictionPolicy
+import LocalBroker
+import ObjectStore
+import SegmentLog
+import ShardedSoftwareDefinedCache as SSDC
+import SoftwareDefinedCache as SDC
+from Metrics import Histogram
+from TransformPool import TransformPool
+
+
+def create_segments(sdc, segment_count, segment_size):
+    """fill the cache with segment_count flushes of segment_size bytes
+
+    :param sdc: SoftwareDefinedCache to fill
+    :param segment_count: the number of flushes
+    :param segment_size: the size of each flush (unit: byte)
+    """
+    data = os.urandom(segment_size)
+    for _ in range(segment_count):
+        sdc.store_data(data)
+
+
+def benchmark_read_latency(segment_counts=(1000, 10000, 100000), segment_size=64, read_count=1000):
+    """measure the latency of read_bytes() according to the number of segments in the cache
+
+    Each flush fills exactly one segment file, and each read_bytes() call consumes two segments,
+    so the latency should stay flat as the segment count grows.
+    """
+    print("%-10s %-16s %-16s" % ("segments", "startup (ms)", "read_bytes (us)"))
+    for segment_count in segment_counts:
+        directory = tempfile.mkdtemp(prefix="sdc-bench-")
+        try:
+            capacity = (segment_count * segment_size >> 20) + 1
+            create_segments(SDC.SoftwareDefinedCache(directory, capacity, segment_size=segment_size),
+                            segment_count, segment_size)
+
+            start_time = time.perf_counter()
+            sdc = SDC.SoftwareDefinedCache(directory, capacity, segment_size=segment_size)
+            startup_time = time.perf_counter() - start_time
+
+            reads = min(read_count, segment_count // 2)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start_time = time.perf_counter()
+                for _ in range(reads):
+                    sdc.read_bytes(segment_size * 2)
+                read_time = time.perf_counter() - start_time
+
+            print("%-10s %-16.2f %-16.2f" % (format(segment_count, ","), startup_time * 1e3,
+                                             read_time / reads * 1e6))
+        finally:
+            shutil.rmtree(directory)
+
+
+def benchmark_store_data(flush_count=10000, flush_size=4096, segment_sizes=(4096, 64 << 20)):
+    """measure store_data() throughput and the number of segment files it creates
+
+    segment_size == flush_size behaves like one file per flush.
+    """
+    print("%-14s %-14s %-12s" % ("segment size", "flush (us)", "files"))
+    data = os.urandom(flush_size)
+    for segment_size in segment_sizes:
+        directory = tempfile.mkdtemp(prefix="sdc-bench-")
+        try:
+            sdc = SDC.SoftwareDefinedCache(directory, (flush_count * flush_size >> 20) + 1, segment_size=segment_size)
+            start_time = time.perf_counter()
+            for _ in range(flush_count):
+                sdc.store_data(data)
+            store_time = time.perf_counter() - start_time
+
+            print("%-14s %-14.2f %-12s" % (format(segment_size, ","), store_time / flush_count * 1e6,
+                                           format(len(os.listdir(directory)), ",")))
+        finally:
+            shutil.rmtree(directory)
+
+
+def benchmark_read_path(read_sizes=(1 << 20, 2 << 20, 4 << 20), segment_size=64 << 10, read_count=50):
+    """compare pread and mmap read paths for data_req-sized reads spanning many segments
+
+    "views" only slices the mapped segments; "bytes" also materializes the data as SDCManager does for publishing.
+    """
+    print("%-10s %-10s %-14s %-14s" % ("read size", "mode", "views (us)", "bytes (us)"))
+    for read_size in read_sizes:
+        for use_mmap in (False, True):
+            directory = tempfile.mkdtemp(prefix="sdc-bench-")
+            try:
+                capacity = (read_size * read_count * 2 >> 20) + 1
+                sdc = SDC.SoftwareDefinedCache(directory, capacity, segment_size=segment_size, use_mmap=use_mmap)
+                create_segments(sdc, read_count * 2, read_size)
+
+                with contextlib.redirect_stdout(io.StringIO()):
+                    start_time = time.perf_counter()
+                    for _ in range(read_count):
+                        sdc.read_views(read_size)
+                    views_time = time.perf_counter() - start_time
+
+                    start_time = time.perf_counter()
+                    for _ in range(read_count):
+                        sdc.read_bytes(read_size)
+                    bytes_time = time.perf_counter() - start_time
+
+                print("%-10s %-10s %-14.2f %-14.2f" % (format(read_size, ","), "mmap" if use_mmap else "pread",
+                                                       views_time / read_count * 1e6,
+                                                       bytes_time / read_count * 1e6))
+            finally:
+                shutil.rmtree(directory)
+
+
+def benchmark_read_ahead(read_sizes=(256 << 10, 1 << 20), read_count=100, read_interval=0.005,
+                         read_ahead_size=16 << 20, codecs=(None, "zlib")):
+    """compare the read latency of a sequential consumer with and without the read-ahead buffer
+
+    The consumer reads read_size bytes every read_interval (like the consumer scenarios of SDCManager),
+    which gives the prefetch thread time to fill the window between the requests.
+    The segments are in the page cache, so this measures the CPU cost of the read path, not the disk.
+    With a codec, each segment should be decompressed once, however many chunks are prefetched from it.
+    """
+    print("%-10s %-8s %-12s %-10s %-10s %-16s %-16s" % ("read size", "codec", "read-ahead", "p50 (us)", "p99 (us)",
+                                                        "from memory (%)", "decompressions"))
+    for read_size in read_sizes:
+        for codec in codecs:
+            for size in (0, read_ahead_size):
+                directory = tempfile.mkdtemp(prefix="sdc-bench-")
+                codec_instance = Codec.create_codec(codec)
+                decompressions = [0]
+                if codec_instance is not None:
+                    decompress = codec_instance.decompress
+
+                    def counted_decompress(data, decompress=decompress):
+                        decompressions[0] += 1
+                        return decompress(data)
+                    codec_instance.decompress = counted_decompress
+                try:
+                    capacity = (read_size * read_count >> 20) + 1
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        sdc = SDC.SoftwareDefinedCache(directory, capacity, segment_size=1 << 20,
+                                                       read_ahead_size=size, codec=codec_instance)
+                        if codec_instance is None:
+                            create_segments(sdc, read_count, read_size)
+                        else:
+                            data = sensor_payload(read_size)
+                            for _ in range(read_count):
+                                sdc.store_data(data)
+                        sdc.run()
+                        for _ in range(read_count):
+                            time.sleep(read_interval)
+                            sdc.read_bytes(read_size)
+                        sdc.close()
+
+                    latency = sdc.metrics.histograms["read_bytes"].snapshot()
+                    hit_bytes = sdc.metrics.counters["read_ahead_hit_bytes"].value
+                    print("%-10s %-8s %-12s %-10s %-10s %-16.1f %-16s" % (
+                        format(read_size, ","), codec or "none", format(size, ","), latency["p50_us"],
+                        latency["p99_us"], hit_bytes * 100.0 / (read_size * read_count),
+                        decompressions[0] if codec_instance is not None else "-"))
+                finally:
+                    shutil.rmtree(directory)
+
+
+async def _run_async_manager(directory, request_count, request_size):
+    broker = LocalBroker.LocalBroker()
+    sdc = ASDC.AsyncSoftwareDefinedCache(directory, (request_count * request_size >> 20) + 1, use_mmap=True)
+    await sdc.start()
+    manager = AsyncSDCManager.AsyncSDCManager(sdc, broker.client(), broker.client())
+    manager_task = asyncio.ensure_future(manager.run())
+
+    producer = broker.client()
+    consumer = broker.client()
+    await consumer.subscribe(manager.local_topic("data"))
+    await asyncio.sleep(0)
+
+    data = os.urandom(request_size)
+    for _ in range(request_count):
+        await producer.publish(manager.core_topic("data"), data)
+    while sdc.used < request_count * request_size:
+        await asyncio.sleep(0.001)
+
+    hits = 0
+    messages = consumer.messages
+    start_time = time.perf_counter()
+    for _ in range(request_count):
+        await consumer.publish(manager.local_topic("data_req"), request_size)
+    for _ in range(request_count):
+        msg = await messages.__anext__()
+        hits += len(msg.payload) == request_size
+    elapsed_time = time.perf_counter() - start_time
+
+    await messages.aclose()
+    manager_task.cancel()
+    try:
+        await manager_task
+    except asyncio.CancelledError:
+        pass
+    await sdc.close()
+    return hits, elapsed_time
+
+
+def benchmark_async_manager(request_count=10000, request_size=1024):
+    """measure data_req messages per second served by AsyncSDCManager through LocalBroker (one event loop)
+    """
+    directory = tempfile.mkdtemp(prefix="sdc-bench-")
+    try:
+        loop = asyncio.new_event_loop()
+        try:
+            hits, elapsed_time = loop.run_until_complete(_run_async_manager(directory, request_count, request_size))
+        finally:
+            loop.close()
+        print("async data_req: %s requests, %s hits, %.0f requests/s" % (format(request_count, ","),
+                                                                       format(hits, ","),
+                                                                       request_count / elapsed_time))
+    finally:
+        shutil.rmtree(directory)
+
+
+def zipf_trace(key_count, request_count, alpha=0.9, seed=1):
+    """generate keys whose popularity follows a Zipf distribution
+    """
+    rng = random.Random(seed)
+    cum_weights = list(itertools.accumulate(1.0 / (rank ** alpha) for rank in range(1, key_count + 1)))
+    keys = ["object-%s" % i for i in range(key_count)]
+    rng.shuffle(keys)
+    return rng.choices(keys, cum_weights=cum_weights, k=request_count)
+
+
+def scan_trace(key_count, request_count, scan_length=1000, seed=1):
+    """Zipf requests interrupted by sequential scans of keys which are never requested again
+    """
+    trace = zipf_trace(key_count, request_count, seed=seed)
+    for position, start in enumerate(range(0, request_count, scan_length * 10)):
+        trace[start:start + scan_length] = ["scan-%s-%s" % (position, i) for i in range(scan_length)]
+    return trace
+
+
+def benchmark_eviction_policies(key_count=10000, request_count=100000, object_size=(1 << 10, 8 << 10),
+                                capacity_ratio=0.1):
+    """replay traces (get, and put on a miss) on ObjectStore with each eviction policy
+
+    Each key has a fixed size in object_size, and the capacity is capacity_ratio of the total size of the keys.
+    """
+    rng = random.Random(1)
+    sizes = {}
+    traces = {"zipf": zipf_trace(key_count, request_count), "zipf+scan": scan_trace(key_count, request_count)}
+    print("%-10s %-8s %-10s %-12s %-10s" % ("trace", "policy", "hit ratio", "ops/s", "evictions"))
+    for trace_name, trace in traces.items():
+        for key in trace:
+            if key not in sizes:
+                sizes[key] = rng.randint(*object_size)
+        capacity = int(sum(object_size) / 2 * key_count * capacity_ratio)
+        for policy in EvictionPolicy.EVICTION_POLICIES:
+            directory = tempfile.mkdtemp(prefix="sdc-bench-")
+            try:
+                store = ObjectStore.ObjectStore(directory, capacity, 4 << 20, policy)
+                values = {}
+                start_time = time.perf_counter()
+                for key in trace:
+                    if store.get(key) is None:
+                        value = values.get(key)
+                        if value is None:
+                            value = values[key] = bytes(sizes[key])
+                        store.put(key, value)
+                elapsed_time = time.perf_counter() - start_time
+                store.close()
+
+                print("%-10s %-8s %-10.4f %-12.0f %-10s" % (trace_name, policy,
+                                                            store.hit_count / len(trace), len(trace) / elapsed_time,
+                                                            format(store.eviction_count, ",")))
+            finally:
+                shutil.rmtree(directory)
+
+
+def benchmark_sharding(shard_counts=(1, 2, 4), thread_count=4, object_count=2000, object_size=16 << 10):
+    """measure put() and get() throughput of keyed objects with thread_count threads according to the shard count
+
+    Each shard has its own lock and directory, so the throughput should scale with the shard count
+    as long as there are enough cores and disks.
+    """
+    print("%-8s %-14s %-14s" % ("shards", "put (MB/s)", "get (MB/s)"))
+    value = os.urandom(object_size)
+    for shard_count in shard_counts:
+        directory = tempfile.mkdtemp(prefix="sdc-bench-")
+        try:
+            capacity = (thread_count * object_count * object_size >> 20) + 2 * shard_count
+            sdc = SSDC.ShardedSoftwareDefinedCache([os.path.join(directory, "shard%s" % i)
+                                                    for i in range(shard_count)], capacity)
+
+            def run(operation):
+                def worker(worker_id):
+                    for i in range(object_count):
+                        operation("object-%s-%s" % (worker_id, i))
+                threads = [threading.Thread(target=worker, args=(i,)) for i in range(thread_count)]
+                start_time = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                return thread_count * object_count * object_size / (time.perf_counter() - start_time) / (1 << 20)
+
+            put_rate = run(lambda key: sdc.put(key, value))
+            get_rate = run(sdc.get)
+            sdc.close()
+            print("%-8s %-14.1f %-14.1f" % (shard_count, put_rate, get_rate))
+        finally:
+            shutil.rmtree(directory)
+
+
+class GlobalLockCache(SDC.SoftwareDefinedCache):
+    """SoftwareDefinedCache whose flushes and reads are serialized by one lock (the design before the reader
+    and writer sides got their own locks), as the baseline of benchmark_concurrency()
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._global_lock = threading.Lock()
+
+    def store_data(self, data):
+        with self._global_lock:
+            super().store_data(data)
+
+    def read_views(self, size):
+        with self._global_lock:
+            return super().read_views(size)
+
+
+def benchmark_concurrency(total_size=64 << 20, chunk_size=64 << 10, read_size=256 << 10, reader_counts=(1, 2, 4),
+                          capacity=16, segment_size=1 << 20):
+    """measure the combined throughput of a producer and reader_count concurrent readers
+
+    The throughput is compared with GlobalLockCache (a flush and a read never overlap).
+    The data read back is checked by tests/test_concurrency.py.
+    """
+    data = os.urandom(chunk_size)
+    print("%-8s %-12s %-16s" % ("readers", "locks", "combined (MB/s)"))
+    for reader_count in reader_counts:
+        for cache_class, locks in ((GlobalLockCache, "global"), (SDC.SoftwareDefinedCache, "read/write")):
+            directory = tempfile.mkdtemp(prefix="sdc-bench-")
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sdc = cache_class(directory, capacity, segment_size=segment_size)
+                    sdc.run()
+                read_count = [0]
+                read_count_lock = threading.Lock()
+                done = threading.Event()
+
+                def produce():
+                    for _ in range(0, total_size, chunk_size):
+                        sdc.put_to_write_buffer(data)
+
+                def consume():
+                    while not done.is_set():
+                        _, result = sdc.read_bytes(read_size)
+                        if not result:
+                            time.sleep(0.0005)
+                            continue
+                        with read_count_lock:
+                            read_count[0] += 1
+                            if read_count[0] * read_size >= total_size:
+                                done.set()
+
+                threads = [threading.Thread(target=produce)] + \
+                          [threading.Thread(target=consume) for _ in range(reader_count)]
+                start_time = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                done.wait(60)
+                done.set()
+                for thread in threads:
+                    thread.join()
+                elapsed_time = time.perf_counter() - start_time
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sdc.close()
+
+                print("%-8s %-12s %-16.1f" % (reader_count, locks,
+                                              read_count[0] * read_size / elapsed_time / (1 << 20)))
+            finally:
+                shutil.rmtree(directory)
+
+
+def sensor_payload(size, seed=1):
+    # JSON-like sensor records (compressible like typical IoT payloads, unlike os.urandom())
+    rng = random.Random(seed)
+    records = []
+    length = 0
+    while length < size:
+        record = ('{"sensor": "edge-%s", "time": %.3f, "value": %.2f}\n' %
+                  (rng.randint(1, 64), time.time() + len(records) * 0.01, rng.gauss(25, 5))).encode()
+        records.append(record)
+        length += len(record)
+    return b''.join(records)[:size]
+
+
+def benchmark_compression(codecs=(None, "zlib", "lzma"), data_size=32 << 20, flush_size=64 << 10,
+                          segment_size=4 << 20):
+    """measure the compression ratio and store/read throughput (of uncompressed data) of each codec
+    """
+    print("%-8s %-8s %-14s %-14s" % ("codec", "ratio", "store (MB/s)", "read (MB/s)"))
+    data = sensor_payload(data_size)
+    for codec in codecs:
+        directory = tempfile.mkdtemp(prefix="sdc-bench-")
+        try:
+            sdc = SDC.SoftwareDefinedCache(directory, (data_size >> 20) + 1, segment_size=segment_size, codec=codec)
+            start_time = time.perf_counter()
+            for offset in range(0, data_size, flush_size):
+                sdc.store_data(data[offset:offset + flush_size])
+            store_time = time.perf_counter() - start_time
+            ratio = sdc.used / sdc.physical_used
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                start_time = time.perf_counter()
+                while sdc.used > 0:
+                    sdc.read_bytes(min(flush_size, sdc.used))
+                read_time = time.perf_counter() - start_time
+
+            print("%-8s %-8.2f %-14.1f %-14.1f" % (codec or "none", ratio, data_size / store_time / (1 << 20),
+                                                   data_size / read_time / (1 << 20)))
+        finally:
+            shutil.rmtree(directory)
+
+
+def benchmark_transform_pool(codecs=("zlib", "lzma"), worker_counts=(0, 1, 2, 4, 8), data_size=32 << 20,
+                             flush_size=64 << 10, segment_size=1 << 20):
+    """compare compressing sealed segments in the writer thread (0 workers) and in a TransformPool
+
+    "flush" is the latency of store_data(), which stalls while a sealed segment is compressed in the writer thread;
+    the throughput includes the compression of all segments, so it scales with the workers up to the cores.
+    """
+    print("%-8s %-8s %-18s %-16s %-16s" % ("codec", "workers", "throughput (MB/s)", "flush p99 (us)",
+                                           "flush max (us)"))
+    data = sensor_payload(data_size)
+    for codec in codecs:
+        for workers in worker_counts:
+            pool = TransformPool(workers) if workers > 0 else None
+            directory = tempfile.mkdtemp(prefix="sdc-bench-")
+            try:
+                sdc = SDC.SoftwareDefinedCache(directory, (data_size >> 20) + 1, segment_size=segment_size,
+                                               codec=codec, transform_pool=pool)
+                if pool is not None:
+                    # the worker processes are started before the measurement
+                    pool.run(len, b'')
+                latency = Histogram()
+                start_time = time.perf_counter()
+                for offset in range(0, data_size, flush_size):
+                    flush_start_time = time.perf_counter()
+                    sdc.store_data(data[offset:offset + flush_size])
+                    latency.record(time.perf_counter() - flush_start_time)
+                # waits for the compressions in the pool
+                sdc.close()
+                elapsed_time = time.perf_counter() - start_time
+
+                snapshot = latency.snapshot()
+                print("%-8s %-8s %-18.1f %-16s %-16s" % (codec, workers, data_size / elapsed_time / (1 << 20),
+                                                         snapshot["p99_us"], snapshot["max_us"]))
+            finally:
+                if pool is not None:
+                    pool.close()
+                shutil.rmtree(directory)
+
+
+def benchmark_verification(policies=SegmentLog.VERIFY_POLICIES, data_size=32 << 20, read_size=256 << 10,
+                           segment_size=4 << 20, rounds=3):
+    """measure the read throughput of each checksum verify policy, and check that corruption is detected
+
+    "running" reads the data written by the same process, and "restarted" reads it after a restart
+    (the "recovery" policy verifies all of it then). The throughput is the best of rounds, and the overhead
+    is relative to "never". "detected" tells whether a flipped byte of a restored segment makes a read miss.
+    """
+    print("%-10s %-8s %-16s %-14s %-16s %-14s %-10s" % ("policy", "mode", "running (MB/s)", "overhead (%)",
+                                                        "restarted (MB/s)", "overhead (%)", "detected"))
+    data = os.urandom(data_size)
+    capacity = (data_size >> 20) + 1
+
+    def read_all(sdc):
+        start_time = time.perf_counter()
+        while sdc.used > 0:
+            sdc.read_bytes(min(read_size, sdc.used))
+        return data_size / (time.perf_counter() - start_time) / (1 << 20)
+
+    for use_mmap in (False, True):
+        results = {}
+        for policy in policies:
+            directory = tempfile.mkdtemp(prefix="sdc-bench-")
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sdc = SDC.SoftwareDefinedCache(directory, capacity, segment_size=segment_size,
+                                                   use_mmap=use_mmap, verify_policy=policy)
+                    running = restarted = 0
+                    for _ in range(rounds):
+                        create_segments(sdc, data_size // read_size, read_size)
+                        running = max(running, read_all(sdc))
+                        create_segments(sdc, data_size // read_size, read_size)
+                        sdc.close()
+                        sdc = SDC.SoftwareDefinedCache(directory, capacity, segment_size=segment_size,
+                                                       use_mmap=use_mmap, verify_policy=policy)
+                        restarted = max(restarted, read_all(sdc))
+
+                    # a byte in the middle of the last segment is flipped before a restart
+                    create_segments(sdc, data_size // read_size, read_size)
+                    sdc.close()
+                    with open(sdc._log.segment_path(sdc._log.head_segment_id), 'r+b') as f:
+                        f.seek(SegmentLog.segment_data_offset(segment_size) + segment_size // 2)
+                        byte = f.read(1)
+                        f.seek(-1, os.SEEK_CUR)
+                        f.write(bytes([byte[0] ^ 0xff]))
+                    sdc = SDC.SoftwareDefinedCache(directory, capacity, segment_size=segment_size,
+                                                   use_mmap=use_mmap, verify_policy=policy)
+                    read_all(sdc)
+                    detected = sdc.corrupt_bytes > 0
+                    sdc.close()
+                results[policy] = (running, restarted, detected)
+            finally:
+                shutil.rmtree(directory)
+
+        baseline = results.get("never", next(iter(results.values())))
+        for policy, (running, restarted, detected) in results.items():
+            print("%-10s %-8s %-16.1f %-14.1f %-16.1f %-14.1f %-10s" % (
+                policy, "mmap" if use_mmap else "pread", running, (baseline[0] / running - 1) * 100,
+                restarted, (baseline[1] / restarted - 1) * 100, detected))
+
+
+SYSCALLS = ("open", "close", "pread", "preadv", "pwrite", "pwritev", "fstat", "fsync", "remove")
+
+
+@contextlib.contextmanager
+def count_syscalls():
+    """count the calls of the os functions in SYSCALLS (one os function call is one syscall)
+    """
+    counts = dict.fromkeys(SYSCALLS, 0)
+    originals = {name: getattr(os, name) for name in SYSCALLS if hasattr(os, name)}
+
+    def counting(name, function):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return function(*args, **kwargs)
+        return wrapper
+
+    for name, function in originals.items():
+        setattr(os, name, counting(name, function))
+    try:
+        yield counts
+    finally:
+        for name, function in originals.items():
+            setattr(os, name, function)
+
+
+def benchmark_syscalls(chunk_count=64, chunk_size=4 << 10, read_segments=8, segment_size=256 << 10,
+                       object_count=32, request_count=1000):
+    """count syscalls per operation of the storage layer
+
+    flush: one append per chunk (before) vs. one vectored append of the batch
+    read_bytes: a request spanning read_segments segments, read as views of each segment joined (before)
+    vs. read into one buffer
+    read_at: random reads of object_count segments with 1 cached descriptor (before) vs. the default LRU cache
+    """
+    print("%-32s %-12s %s" % ("operation", "syscalls", "breakdown"))
+
+    def report(name, counts, operations):
+        total = sum(counts.values())
+        print("%-32s %-12.1f %s" % (name, total / operations,
+                                    ", ".join("%s: %.1f" % (key, value / operations)
+                                              for key, value in counts.items() if value > 0)))
+
+    chunks = [os.urandom(chunk_size) for _ in range(chunk_count)]
+    for name, vectored in (("flush (per chunk)", False), ("flush (vectored)", True)):
+        directory = tempfile.mkdtemp(prefix="sdc-bench-")
+        try:
+            sdc = SDC.SoftwareDefinedCache(directory, 1024, segment_size=64 << 20)
+            with count_syscalls() as counts:
+                for _ in range(10):
+                    if vectored:
+                        sdc.store_data(chunks)
+                    else:
+                        for chunk in chunks:
+                            sdc.store_data(chunk)
+            report(name, counts, 10)
+        finally:
+            shutil.rmtree(directory)
+
+    for name, read in (("read_views + join", lambda sdc, size: b''.join(sdc.read_views(size)[0])),
+                       ("read_bytes", SDC.SoftwareDefinedCache.read_bytes)):
+        directory = tempfile.mkdtemp(prefix="sdc-bench-")
+        try:
+            sdc = SDC.SoftwareDefinedCache(directory, 1024, segment_size=segment_size)
+            create_segments(sdc, read_segments * 10, segment_size)
+            with contextlib.redirect_stdout(io.StringIO()), count_syscalls() as counts:
+                for _ in range(10):
+                    read(sdc, read_segments * segment_size)
+            report("%s (%s segments)" % (name, read_segments), counts, 10)
+        finally:
+            shutil.rmtree(directory)
+
+    rng = random.Random(1)
+    requests = [rng.randrange(object_count) for _ in range(request_count)]
+    for name, max_open_files in (("read_at (1 fd)", 1), ("read_at (fd cache)", 64)):
+        directory = tempfile.mkdtemp(prefix="sdc-bench-")
+        try:
+            log = SegmentLog.SegmentLog(directory, 4096, max_open_files=max_open_files)
+            log.append(os.urandom(object_count * 4096))
+            with count_syscalls() as counts:
+                for segment_id in requests:
+                    log.read_at(segment_id, 100, 1000)
+            report(name, counts, request_count)
+            log.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+def main():
+    benchmark_read_latency()
+    benchmark_store_data()
+    benchmark_read_path()
+    benchmark_read_ahead()
+    benchmark_async_manager()
+    benchmark_eviction_policies()
+    benchmark_sharding()
+    benchmark_concurrency()
+    benchmark_compression()
+    benchmark_transform_pool()
+    benchmark_verification()
+    benchmark_syscalls()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as e:
+        print("Exception: %s" % e)
+        sys.exit(1)
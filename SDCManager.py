@@ -39,6 +39,8 @@
 #                   in the Python Programming Language.
 # ==============================================================================
 
+from collections import deque
+import functools
 import logging
 import os
 # import logging
@@ -47,17 +49,41 @@ import threading
 import time
 
 import paho.mqtt.client as mqtt
-from paho.mqtt import publish
 
-import SoftwareDefinedCache as SDC
+from FeedbackEmitter import FeedbackEmitter
+from Metrics import Metrics
+from MQTTPublisher import MQTTPublisher
+from PIDController import DEFAULT_KD, DEFAULT_KI, DEFAULT_KP, MAX_INGEST_RATE, PIDController
+from ShardedSoftwareDefinedCache import ShardedSoftwareDefinedCache
+from StreamTable import CacheStream, StreamTable, core_subscriptions, encode_chunk, local_subscriptions
+from TransformPool import TransformPool
+
+# The messages of the hot paths are logged at DEBUG level (they are not even formatted at INFO level).
+LOG_LEVEL = "INFO"
 
 rootlogger = logging.getLogger(__name__)
-rootlogger.setLevel("DEBUG")
+rootlogger.setLevel(LOG_LEVEL)
+
+# the period to log the metrics snapshots of the MQTT publishers and of each stream (unit: second)
+METRICS_INTERVAL = 10.0
+# metrics of the MQTT publishers
+metrics = Metrics()
 
-SDC_id = "SDC_1"
-client_id = "Client_1"
+# the streams served by this process: (SDC_id, client_id, capacity quota (unit: MB))
+STREAMS = [
+    ("SDC_1", "Client_1", 5),
+]
 
-sdc = SDC.SoftwareDefinedCache(os.path.join(".", "cache"), 5)
+# the directory of a stream is <cache directory>/<SDC_id>; streams are spread over the dirs (e.g., one per disk)
+CACHE_DIRECTORIES = [os.path.join(".", "cache")]
+
+# the codec to compress sealed segments (None, "zlib" or "lzma"), and the number of worker processes
+# which compress and decompress the segments of all streams (0: in the writer and reader threads)
+CACHE_CODEC = None
+TRANSFORM_WORKERS = 0
+# which blocks of the segments are checked against their crc32 before they are sent
+# ("always", "sampled", "recovery": the segments restored at startup, or "never")
+CACHE_VERIFY_POLICY = "recovery"
 
 MQTT_HOST = "163.180.117.236"
 MQTT_PORT = 1883
@@ -67,45 +93,87 @@ MQTT_PORT = 1883
 MQTT_HOST_ON_EDGE = "163.180.117.185"
 MQTT_PORT_ON_EDGE = 11883
 
-# ----------------------------------------Error calculation for PID controller---------------------------------------#
-# Assume 90% cache utilization
-TARGET_UTILIZATION = 0.9
+# QoS of published topics (MQTT wildcards are allowed); the other topics are published with QoS 2.
+# Feedback is superseded by the next value, so a duplicate delivery does no harm.
+PUBLISH_QOS = {
+    "core/edge/+/feedback": 1,
+}
+MAX_INFLIGHT_MESSAGES = 100
 
-TEST_TIME = 30  # sec
+# data_stream_req responses: the size of a chunk, and the maximum number of chunks of a response in flight
+STREAM_CHUNK_SIZE = 256 << 10
+STREAM_WINDOW = 4
+
+# publishers on the persistent connections of the MQTT clients (created in main())
+core_publisher = None
+local_publisher = None
 
-is_testing = True
+# ----------------------------------------Error calculation for PID controller---------------------------------------#
+# Assume 80% cache utilization: a consumer scenario reads up to 20% of the capacity at once,
+# so the cache fills in a band around the target, which stays below 100% (see FlowSimulator.py)
+TARGET_UTILIZATION = 0.8
 
-conditionLock = threading.Condition()
+TEST_TIME = 30  # sec
 
-flow_control_delay = 0.03
+# Every test starts with an empty cache; otherwise the cached data and the read cursor are restored from disk.
+TRUNCATE_CACHE_BEFORE_TEST = True
 
 
 def calculate_error(target, current):
     return target - current
 
 
+def calculate_target_ingest_rate(stream, utilization):
+    """compute the target ingest rate of the producer of stream from the utilization error (unit: byte/second)
+    """
+    return int(stream.flow_controller.update(utilization) * stream.sdc.capacity)
+
+
+def publish_feedback(stream, utilization):
+    # PID control on the utilization error
+    target_ingest_rate = calculate_target_ingest_rate(stream, utilization)
+    # send feedback
+    core_publisher.publish(stream.core_topic("feedback"), target_ingest_rate)
+
+
+# -------------------------------------------------------------------------------------------------------------------#
+
+# ----------------------------------------------------- Streams ---------------------------------------------------- #
+# shared by the streams, so the number of processes does not grow with the number of streams
+transform_pool = TransformPool(TRANSFORM_WORKERS) if TRANSFORM_WORKERS > 0 else None
+# the cache of every stream is placed in one of CACHE_DIRECTORIES by consistent hashing of its sdc_id
+cache = ShardedSoftwareDefinedCache(CACHE_DIRECTORIES, use_mmap=True, codec=CACHE_CODEC,
+                                    metrics_interval=METRICS_INTERVAL, transform_pool=transform_pool,
+                                    verify_policy=CACHE_VERIFY_POLICY)
+
+
+def create_stream(sdc_id, client_id, capacity):
+    stream = CacheStream(sdc_id, client_id, cache.add_stream(sdc_id, capacity))
+    # The output of the controller is the target ingest rate in capacities per second
+    # (tune the gains with FlowSimulator.py).
+    stream.flow_controller = PIDController(DEFAULT_KP, DEFAULT_KI, DEFAULT_KD, TARGET_UTILIZATION,
+                                           output_limits=(0.0, MAX_INGEST_RATE))
+    # Feedback is published when the utilization changes by 1% or more (at most 50 times per second),
+    # and at least every 0.5 seconds.
+    stream.feedback_emitter = FeedbackEmitter(functools.partial(publish_feedback, stream),
+                                              max_rate=50.0, min_delta=0.01, max_interval=0.5)
+    return stream
+
+
+# topic -> stream (the MQTT callbacks dispatch the messages of all streams through this table)
+streams = StreamTable()
+for stream_config in STREAMS:
+    streams.add(create_stream(*stream_config))
+
+
 # -------------------------------------------------------------------------------------------------------------------#
 
 # ---------------------------------------------------- Producer ---------------------------------------------------- #
-def notify_storage_status():
-    # how long? many?
-    global conditionLock
+def notify_storage_status(stream):
+    # feedback during a test (TEST_TIME)
     try:
-        start_time = time.time()
-        with conditionLock:
-            while True:
-                # calculate error (utilization difference)
-                # error = calculate_error(sdc.capacity * TARGET_UTILIZATION, sdc.used)
-                # print("error :%s" % error)
-                # error = calculate_error(sdc.capacity * TARGET_UTILIZATION, sdc.used)
-                print("feedback :%s" % sdc.used)
-                # send feedback
-                publish.single("core/edge/" + SDC_id + "/feedback", sdc.used, hostname=MQTT_HOST, port=MQTT_PORT, qos=2)
-                conditionLock.wait()
-                time.sleep(0.03)
-                running_time = time.time() - start_time
-                if running_time > TEST_TIME:
-                    break
+        stream.feedback_emitter.offer(stream.utilization, force=True)
+        stream.feedback_emitter.run(TEST_TIME)
     except Exception as e:
         print("Exception: %s" % e)
 
@@ -133,27 +201,28 @@ def notify_storage_status():
 #         API Usage:
 #         - GET       /
 #         - GET       /help
-#         - GET       /api/data/
-#         - GET       /api/data/<string:data_id>
+#         - GET       /api/<string:sdc_id>/data/
+#         - GET       /api/<string:sdc_id>/data/<string:data_id>
 #         """
 #         return help_message
 #
 #
 # class CachedData(Resource):
-#     def get(self, data_id):
+#     def get(self, sdc_id, data_id=None):
+#         sdc = streams.get(sdc_id).sdc
 #         if not data_id:
 #             print('First In First Out!')
 #             data = sdc.read_first_data()
 #         else:
 #             print('The data out')
-#             # read <data_id> and return
+#             data = sdc.get(data_id)
 #
 #         return data
 #
 #
 # api.add_resource(Introduction, '/')
 # api.add_resource(Help, '/help')
-# api.add_resource(CachedData, '/api/data/', '/api/data/<string:data_id>')
+# api.add_resource(CachedData, '/api/<string:sdc_id>/data/', '/api/<string:sdc_id>/data/<string:data_id>')
 #
 #
 # # -------------------------------------------------------------------------------------------------------------------#
@@ -163,9 +232,8 @@ def notify_storage_status():
 def on_connect(client, userdata, flags, rc):
     if rc == 0:
         print("Connected to central MQTT broker - Result code: " + str(rc))
-        client.subscribe("core/edge/" + SDC_id + "/data")
-        client.subscribe("core/edge/" + SDC_id + "/flow_control")
-        client.subscribe("core/edge/" + SDC_id + "/start_testing")
+        for topic in core_subscriptions():
+            client.subscribe(topic)
 
     else:
         print("Bad connection returned code = ", rc)
@@ -173,51 +241,36 @@ def on_connect(client, userdata, flags, rc):
 
 
 def on_message(client, userdata, msg):
-    global conditionLock
-    global flow_control_delay
-
     try:
         # print("Cart new message: " + msg.topic + " " + str(msg.payload))
         message = msg.payload
-        print("Arrived topic: %s" % msg.topic)
-        # print("Arrived message: %s" % message)
-
-        if msg.topic == "core/edge/" + SDC_id + "/data":
-            with conditionLock:
-                # sdc.store_data(message)
-                sdc.put_to_write_buffer(message)
-                print("Data size: %s" % len(message))
-                # data_size = int(message)
-                # print("Data size: %s" % data_size)
-                # sdc.used += data_size
-                flow_control_delay = 0.03
-                conditionLock.notify()
-                # error = calculate_error(sdc.capacity * TARGET_UTILIZATION, sdc.used)
-                # print("error: %s" % error)
-                # time.sleep(0.03)
-                # print("used: %s" % sdc.used)
-                # publish.single("core/edge/" + SDC_id + "/feedback", sdc.used, hostname=MQTT_HOST, port=MQTT_PORT)
-        elif msg.topic == "core/edge/" + SDC_id + "/flow_control":
-            with conditionLock:
-                print("~~~~Flow_control~~~~")
-                time.sleep(0.03)
-                flow_control_delay += 0.03
-                conditionLock.notify()
-                # error = calculate_error(sdc.capacity * TARGET_UTILIZATION, sdc.used)
-                # print("error: %s" % error)
-                # print("used: %s" % sdc.used)
-                # time.sleep(0.03)
-                # publish.single("core/edge/" + SDC_id + "/feedback", sdc.used, hostname=MQTT_HOST, port=MQTT_PORT)
-        elif msg.topic == "core/edge/" + SDC_id + "/start_testing":
+        if rootlogger.isEnabledFor(logging.DEBUG):
+            rootlogger.debug("Arrived topic: %s", msg.topic)
+            # rootlogger.debug("Arrived message: %s", message)
+
+        stream, name = streams.lookup(msg.topic)
+        if name == "data":
+            # sdc.store_data(message)
+            # blocks this network thread (backpressure) while the write-buffer is above its high-water mark
+            if not stream.sdc.put_to_write_buffer(message):
+                rootlogger.warning("Write-buffer is full - data dropped (%s)", len(message))
+            if rootlogger.isEnabledFor(logging.DEBUG):
+                rootlogger.debug("Data size: %s", len(message))
+            # the feedback is published by notify_storage_status() if the utilization has changed enough
+            stream.feedback_emitter.offer(stream.utilization)
+        elif name == "flow_control":
+            # the producer asks for a feedback (the controller computes a new target ingest rate)
+            rootlogger.debug("~~~~Flow_control~~~~")
+            stream.feedback_emitter.offer(stream.utilization, force=True)
+        elif name == "start_testing":
             print("Start testing!!")
-            storage_status_notifying = threading.Thread(target=notify_storage_status)
+            storage_status_notifying = threading.Thread(target=notify_storage_status, args=(stream,))
             storage_status_notifying.start()
             time.sleep(0.03)
             # publish.single("core/edge/" + SDC_id + "/feedback", sdc.used, hostname=MQTT_HOST, port=MQTT_PORT)
-            publish.single("edge/client/" + client_id + "/start_caching", 1, hostname=MQTT_HOST_ON_EDGE,
-                           port=MQTT_PORT_ON_EDGE, qos=2)
+            local_publisher.publish(stream.local_topic("start_caching"), 1)
         else:
-            print("Unknown - topic: " + msg.topic + ", message: " + message)
+            print("Unknown - topic: %s, message: %s" % (msg.topic, message))
     except Exception as e:
         print("Exception: %s" % e)
 
@@ -243,8 +296,8 @@ def on_log(client, userdata, level, string):
 def on_local_connect(client, userdata, flags, rc):
     if rc == 0:
         print("Connected to local MQTT broker - Result code: " + str(rc))
-        client.subscribe("edge/client/" + client_id + "/data_req")
-        client.subscribe("edge/client/" + client_id + "/done_to_test")
+        for topic in local_subscriptions():
+            client.subscribe(topic)
 
     else:
         print("Bad connection returned code = ", rc)
@@ -252,18 +305,20 @@ def on_local_connect(client, userdata, flags, rc):
 
 
 def on_local_message(client, userdata, msg):
-    global is_testing
-
     try:
         # print("Cart new message: " + msg.topic + " " + str(msg.payload))
         message = msg.payload
-        print("Arrived topic: %s" % msg.topic)
-        print("Arrived message: %s" % message)
+        if rootlogger.isEnabledFor(logging.DEBUG):
+            rootlogger.debug("Arrived topic: %s", msg.topic)
+            rootlogger.debug("Arrived message: %s", message)
 
-        if msg.topic == "edge/client/" + client_id + "/data_req":
+        stream, name = streams.lookup(msg.topic)
+        if name == "data_req":
             read_size = int(message)
-            print("Requested amount of data: %s" % read_size)
-            data, result = sdc.read_bytes(read_size)
+            if rootlogger.isEnabledFor(logging.DEBUG):
+                rootlogger.debug("Requested amount of data: %s", read_size)
+            # zero-copy views of the segments; they are materialized only for publishing
+            views, result = stream.sdc.read_views(read_size)
             #
             # if sdc.used < read_size:
             #     read_size = sdc.used
@@ -272,21 +327,58 @@ def on_local_message(client, userdata, msg):
             #     sdc.used -= read_size
 
             if result:
-                print('*** ', end='', flush=True)
-                print("Length of transmitted data: %s" % len(data))
-                publish.single("edge/client/" + client_id + "/data", data, hostname=MQTT_HOST_ON_EDGE,
-                               port=MQTT_PORT_ON_EDGE, qos=2)
+                data = b''.join(views)
+                if rootlogger.isEnabledFor(logging.DEBUG):
+                    rootlogger.debug("*** Length of transmitted data: %s", len(data))
+                local_publisher.publish(stream.local_topic("data"), data)
             else:
-                print("Cache misses (no data or not enough data)")
-                publish.single("edge/client/" + client_id + "/data", False, hostname=MQTT_HOST_ON_EDGE,
-                               port=MQTT_PORT_ON_EDGE, qos=2)
+                rootlogger.debug("Cache misses (no data or not enough data)")
+                local_publisher.publish(stream.local_topic("data"), False)
 
-        elif msg.topic == "edge/client/" + client_id + "/done_to_test":
-            publish.single("core/edge/" + SDC_id + "/done_to_test", "done", hostname=MQTT_HOST, port=MQTT_PORT, qos=2)
+        elif name == "data_stream_req":
+            read_size = int(message)
+            if rootlogger.isEnabledFor(logging.DEBUG):
+                rootlogger.debug("Requested amount of data (stream): %s", read_size)
+            # waiting for the deliveries of the chunks would block this network thread
+            threading.Thread(target=stream_data, args=(stream, read_size)).start()
+
+        elif name == "done_to_test":
+            core_publisher.publish(stream.core_topic("done_to_test"), "done")
             time.sleep(3)
-            is_testing = False
+            stream.is_testing = False
         else:
-            print("Unknown - topic: " + msg.topic + ", message: " + message)
+            print("Unknown - topic: %s, message: %s" % (msg.topic, message))
+    except Exception as e:
+        print("Exception: %s" % e)
+
+
+def stream_data(stream, read_size):
+    # The chunks are read one by one while the previous ones are sent,
+    # so a response buffers at most STREAM_WINDOW chunks instead of read_size bytes.
+    # The responses of a stream are sent one after the other, otherwise their chunks would interleave.
+    try:
+        with stream.stream_lock:
+            topic = stream.local_topic("data_stream")
+            chunks, result = stream.sdc.read_chunks(read_size, STREAM_CHUNK_SIZE)
+            if not result:
+                rootlogger.debug("Cache misses (no data or not enough data)")
+                local_publisher.publish(topic, False)
+                return
+
+            in_flight = deque()
+            sequence = 0
+            sent = 0
+            for data in chunks:
+                sent += len(data)
+                in_flight.append(local_publisher.publish(topic, encode_chunk(sequence, sent >= read_size, data)))
+                sequence += 1
+                if len(in_flight) >= STREAM_WINDOW:
+                    in_flight.popleft().wait_for_publish()
+            if sent < read_size:
+                # the rest of the data has been consumed or expired meanwhile
+                local_publisher.publish(topic, encode_chunk(sequence, True, b''))
+            if rootlogger.isEnabledFor(logging.DEBUG):
+                rootlogger.debug("Length of streamed data: %s (%s chunks)", sent, sequence)
     except Exception as e:
         print("Exception: %s" % e)
 
@@ -383,9 +475,11 @@ def on_local_log(client, userdata, level, string):
 
 
 def main():
-    global is_testing
+    global core_publisher
+    global local_publisher
     # RESTful API runs
     # app.run(debug=True)
+    logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(name)s %(levelname)s %(message)s")
 
     # MQTT connection
     message_client = mqtt.Client("Edge1")
@@ -405,9 +499,17 @@ def main():
     # message_local_client.connect(MQTT_HOST_ON_EDGE, MQTT_PORT_ON_EDGE, 60)
     # message_local_client.loop_start()
 
-    # Software-Defined Cache runs
-    sdc.run()
-    print("SDC runs")
+    # replies are published through the connections above (no connection per message)
+    core_publisher = MQTTPublisher(message_client, topic_qos=PUBLISH_QOS, max_inflight=MAX_INFLIGHT_MESSAGES,
+                                   metrics=metrics)
+    local_publisher = MQTTPublisher(message_local_client, topic_qos=PUBLISH_QOS, max_inflight=MAX_INFLIGHT_MESSAGES,
+                                    metrics=metrics)
+    metrics_reporting = threading.Thread(target=metrics.report, args=(METRICS_INTERVAL,), daemon=True)
+    metrics_reporting.start()
+
+    # Software-Defined Caches run
+    cache.run()
+    print("SDC runs (%s streams)" % len(streams))
     scenario_counter = 1
 
     while scenario_counter <= 4:
@@ -421,25 +523,23 @@ def main():
         while loop_counter < loop_round:
             # ---------- Scenario 1
 
-            print("Truncate cache")
-            directory = os.path.join(".", "cache")
-            files = sorted(os.listdir(directory))
-            for file_name in files:
-                full_path = os.path.join(directory, file_name)
-                os.remove(full_path)
+            if TRUNCATE_CACHE_BEFORE_TEST:
+                print("Truncate cache")
+                cache.truncate()
 
             print("Start testing")
             time.sleep(3)
 
-            sdc.initialize()
+            for stream in streams:
+                stream.flow_controller.reset()
 
             message_client.connect(MQTT_HOST, MQTT_PORT, 60)
             message_client.loop_start()
             message_local_client.connect(MQTT_HOST_ON_EDGE, MQTT_PORT_ON_EDGE, 60)
             message_local_client.loop_start()
 
-            publish.single("core/edge/" + SDC_id + "/init_for_testing", scenario_counter, hostname=MQTT_HOST,
-                           port=MQTT_PORT, qos=2)
+            for stream in streams:
+                core_publisher.publish(stream.core_topic("init_for_testing"), scenario_counter)
 
             # # Creating threads
             # t1 = threading.Thread(target=consume_data_scenario1)
@@ -448,7 +548,7 @@ def main():
             # # Wait until threads are completely executed
             # t1.join()
             # print("Test 1 is done!")
-            while is_testing:
+            while any(stream.is_testing for stream in streams):
                 time.sleep(0.005)
 
             print("Done to test")
@@ -457,7 +557,8 @@ def main():
             message_local_client.loop_stop()
             message_local_client.disconnect()
 
-            is_testing = True
+            for stream in streams:
+                stream.is_testing = True
 
             # time.sleep(2)
             #
@@ -571,7 +672,8 @@ def main():
     message_client.connect(MQTT_HOST, MQTT_PORT, 60)
     message_client.loop_start()
 
-    publish.single("core/edge/" + SDC_id + "/all_test_complete", "complete", hostname=MQTT_HOST, port=MQTT_PORT, qos=2)
+    for stream in streams:
+        core_publisher.publish(stream.core_topic("all_test_complete"), "complete")
     print("All threads is done!")
     print("Notify - All test complete")
     time.sleep(2)
@@ -0,0 +1,428 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : ScenarioBenchmark.py
+# description     : python benchmark harness which replays the consumer scenarios against the cache
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This harness replays the four consumer scenarios of SDCManager with a constant, Zipf or bursty
+#                   producer, either through an in-process broker (LocalBroker and AsyncSDCManager)
+#                   or by calling SoftwareDefinedCache directly (no MQTT broker is necessary).
+#                   All random choices are seeded, so runs with the same options are comparable across commits.
+#                   Usage: python ScenarioBenchmark.py [--targets direct broker] [--producers constant zipf bursty]
+#                          [--scenarios 1 2 3 4] [--json] [--output FILE] [--compare FILE]
+# ==============================================================================
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import AsyncSDCManager
+import AsyncSoftwareDefinedCache as ASDC
+import LocalBroker
+import SoftwareDefinedCache as SDC
+from FlowSimulator import consumer_scenario
+from Metrics import Histogram
+
+TARGETS = ("direct", "broker")
+PRODUCERS = ("constant", "zipf", "bursty")
+SCENARIOS = (1, 2, 3, 4)
+
+DEFAULT_CAPACITY = 5  # MB (the same as STREAMS of SDCManager)
+DEFAULT_INGEST_RATE = 16 << 20  # byte per second
+DEFAULT_DURATION = 5.0  # sec
+DEFAULT_SEED = 1
+DEFAULT_MESSAGE_SIZE = 64 << 10
+DEFAULT_SAMPLE_INTERVAL = 0.1  # sec
+
+# message sizes of the Zipf producer: rank k (1 - ZIPF_RANKS) has k * ZIPF_UNIT bytes with probability ~ 1 / k^alpha
+ZIPF_UNIT = 4 << 10
+ZIPF_RANKS = 64
+ZIPF_ALPHA = 1.2
+# the bursty producer sends at BURST_FACTOR times the ingest rate for BURST_TIME on average, and then pauses
+BURST_FACTOR = 4
+BURST_TIME = 0.2  # sec
+
+
+def producer_pattern(pattern, rng, rate, message_size=DEFAULT_MESSAGE_SIZE):
+    """generate (interval, size) of a producer whose mean ingest rate is rate
+
+    constant: message_size bytes at a fixed interval
+    zipf: Zipf-distributed message sizes at exponentially distributed intervals (Poisson arrivals)
+    bursty: message_size bytes at BURST_FACTOR times the rate during a burst, and nothing between the bursts
+
+    :param pattern: one of PRODUCERS
+    :param rng: random.Random of the producer
+    :param rate: the mean ingest rate (unit: byte per second)
+    :param message_size: the size of a message of the constant and the bursty producers (unit: byte)
+    """
+    if pattern == "constant":
+        while True:
+            yield message_size / rate, message_size
+    elif pattern == "zipf":
+        ranks = list(range(1, ZIPF_RANKS + 1))
+        weights = [1.0 / (rank ** ZIPF_ALPHA) for rank in ranks]
+        mean_size = ZIPF_UNIT * sum(rank * weight for rank, weight in zip(ranks, weights)) / sum(weights)
+        while True:
+            rank = rng.choices(ranks, weights)[0]
+            yield rng.expovariate(rate / mean_size), rank * ZIPF_UNIT
+    elif pattern == "bursty":
+        interval = message_size / (rate * BURST_FACTOR)
+        while True:
+            count = max(int(rng.expovariate(1.0 / BURST_TIME) / interval), 1)
+            # the pause before the burst keeps the mean rate
+            yield rng.expovariate(1.0 / (BURST_TIME * (BURST_FACTOR - 1))), message_size
+            for _ in range(count - 1):
+                yield interval, message_size
+    else:
+        raise ValueError("Unknown producer: %s" % pattern)
+
+
+def max_message_size(pattern, message_size=DEFAULT_MESSAGE_SIZE):
+    return ZIPF_RANKS * ZIPF_UNIT if pattern == "zipf" else message_size
+
+
+class ScenarioRecorder:
+
+    def __init__(self, target, scenario, producer, options):
+        """initialize this class
+
+        The results of a run: the ingested and the consumed bytes, the read latency (from the request to the data),
+        the hits and misses of the consumer and the utilization of the cache sampled over time.
+        """
+        self.target = target
+        self.scenario = scenario
+        self.producer = producer
+        self.options = options
+        self.produced_bytes = 0
+        self.dropped_bytes = 0
+        self.consumed_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.read_latency = Histogram()
+        self.utilization = []
+        self.start_time = None
+        self.elapsed_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        self.elapsed_time = time.perf_counter() - self.start_time
+
+    def record_put(self, size, result):
+        if result:
+            self.produced_bytes += size
+        else:
+            self.dropped_bytes += size
+
+    def record_read(self, latency, size, result):
+        self.read_latency.record(latency)
+        if result:
+            self.consumed_bytes += size
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def sample(self, utilization):
+        self.utilization.append([round(time.perf_counter() - self.start_time, 3), round(utilization, 4)])
+
+    def result(self):
+        utilizations = [sample[1] for sample in self.utilization]
+        return {
+            "target": self.target,
+            "scenario": self.scenario,
+            "producer": self.producer,
+            "seed": self.options.seed,
+            "duration": self.options.duration,
+            "capacity": self.options.capacity,
+            "ingest_rate": self.options.rate,
+            "read_ahead": self.options.read_ahead if self.target == "direct" else 0,
+            "elapsed_time": self.elapsed_time,
+            "produced_bytes": self.produced_bytes,
+            "dropped_bytes": self.dropped_bytes,
+            "consumed_bytes": self.consumed_bytes,
+            "ingest_throughput": self.produced_bytes / self.elapsed_time,
+            "read_throughput": self.consumed_bytes / self.elapsed_time,
+            "reads": self.hits + self.misses,
+            "hits": self.hits,
+            "misses": self.misses,
+            "read_latency": self.read_latency.snapshot(),
+            "mean_utilization": sum(utilizations) / len(utilizations) if len(utilizations) > 0 else None,
+            "utilization": self.utilization,
+        }
+
+
+def create_rngs(seed, scenario, producer):
+    # separate generators, so that the data a producer sends does not depend on the reads of the consumer
+    return (random.Random("%s-%s-%s-producer" % (seed, scenario, producer)),
+            random.Random("%s-%s-%s-consumer" % (seed, scenario, producer)))
+
+
+def create_payload(rng, size):
+    # the messages are slices of one seeded payload (no generation cost while producing)
+    return memoryview(rng.getrandbits(size * 8).to_bytes(size, "little"))
+
+
+# --------------------------------------------- SoftwareDefinedCache directly ---------------------------------------------#
+def _produce(sdc, pattern, rng, payload, recorder, stop_event):
+    next_time = time.perf_counter()
+    for interval, size in producer_pattern(pattern, rng, recorder.options.rate):
+        # the arrivals are scheduled (open loop), so the backpressure of the cache delays but does not drop them
+        next_time += interval
+        delay = next_time - time.perf_counter()
+        if stop_event.wait(delay if delay > 0 else 0):
+            return
+        recorder.record_put(size, sdc.put_to_write_buffer(payload[:size], timeout=recorder.options.duration))
+
+
+def _consume(sdc, scenario, rng, recorder, stop_event):
+    for interval, read_size in consumer_scenario(scenario, rng):
+        if stop_event.wait(interval):
+            return
+        start_time = time.perf_counter()
+        _, result = sdc.read_views(read_size)
+        recorder.record_read(time.perf_counter() - start_time, read_size, result)
+
+
+def _sample(utilization, recorder, stop_event):
+    while not stop_event.wait(recorder.options.sample_interval):
+        recorder.sample(utilization())
+
+
+def run_direct(scenario, producer, options):
+    recorder = ScenarioRecorder("direct", scenario, producer, options)
+    producer_rng, consumer_rng = create_rngs(options.seed, scenario, producer)
+    payload = create_payload(producer_rng, max_message_size(producer))
+    directory = tempfile.mkdtemp()
+    try:
+        sdc = SDC.SoftwareDefinedCache(directory, options.capacity, read_ahead_size=options.read_ahead)
+        sdc.run()
+        stop_event = threading.Event()
+        threads = [threading.Thread(target=_produce, args=(sdc, producer, producer_rng, payload, recorder, stop_event)),
+                   threading.Thread(target=_consume, args=(sdc, scenario, consumer_rng, recorder, stop_event)),
+                   threading.Thread(target=_sample, args=(lambda: sdc.utilization, recorder, stop_event))]
+        recorder.start()
+        for thread in threads:
+            thread.start()
+        time.sleep(options.duration)
+        stop_event.set()
+        sdc.buffer.close()  # wakes up a producer blocked by the backpressure
+        for thread in threads:
+            thread.join()
+        recorder.stop()
+        sdc.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return recorder.result()
+
+
+# --------------------------------------------- in-process broker ---------------------------------------------#
+async def _publish_data(client, topic, pattern, rng, payload, recorder):
+    next_time = time.perf_counter()
+    for interval, size in producer_pattern(pattern, rng, recorder.options.rate):
+        next_time += interval
+        await asyncio.sleep(max(next_time - time.perf_counter(), 0))
+        # the broker does not report the drops of the manager (the same as MQTT)
+        await client.publish(topic, payload[:size])
+        recorder.record_put(size, True)
+
+
+async def _request_data(client, request_topic, scenario, rng, recorder):
+    messages = client.messages
+    try:
+        for interval, read_size in consumer_scenario(scenario, rng):
+            await asyncio.sleep(interval)
+            start_time = time.perf_counter()
+            await client.publish(request_topic, read_size)
+            msg = await messages.__anext__()
+            recorder.record_read(time.perf_counter() - start_time, read_size, len(msg.payload) == read_size)
+    finally:
+        await messages.aclose()
+
+
+async def _sample_async(utilization, recorder):
+    while True:
+        await asyncio.sleep(recorder.options.sample_interval)
+        recorder.sample(utilization())
+
+
+async def _run_broker(scenario, producer, options, directory):
+    recorder = ScenarioRecorder("broker", scenario, producer, options)
+    producer_rng, consumer_rng = create_rngs(options.seed, scenario, producer)
+    payload = create_payload(producer_rng, max_message_size(producer))
+
+    broker = LocalBroker.LocalBroker()
+    sdc = ASDC.AsyncSoftwareDefinedCache(directory, options.capacity)
+    await sdc.start()
+    manager = AsyncSDCManager.AsyncSDCManager(sdc, broker.client(), broker.client())
+    manager_task = asyncio.ensure_future(manager.run())
+    producer_client = broker.client()
+    consumer_client = broker.client()
+    await consumer_client.subscribe(manager.local_topic("data"))
+    await asyncio.sleep(0)
+
+    recorder.start()
+    tasks = [asyncio.ensure_future(_publish_data(producer_client, manager.core_topic("data"), producer,
+                                                 producer_rng, payload, recorder)),
+             asyncio.ensure_future(_request_data(consumer_client, manager.local_topic("data_req"), scenario,
+                                                 consumer_rng, recorder)),
+             asyncio.ensure_future(_sample_async(lambda: sdc.used / sdc.capacity, recorder))]
+    await asyncio.sleep(options.duration)
+    for task in tasks + [manager_task]:
+        task.cancel()
+    await asyncio.gather(*tasks, manager_task, return_exceptions=True)
+    recorder.stop()
+    await sdc.close()
+    return recorder.result()
+
+
+def run_broker(scenario, producer, options):
+    directory = tempfile.mkdtemp()
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_run_broker(scenario, producer, options, directory))
+    finally:
+        loop.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# --------------------------------------------- report ---------------------------------------------#
+def git_commit():
+    try:
+        # the commit of this repository, wherever the benchmark is run from
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(options):
+    runners = {"direct": run_direct, "broker": run_broker}
+    results = []
+    for target in options.targets:
+        for producer in options.producers:
+            for scenario in options.scenarios:
+                # the cache and the manager print their status; only the results are reported
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results.append(runners[target](scenario, producer, options))
+    return {
+        "commit": git_commit(),
+        "python_version": platform.python_version(),
+        "results": results,
+    }
+
+
+def result_key(result):
+    return result["target"], result["producer"], result["scenario"]
+
+
+def print_report(report, baseline=None):
+    baselines = {}
+    if baseline is not None:
+        baselines = {result_key(result): result for result in baseline["results"]}
+        print("commit: %s (baseline: %s)" % (report["commit"], baseline["commit"]))
+    else:
+        print("commit: %s" % report["commit"])
+
+    print("%-7s %-9s %-9s %-11s %-11s %-10s %-10s %-8s %-8s %-10s" % (
+        "target", "producer", "scenario", "ingest MB/s", "read MB/s", "p50 (us)", "p99 (us)", "hits", "misses",
+        "mean util"))
+    for result in report["results"]:
+        print("%-7s %-9s %-9s %-11.2f %-11.2f %-10s %-10s %-8s %-8s %-10.3f" % (
+            result["target"], result["producer"], result["scenario"], result["ingest_throughput"] / (1 << 20),
+            result["read_throughput"] / (1 << 20), result["read_latency"]["p50_us"],
+            result["read_latency"]["p99_us"], result["hits"], result["misses"], result["mean_utilization"] or 0))
+        base = baselines.get(result_key(result))
+        if base is not None:
+            print("%-27s %-11s %-11s %-10s %-10s %-8s %-8s %-10s" % (
+                "  vs baseline", _change(result["ingest_throughput"], base["ingest_throughput"]),
+                _change(result["read_throughput"], base["read_throughput"]),
+                _change(result["read_latency"]["p50_us"], base["read_latency"]["p50_us"]),
+                _change(result["read_latency"]["p99_us"], base["read_latency"]["p99_us"]),
+                "%+d" % (result["hits"] - base["hits"]), "%+d" % (result["misses"] - base["misses"]),
+                _change(result["mean_utilization"], base["mean_utilization"])))
+
+
+def _change(value, base):
+    if not value or not base:
+        return "-"
+    return "%+.1f%%" % ((value - base) * 100.0 / base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay the consumer scenarios against the cache")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--producers", nargs="+", choices=PRODUCERS, default=list(PRODUCERS))
+    parser.add_argument("--scenarios", nargs="+", type=int, choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="the time of a run (unit: second)")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY, help="the capacity of the cache (unit: MB)")
+    parser.add_argument("--rate", type=int, default=DEFAULT_INGEST_RATE,
+                        help="the mean ingest rate of the producer (unit: byte per second)")
+    parser.add_argument("--read-ahead", type=int, default=0,
+                        help="the read-ahead buffer size of the direct target (unit: byte, 0: disabled)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--sample-interval", type=float, default=DEFAULT_SAMPLE_INTERVAL,
+                        help="the period to sample the utilization (unit: second)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="compare the results with a JSON file written by --output")
+    options = parser.parse_args()
+
+    report = run_benchmarks(options)
+    if options.output is not None:
+        with open(options.output, "w") as f:
+            json.dump(report, f)
+    if options.json:
+        print(json.dumps(report))
+        return
+
+    baseline = None
+    if options.compare is not None:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+
+if __name__ == '__main__':
+    main()
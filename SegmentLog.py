@@ -0,0 +1,961 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : SegmentLog.py
+# description     : python SegmentLog class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This SegmentLog is an append-only, log-structured store of preallocated segment files
+#                   used as the storage backend of SoftwareDefinedCache.
+# ==============================================================================
+from collections import deque
+import functools
+import logging
+import mmap
+import os
+import random
+import struct
+import time
+import zlib
+
+from FileDescriptorCache import DEFAULT_MAX_OPEN_FILES, FileDescriptorCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENT_SIZE = 64 << 20
+SEGMENT_SUFFIX = ".log"
+SEGMENT_MAGIC = b"SDC2"
+# magic, codec id (0: raw data), length of the data written to the segment, checksum block size, data offset
+# (the header is followed by the checksum table, and the data starts at the data offset; block size 0: no checksums)
+SEGMENT_HEADER = struct.Struct("<4sIQII")
+# segments of the previous format have no checksums, and their data follows the header
+LEGACY_SEGMENT_MAGIC = b"SDCL"
+LEGACY_SEGMENT_HEADER = struct.Struct("<4sIQ")
+RAW_CODEC_ID = 0
+# crc32 of each block of the (uncompressed) data of a segment; the crc32 of the last block covers its written part
+CHECKSUM_BLOCK_SIZE = 64 << 10
+CHECKSUM = struct.Struct("<I")
+# the data offset is aligned to a page
+SEGMENT_ALIGNMENT = 4096
+# always: verify all data before it is read, sampled: verify a random sample of blocks,
+# recovery: verify the segments restored by load() (e.g., torn writes of a crash),
+# never: do not verify (and do not compute checksums for new segments)
+VERIFY_POLICIES = ("always", "sampled", "recovery", "never")
+# the maximum number of decompressed segments after the tail which are kept (e.g., for a read or read-ahead
+# spanning several compressed segments)
+MAX_DECOMPRESSED_SEGMENTS = 8
+# the fraction of blocks verified by the "sampled" policy
+DEFAULT_VERIFY_SAMPLE_RATE = 1 / 32
+# The read cursor is journaled in the manifest (the written lengths are in the segment headers).
+MANIFEST_FILE = "MANIFEST"
+MANIFEST_MAGIC = b"SDCM"
+# magic, segment id and offset of the read cursor, crc32 of the preceding fields
+MANIFEST_RECORD = struct.Struct("<4sQQI")
+# the maximum number of buffers of a vectored write
+if hasattr(os, "sysconf") and "SC_IOV_MAX" in os.sysconf_names:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+else:
+    IOV_MAX = 16
+
+
+class ChecksumError(Exception):
+    """the data of a segment does not match its checksum (or a compressed segment cannot be decompressed)
+    """
+
+    def __init__(self, segment_id, offset):
+        super().__init__("Corrupt data in segment %s (block at offset %s)" % (segment_id, offset))
+        self.segment_id = segment_id
+        self.offset = offset
+
+
+def segment_data_offset(segment_size):
+    """
+    :return: the offset of the data in a segment file of segment_size bytes (after the header and checksum table)
+    """
+    blocks = -(-segment_size // CHECKSUM_BLOCK_SIZE)
+    return -(-(SEGMENT_HEADER.size + CHECKSUM.size * blocks) // SEGMENT_ALIGNMENT) * SEGMENT_ALIGNMENT
+
+
+def pwrite_buffers(fd, buffers, offset):
+    """write buffers (memoryviews) contiguously at offset with one syscall per IOV_MAX buffers
+    """
+    if not hasattr(os, "pwritev"):
+        buffers = [b''.join(buffers)]
+    buffers = deque(buffers)
+    while len(buffers) > 0:
+        group = [buffers[i] for i in range(min(IOV_MAX, len(buffers)))]
+        if hasattr(os, "pwritev"):
+            written = os.pwritev(fd, group, offset)
+        else:
+            written = os.pwrite(fd, group[0], offset)
+        offset += written
+        while written > 0:
+            if len(buffers[0]) <= written:
+                written -= len(buffers.popleft())
+            else:
+                # a short write continues with the rest of the buffer
+                buffers[0] = memoryview(buffers[0])[written:]
+                written = 0
+
+
+def pread_into(fd, view, offset):
+    """fill view (a writable memoryview) with the data at offset
+    """
+    while len(view) > 0:
+        if hasattr(os, "preadv"):
+            length = os.preadv(fd, [view], offset)
+        else:
+            data = os.pread(fd, len(view), offset)
+            length = len(data)
+            view[:length] = data
+        if length == 0:
+            raise EOFError("Segment is shorter than its header (offset: %s)" % offset)
+        view = view[length:]
+        offset += length
+
+
+def compress_segment(codec, path, written, data_offset, checksums, sync, data):
+    """compress the data of a sealed segment into path + ".tmp" (in a worker process with a TransformPool)
+
+    :param checksums: the checksum table of the segment (it covers the uncompressed data), or None
+    :return: the size of the compressed data, or None if the data is incompressible (no file is written)
+    """
+    compressed = codec.compress(data)
+    if len(compressed) >= len(data):
+        # incompressible data stays raw
+        return None
+    fd = os.open(path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        block_size = 0 if checksums is None else CHECKSUM_BLOCK_SIZE
+        header = SEGMENT_HEADER.pack(SEGMENT_MAGIC, codec.codec_id, written, block_size, data_offset)
+        pwrite_buffers(fd, [(header + (checksums or b'')).ljust(data_offset, b'\0'), compressed], 0)
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    return len(compressed)
+
+
+class SegmentLog:
+
+    def __init__(self, directory, segment_size=DEFAULT_SEGMENT_SIZE, use_mmap=False, codec=None,
+                 max_open_files=DEFAULT_MAX_OPEN_FILES, transform_pool=None, verify_policy="recovery",
+                 verify_sample_rate=DEFAULT_VERIFY_SAMPLE_RATE):
+        """initialize this class
+
+        Data is appended at the head segment and read sequentially from the tail segment.
+        A segment file is preallocated once, filled append-only, and deleted when it has been read completely.
+        The read cursor is overwritten in place in the manifest after every read,
+        so load() restores the unread data and the cursor without scanning the data.
+        With a codec, a segment is compressed when it is sealed (rotated out of the head);
+        the raw head segment is replaced by the compressed file, which is decompressed as a whole when it is read.
+        Offsets and sizes are those of the uncompressed data.
+        A segment file is opened once for its lifetime as long as it stays in the LRU cache of file descriptors
+        (the descriptor of the head segment is handed over to the reader when the segment is sealed).
+        The writer side (append() and sync()) and the reader side (the other methods) can run in two threads
+        without a common lock: they share only the segment index, whose tail is removed only after the writer
+        has moved on to a later segment, and counters which each side updates by itself.
+        Each side is serialized by the caller, and load(), truncate(), close() and apply_compressions()
+        need both sides.
+        With a transform_pool, sealed segments are compressed in worker processes while the writer goes on;
+        a segment stays raw until the caller applies the finished compressions (apply_compressions()).
+        Every block of CHECKSUM_BLOCK_SIZE bytes has a crc32 in the checksum table after the segment header
+        (unless verify_policy is "never"), which is written together with the header,
+        so a torn write or corrupt data is detected when it is read.
+        The blocks are verified (according to verify_policy) before the data of sequential reads is consumed;
+        a mismatch raises ChecksumError and nothing is consumed (read_at() and peek() are not verified).
+
+        :param directory: the dir to create segment files
+        :param segment_size: the size of data in a segment file (unit: byte)
+        :param use_mmap: read the tail segment through a memory map (read_views() returns zero-copy slices)
+        :param codec: the Codec to compress sealed segments (None: segments are not compressed)
+        :param max_open_files: the maximum number of cached file descriptors of sealed segments
+        :param transform_pool: the TransformPool to compress and decompress segments (None: in this thread)
+        :param verify_policy: which blocks are verified ("always", "sampled", "recovery" or "never")
+        :param verify_sample_rate: the fraction of blocks verified by the "sampled" policy
+        """
+        if verify_policy not in VERIFY_POLICIES:
+            raise ValueError("Unknown verify policy: %s" % verify_policy)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.use_mmap = use_mmap
+        self.codec = codec
+        self.transform_pool = transform_pool
+        self.verify_policy = verify_policy
+        self.verify_sample_rate = verify_sample_rate
+        # the data offset of new segments
+        self._data_offset = segment_data_offset(segment_size)
+        # (segment, TransformFuture) of the compressions running in the transform pool, in sealing order
+        self._compressions = deque()
+        # fsync a segment when it is rotated out (set by SoftwareDefinedCache according to its fsync policy)
+        self.sync_on_rotate = False
+        # segment index, tail (oldest) first:
+        # [segment_id, written, offset, modified time, stored, codec id, data offset, checksums]
+        # (offset is the position of the segment in the logged byte stream, stored is the size on disk,
+        # and checksums is a list of (crc32, filled length) per block, or None for a segment without checksums)
+        self._segments = deque()
+        self._next_segment_id = 0
+        self._stream_end = 0
+        self._head_fd = None
+        # the checksum table of the head segment as it is written to the file
+        self._head_table = None
+        # the descriptors are used by the reader only; sealed head descriptors are handed over through a queue
+        self._fds = FileDescriptorCache(max_open_files)
+        self._sealed_fds = deque()
+        self._tail_map = None
+        # the decompressed data of a compressed tail segment
+        self._tail_data = None
+        # segment_id -> decompressed data of the compressed segments after the tail which were read, oldest first
+        self._decompressed = {}
+        self._manifest_fd = None
+        self.tail_offset = 0
+        # the unread data is _stream_end (advanced by the writer) - _dropped (advanced by the reader),
+        # and the data on disk is _physical_written - _physical_released
+        self._dropped = 0
+        self._physical_written = 0
+        self._physical_released = 0
+        # the data up to this stream offset has been verified (or skipped), and the crc32 of the verified part
+        # of its block (None: the block is not verified)
+        self._verified_position = 0
+        self._verified_crc = None
+        # segments before this id were restored by load() (verified by the "recovery" policy)
+        self._recovered_segment_id = 0
+        self.verified_bytes = 0
+        self.corrupt_blocks = 0
+        self.load()
+
+    def load(self):
+        """rebuild the segment index from the segment headers and restore the read cursor from the manifest
+        """
+        self.close()
+        self._segments.clear()
+        self._next_segment_id = 0
+        self._stream_end = 0
+        self.tail_offset = 0
+        self._dropped = 0
+        self._physical_written = 0
+        self._physical_released = 0
+        self._verified_position = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        cursor_segment_id, cursor_offset = self._load_cursor()
+        # segment ids are not reused, so a segment before the cursor has been read completely
+        self._next_segment_id = cursor_segment_id
+        for file_name in sorted(os.listdir(self.directory)):
+            if file_name.endswith(SEGMENT_SUFFIX + ".tmp"):
+                # a compression interrupted by a crash (the segment is replaced only when it is complete)
+                os.remove(os.path.join(self.directory, file_name))
+                continue
+            if not file_name.endswith(SEGMENT_SUFFIX):
+                continue
+            segment_id = int(file_name[:-len(SEGMENT_SUFFIX)])
+            if segment_id < cursor_segment_id:
+                # read completely, but not deleted before a crash
+                os.remove(os.path.join(self.directory, file_name))
+                continue
+            # one header read per segment (no buffered file object), so a warm restart takes milliseconds
+            fd = os.open(os.path.join(self.directory, file_name), os.O_RDONLY)
+            try:
+                # the header and the checksum table of up to SEGMENT_ALIGNMENT bytes are read at once
+                header = os.pread(fd, SEGMENT_ALIGNMENT, 0)
+                checksums = None
+                if header[:4] == SEGMENT_MAGIC:
+                    magic, codec_id, written, block_size, data_offset = SEGMENT_HEADER.unpack_from(header)
+                    if block_size == CHECKSUM_BLOCK_SIZE:
+                        checksums = self._load_checksums(fd, header, written)
+                    elif block_size != 0:
+                        logger.warning("Unsupported checksum block size (%s) of segment: %s", block_size, file_name)
+                else:
+                    magic, codec_id, written = LEGACY_SEGMENT_HEADER.unpack_from(header)
+                    data_offset = LEGACY_SEGMENT_HEADER.size
+                stat = os.fstat(fd)
+            finally:
+                os.close(fd)
+            if magic not in (SEGMENT_MAGIC, LEGACY_SEGMENT_MAGIC):
+                logger.error("Invalid segment: %s", file_name)
+                continue
+            if codec_id != RAW_CODEC_ID and (self.codec is None or codec_id != self.codec.codec_id):
+                logger.error("Unsupported codec (%s) of segment: %s", codec_id, file_name)
+                continue
+            stored = written if codec_id == RAW_CODEC_ID else stat.st_size - data_offset
+            self._segments.append([segment_id, written, self._stream_end, stat.st_mtime, stored, codec_id,
+                                   data_offset, checksums])
+            self._stream_end += written
+            self._physical_written += stored
+            self._next_segment_id = segment_id + 1
+
+        if len(self._segments) > 0 and self._segments[0][0] == cursor_segment_id:
+            self.tail_offset = min(cursor_offset, self._segments[0][1])
+            self._dropped = self.tail_offset
+        self._recovered_segment_id = self._next_segment_id
+
+    @staticmethod
+    def _load_checksums(fd, header, written):
+        blocks = -(-written // CHECKSUM_BLOCK_SIZE)
+        table = memoryview(header)[SEGMENT_HEADER.size:SEGMENT_HEADER.size + CHECKSUM.size * blocks]
+        if len(table) < CHECKSUM.size * blocks:
+            table = os.pread(fd, CHECKSUM.size * blocks, SEGMENT_HEADER.size)
+            if len(table) < CHECKSUM.size * blocks:
+                return None
+        return [(checksum, min(CHECKSUM_BLOCK_SIZE, written - CHECKSUM_BLOCK_SIZE * block))
+                for block, (checksum,) in enumerate(CHECKSUM.iter_unpack(table))]
+
+    def _load_cursor(self):
+        """
+        :return: (segment_id, offset) of the read cursor in the manifest, or (0, 0) if it is missing or corrupt
+        """
+        try:
+            with open(os.path.join(self.directory, MANIFEST_FILE), 'rb') as f:
+                record = f.read(MANIFEST_RECORD.size)
+        except FileNotFoundError:
+            return 0, 0
+        if len(record) == MANIFEST_RECORD.size:
+            magic, segment_id, offset, checksum = MANIFEST_RECORD.unpack(record)
+            if magic == MANIFEST_MAGIC and checksum == zlib.crc32(record[:-4]):
+                return segment_id, offset
+        # the unread data is read again from the beginning of the tail segment
+        logger.warning("Invalid manifest: %s", self.directory)
+        return 0, 0
+
+    def _save_cursor(self):
+        if self._manifest_fd is None:
+            self._manifest_fd = os.open(os.path.join(self.directory, MANIFEST_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        segment_id = self._segments[0][0] if len(self._segments) > 0 else self._next_segment_id
+        record = MANIFEST_RECORD.pack(MANIFEST_MAGIC, segment_id, self.tail_offset, 0)[:-4]
+        os.pwrite(self._manifest_fd, record + struct.pack("<I", zlib.crc32(record)), 0)
+
+    def close(self):
+        self.apply_compressions(wait=True)
+        if self._head_fd is not None:
+            os.close(self._head_fd)
+            self._head_fd = None
+        while len(self._sealed_fds) > 0:
+            os.close(self._sealed_fds.popleft()[1])
+        self._head_table = None
+        self._fds.clear()
+        if self._manifest_fd is not None:
+            os.close(self._manifest_fd)
+            self._manifest_fd = None
+        # the map is closed by the garbage collector when no memoryview refers to it anymore
+        self._tail_map = None
+        self._tail_data = None
+        self._decompressed.clear()
+
+    def segment_path(self, segment_id):
+        return os.path.join(self.directory, "%020d%s" % (segment_id, SEGMENT_SUFFIX))
+
+    @property
+    def segment_count(self):
+        return len(self._segments)
+
+    @property
+    def size(self):
+        """the amount of unread data (unit: byte)
+        """
+        # read in this order, so that a concurrent read and append never make it negative
+        dropped = self._dropped
+        return self._stream_end - dropped
+
+    @property
+    def physical_size(self):
+        """the size of the data of all segments on disk (compressed or not, including read data of the tail)
+        """
+        released = self._physical_released
+        return self._physical_written - released
+
+    def tail_segment_path(self):
+        return self.segment_path(self._segments[0][0])
+
+    def tail_modified_time(self):
+        """
+        :return: the last time data was appended to the tail segment, or None if there is no segment
+        """
+        return self._segments[0][3] if len(self._segments) > 0 else None
+
+    @property
+    def head_segment_id(self):
+        return self._segments[-1][0] if len(self._segments) > 0 else None
+
+    def segment_ids(self):
+        return [segment[0] for segment in self._segments]
+
+    @property
+    def position(self):
+        """the stream offset of the read cursor (the offsets restart from 0 after load())
+        """
+        if len(self._segments) == 0:
+            return self._stream_end
+        return self._segments[0][2] + self.tail_offset
+
+    def append(self, data, contiguous=False):
+        """append data at the head, rotating to a new segment whenever the head segment is full
+
+        The data of each segment is written with one vectored write and one header update,
+        however many chunks are appended at once.
+
+        :param data: bytes-like object or a list of them to append
+        :param contiguous: store data in one segment (rotate first if it does not fit in the head segment)
+        :return: (segment_id, offset) of the first byte of data
+        """
+        views = deque(memoryview(chunk) for chunk in (data if isinstance(data, list) else [data]) if len(chunk) > 0)
+        if contiguous:
+            total = sum(len(view) for view in views)
+            if total > self.segment_size:
+                raise ValueError("Data (%s) is bigger than a segment (%s)" % (total, self.segment_size))
+            head = self._get_head()
+            if self.segment_size - head[1] < total:
+                self._close_head()
+                self._create_segment()
+        head = self._get_head()
+        location = (head[0], head[1])
+        now = time.time()
+        while len(views) > 0:
+            head = self._get_head()
+            room = self.segment_size - head[1]
+            buffers = []
+            length = 0
+            while len(views) > 0 and length < room:
+                view = views[0]
+                if len(view) <= room - length:
+                    buffers.append(views.popleft())
+                else:
+                    buffers.append(view[:room - length])
+                    views[0] = view[room - length:]
+                length += len(buffers[-1])
+            pwrite_buffers(self._head_fd, buffers, head[6] + head[1])
+            if head[7] is not None:
+                self._update_checksums(head, buffers)
+            head[1] += length
+            head[3] = now
+            self._write_header(head)
+            head[4] = head[1]
+            self._physical_written += length
+            # published last, so the reader sees the data only after it is written
+            self._stream_end += length
+
+            if head[1] >= self.segment_size:
+                self._close_head()
+        return location
+
+    def _write_header(self, head):
+        # the header and the checksum table are written at once (a few KB at most)
+        if head[7] is None:
+            os.pwrite(self._head_fd, SEGMENT_HEADER.pack(SEGMENT_MAGIC, RAW_CODEC_ID, head[1], 0, head[6]), 0)
+            return
+        header = SEGMENT_HEADER.pack(SEGMENT_MAGIC, RAW_CODEC_ID, head[1], CHECKSUM_BLOCK_SIZE, head[6])
+        table = memoryview(self._head_table)[:CHECKSUM.size * len(head[7])]
+        if hasattr(os, "pwritev"):
+            os.pwritev(self._head_fd, [header, table], 0)
+        else:
+            os.pwrite(self._head_fd, header + table.tobytes(), 0)
+
+    def _update_checksums(self, head, buffers):
+        # the crc32 of a block is continued from the crc32 of its written part;
+        # the pair in the index is replaced at once, so the reader never sees a crc32 without its length
+        checksums = head[7]
+        position = head[1]
+        for buffer in buffers:
+            while len(buffer) > 0:
+                block, offset = divmod(position, CHECKSUM_BLOCK_SIZE)
+                chunk = buffer[:CHECKSUM_BLOCK_SIZE - offset]
+                if offset == 0:
+                    checksums.append((zlib.crc32(chunk), len(chunk)))
+                else:
+                    checksums[block] = (zlib.crc32(chunk, checksums[block][0]), offset + len(chunk))
+                CHECKSUM.pack_into(self._head_table, CHECKSUM.size * block, checksums[block][0])
+                position += len(chunk)
+                buffer = buffer[len(chunk):]
+
+    def _close_head(self):
+        # the head segment is sealed (no more data is appended to it)
+        head = self._segments[-1]
+        if self.codec is not None and head[1] > 0:
+            if self.transform_pool is None:
+                self._compress_head()
+            else:
+                # the raw data is read into shared memory here, so the descriptor can be handed over below
+                transform = functools.partial(compress_segment, self.codec, self.segment_path(head[0]), head[1],
+                                              head[6], self._sealed_table(), self.sync_on_rotate)
+                self._compressions.append((head, self.transform_pool.submit_file(
+                    transform, self._head_fd, head[6], head[1])))
+        if self.sync_on_rotate:
+            os.fsync(self._head_fd)
+        if head[5] == RAW_CODEC_ID and len(self._sealed_fds) < self._fds.max_size:
+            # the descriptor is reused to read the segment
+            self._sealed_fds.append((head[0], self._head_fd))
+        else:
+            os.close(self._head_fd)
+        self._head_fd = None
+        self._head_table = None
+
+    def _sealed_table(self):
+        if self._segments[-1][7] is None:
+            return None
+        return bytes(self._head_table[:CHECKSUM.size * len(self._segments[-1][7])])
+
+    def _take_sealed_fds(self):
+        # the descriptors of the sealed segments handed over by the writer
+        while len(self._sealed_fds) > 0:
+            self._fds.put(*self._sealed_fds.popleft())
+
+    def _close_segment_fd(self, segment_id):
+        # called when a segment is deleted: its descriptor may not have been taken over yet
+        # (e.g., the segment was consumed without a read), and an open descriptor keeps the deleted file on disk
+        self._take_sealed_fds()
+        self._fds.pop(segment_id)
+
+    def _segment_fd(self, segment_id):
+        # the head segment is read through its own descriptor, which the writer never closes
+        self._take_sealed_fds()
+        fd = self._fds.get(segment_id)
+        if fd is None:
+            fd = os.open(self.segment_path(segment_id), os.O_RDONLY)
+            self._fds.put(segment_id, fd)
+        return fd
+
+    def _compress_head(self):
+        head = self._segments[-1]
+        data = os.pread(self._head_fd, head[1], head[6])
+        stored = compress_segment(self.codec, self.segment_path(head[0]), head[1], head[6], self._sealed_table(),
+                                  self.sync_on_rotate, data)
+        if stored is not None:
+            self._replace_segment(head, stored)
+
+    def _replace_segment(self, segment, stored):
+        # the raw segment is valid until it is atomically replaced (an open reader keeps reading the raw file)
+        path = self.segment_path(segment[0])
+        os.replace(path + ".tmp", path)
+        self._physical_written += stored - segment[4]
+        segment[4] = stored
+        segment[5] = self.codec.codec_id
+
+    @property
+    def compressions_done(self):
+        """whether a compression in the transform pool has finished (apply_compressions() applies it)
+        """
+        return any(future.done() for _, future in self._compressions)
+
+    def apply_compressions(self, wait=False):
+        """replace the sealed segments whose compression in the transform pool has finished by their compressed files
+
+        :param wait: wait for the running compressions too
+        :return: the number of replaced segments
+        """
+        replaced = 0
+        running = deque()
+        while len(self._compressions) > 0:
+            segment, future = self._compressions.popleft()
+            if not wait and not future.done():
+                running.append((segment, future))
+                continue
+            try:
+                stored = future.result()
+            except Exception as e:
+                logger.error("Compression of segment %s failed: %s", segment[0], e)
+                continue
+            if stored is None:
+                continue
+            if not any(entry is segment for entry in self._segments):
+                # read completely (and deleted) meanwhile
+                os.remove(self.segment_path(segment[0]) + ".tmp")
+                continue
+            self._replace_segment(segment, stored)
+            replaced += 1
+        self._compressions = running
+        return replaced
+
+    def _read_compressed(self, segment):
+        # a compressed file has the data offset of the raw segment it replaces
+        with open(self.segment_path(segment[0]), 'rb') as f:
+            try:
+                if self.transform_pool is not None:
+                    size = os.fstat(f.fileno()).st_size - segment[6]
+                    return self.transform_pool.submit_file(self.codec.decompress, f.fileno(), segment[6],
+                                                           size).result()
+                f.seek(segment[6])
+                return self.codec.decompress(f.read())
+            except self.codec.errors as e:
+                raise ChecksumError(segment[0], 0) from e
+
+    def _find_segment(self, segment_id):
+        # segment ids are consecutive unless a segment was removed in the middle (e.g., by ObjectStore)
+        if len(self._segments) == 0:
+            return None
+        index = segment_id - self._segments[0][0]
+        if 0 <= index < len(self._segments) and self._segments[index][0] == segment_id:
+            return self._segments[index]
+        # a copy of the index, which the writer may extend meanwhile
+        for segment in list(self._segments):
+            if segment[0] == segment_id:
+                return segment
+        return None
+
+    def read_at(self, segment_id, offset, length):
+        """read data at a location returned by append() without consuming it
+
+        :param segment_id: the segment of the first byte
+        :param offset: the offset of the first byte in the segment
+        :param length: the amount of data to read (it may continue in the next segments)
+        """
+        chunks = []
+        while length > 0:
+            segment = self._find_segment(segment_id)
+            if segment is None:
+                break
+            if self._codec_id(segment) == RAW_CODEC_ID:
+                chunk = os.pread(self._segment_fd(segment_id), min(length, segment[1] - offset), segment[6] + offset)
+            else:
+                # the segment is decompressed once for all the reads of its data (e.g., the chunks of read-ahead)
+                chunk = memoryview(self._decompressed_data(segment))[offset:offset + length]
+            if len(chunk) == 0:
+                break
+            chunks.append(chunk)
+            length -= len(chunk)
+            segment_id += 1
+            offset = 0
+        return b''.join(chunks)
+
+    def peek(self, position, size):
+        """read up to size unread bytes at a stream offset without consuming them
+
+        :param position: the stream offset of the first byte (at or after the read cursor)
+        :param size: the amount of data to read (unit: byte)
+        """
+        chunks = []
+        position = max(position, self.position)
+        # a copy of the index, which the writer may extend meanwhile
+        for segment in list(self._segments):
+            offset = position - segment[2]
+            if offset >= segment[1]:
+                continue
+            length = min(size, segment[1] - offset)
+            chunks.append(self.read_at(segment[0], offset, length))
+            position += length
+            size -= length
+            if size == 0:
+                break
+        return b''.join(chunks)
+
+    def read_segment(self, segment_id):
+        """read all the data written to a segment without consuming it
+        """
+        for segment in self._segments:
+            if segment[0] == segment_id:
+                return self.read_at(segment_id, 0, segment[1])
+        return b''
+
+    def remove_segment(self, segment_id):
+        """delete a segment which is not the head segment (e.g., a segment without live data)
+
+        :return: the amount of unread data which is deleted (unit: byte)
+        """
+        if segment_id == self.head_segment_id:
+            return 0
+        for index, segment in enumerate(self._segments):
+            if segment[0] == segment_id:
+                break
+        else:
+            return 0
+        if index == 0:
+            return self.discard_tail()
+        del self._segments[index]
+        self._decompressed.pop(segment_id, None)
+        self._dropped += segment[1]
+        self._physical_released += segment[4]
+        self._close_segment_fd(segment_id)
+        os.remove(self.segment_path(segment_id))
+        return segment[1]
+
+    def sync(self):
+        """flush the head segment and the manifest to disk (writer side)
+        """
+        if self._head_fd is not None:
+            os.fsync(self._head_fd)
+        if self._manifest_fd is not None:
+            os.fsync(self._manifest_fd)
+
+    def truncate(self):
+        """delete all the segments (the segment ids continue, so an old manifest never refers to a new segment)
+        """
+        self.close()
+        for segment in self._segments:
+            os.remove(self.segment_path(segment[0]))
+        self._segments.clear()
+        self.tail_offset = 0
+        self._dropped = self._stream_end
+        self._physical_released = self._physical_written
+        self._save_cursor()
+
+    def _get_head(self):
+        if self._head_fd is None:
+            head = self._segments[-1] if len(self._segments) > 0 else None
+            if head is not None and head[1] < self.segment_size and head[5] == RAW_CODEC_ID and \
+                    head[6] == self._data_offset and (head[7] is None) == (self.verify_policy == "never"):
+                # reopen the head segment (e.g., after load()) if it has the layout of this segment size
+                # and checksums unless the policy is "never"
+                self._head_fd = os.open(self.segment_path(head[0]), os.O_RDWR)
+                if head[7] is not None:
+                    self._head_table = bytearray(self._data_offset - SEGMENT_HEADER.size)
+                    for block, (checksum, _) in enumerate(head[7]):
+                        CHECKSUM.pack_into(self._head_table, CHECKSUM.size * block, checksum)
+            else:
+                self._create_segment()
+        return self._segments[-1]
+
+    def _create_segment(self):
+        segment_id = self._next_segment_id
+        self._next_segment_id += 1
+
+        fd = os.open(self.segment_path(segment_id), os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, self._data_offset + self.segment_size)
+        else:
+            os.ftruncate(fd, self._data_offset + self.segment_size)
+        checksums = None if self.verify_policy == "never" else []
+        block_size = 0 if checksums is None else CHECKSUM_BLOCK_SIZE
+        os.pwrite(fd, SEGMENT_HEADER.pack(SEGMENT_MAGIC, RAW_CODEC_ID, 0, block_size, self._data_offset), 0)
+
+        self._head_fd = fd
+        self._head_table = None if checksums is None else bytearray(self._data_offset - SEGMENT_HEADER.size)
+        self._segments.append([segment_id, 0, self._stream_end, time.time(), 0, RAW_CODEC_ID, self._data_offset,
+                               checksums])
+
+    def read(self, size):
+        """read (and consume) up to size bytes sequentially from the tail
+
+        Without use_mmap, the data of raw segments is read directly into one buffer (one syscall per segment).
+
+        :param size: the amount of data to read (unit: byte)
+        :return: the data read (bytearray)
+        """
+        size = min(size, self.size)
+        data = bytearray(size)
+        buffer = memoryview(data)
+        position = 0
+        for tail, offset, length in self._consume(size):
+            if self.use_mmap or self._codec_id(tail) != RAW_CODEC_ID:
+                buffer[position:position + length] = self._view(tail, offset, length)
+            else:
+                pread_into(self._segment_fd(tail[0]), buffer[position:position + length], tail[6] + offset)
+            position += length
+        return data
+
+    def read_views(self, size):
+        """read (and consume) up to size bytes sequentially from the tail without joining them
+
+        With use_mmap, the views are slices of the mapped segment files and no data is copied.
+        They stay valid after the segments are deleted.
+
+        :param size: the amount of data to read (unit: byte)
+        :return: a list of bytes-like objects (one per segment)
+        """
+        return [self._view(tail, offset, length) for tail, offset, length in self._consume(size)]
+
+    def consume(self, size):
+        """consume up to size bytes from the tail without reading them (e.g., the data was prefetched)
+
+        :return: the amount of data consumed (unit: byte)
+        """
+        return sum(length for _, _, length in self._consume(size))
+
+    def _consume(self, size):
+        # generate (segment, offset, length) of the next data, which is consumed when the next one is generated
+        # only the data appended before this read started is read (the writer may be appending meanwhile)
+        consumed = False
+        remaining = min(size, self.size)
+        # verified before anything is consumed, so a ChecksumError leaves the read cursor where it is
+        self._verify(remaining)
+        while remaining > 0:
+            tail = self._segments[0]
+            length = min(remaining, tail[1] - self.tail_offset)
+            if length > 0:
+                yield tail, self.tail_offset, length
+                consumed = True
+                self.tail_offset += length
+                self._dropped += length
+                remaining -= length
+                self._release_tail()
+            elif not self._release_tail():
+                break
+        if consumed:
+            self._save_cursor()
+
+    def _verify(self, size):
+        # verify the blocks of the next size unread bytes which have not been verified yet (a block which is
+        # still written is verified again from where it was verified when more data is read from it)
+        if self.verify_policy == "never" or size == 0:
+            return
+        position = self.position
+        if self._verified_position < position:
+            # e.g., after load() or a discard, the verification starts at the beginning of the block of the cursor
+            tail = self._segments[0]
+            self._verified_position = tail[2] + self.tail_offset // CHECKSUM_BLOCK_SIZE * CHECKSUM_BLOCK_SIZE
+        end = position + size
+        # the index is not copied (only the writer extends it meanwhile, at the other end)
+        index = 0
+        while self._verified_position < end:
+            segment = self._segments[index]
+            index += 1
+            segment_end = segment[2] + segment[1]
+            if self._verified_position >= segment_end:
+                continue
+            if segment[7] is None:
+                self._verified_position = segment_end
+                continue
+            while self._verified_position < min(end, segment_end):
+                block, offset = divmod(self._verified_position - segment[2], CHECKSUM_BLOCK_SIZE)
+                checksum, filled = segment[7][block]
+                if offset == 0:
+                    self._verified_crc = 0 if self._sample_block(segment) else None
+                if self._verified_crc is not None:
+                    start = block * CHECKSUM_BLOCK_SIZE + offset
+                    crc = zlib.crc32(self._read_block(segment, start, filled - offset), self._verified_crc)
+                    if crc != checksum:
+                        self.corrupt_blocks += 1
+                        raise ChecksumError(segment[0], block * CHECKSUM_BLOCK_SIZE)
+                    self._verified_crc = crc
+                    self.verified_bytes += filled - offset
+                self._verified_position = segment[2] + block * CHECKSUM_BLOCK_SIZE + filled
+
+    def _sample_block(self, segment):
+        if self.verify_policy == "always":
+            return True
+        if self.verify_policy == "sampled":
+            return random.random() < self.verify_sample_rate
+        return segment[0] < self._recovered_segment_id
+
+    def _read_block(self, segment, offset, length):
+        # the tail segment is read like the data (the read of a compressed or mapped segment is reused)
+        if segment is self._segments[0]:
+            return self._view(segment, offset, length)
+        if self._codec_id(segment) != RAW_CODEC_ID:
+            return memoryview(self._decompressed_data(segment))[offset:offset + length]
+        return os.pread(self._segment_fd(segment[0]), length, segment[6] + offset)
+
+    def _decompressed_data(self, segment):
+        # a compressed segment is decompressed once: the data of the tail segment is kept until it is released,
+        # and the data of a later segment is taken over when it becomes the tail
+        if segment is self._segments[0]:
+            if self._tail_data is None:
+                self._tail_data = self._decompressed.pop(segment[0], None)
+                if self._tail_data is None:
+                    self._tail_data = self._read_compressed(segment)
+            return self._tail_data
+        data = self._decompressed.get(segment[0])
+        if data is None:
+            data = self._decompressed[segment[0]] = self._read_compressed(segment)
+            if len(self._decompressed) > MAX_DECOMPRESSED_SEGMENTS:
+                del self._decompressed[next(iter(self._decompressed))]
+        return data
+
+    def _view(self, segment, offset, length):
+        start = segment[6] + offset
+        if self._tail_data is None and self._tail_map is None and self._codec_id(segment) != RAW_CODEC_ID:
+            self._decompressed_data(segment)
+        if self._tail_data is not None:
+            return memoryview(self._tail_data)[offset:offset + length]
+        if self.use_mmap:
+            if self._tail_map is None:
+                self._tail_map = self._map_segment(segment[0])
+            return memoryview(self._tail_map)[start:start + length]
+        return os.pread(self._segment_fd(segment[0]), length, start)
+
+    def _codec_id(self, segment):
+        # the writer may replace a raw segment with its compressed file at any time after it is sealed,
+        # so the header of the file behind the descriptor which is read is checked
+        if segment[5] != RAW_CODEC_ID or self.codec is None:
+            return segment[5]
+        # the codec id is at the same place in the header of both formats
+        return LEGACY_SEGMENT_HEADER.unpack(os.pread(self._segment_fd(segment[0]), LEGACY_SEGMENT_HEADER.size, 0))[1]
+
+    def _map_segment(self, segment_id):
+        # segment files are preallocated, so the whole segment (including unwritten space) can be mapped
+        return mmap.mmap(self._segment_fd(segment_id), 0, access=mmap.ACCESS_READ)
+
+    def read_tail_segment(self):
+        """read (and consume) the rest of the tail segment
+        """
+        if len(self._segments) == 0:
+            return b''
+        return self.read(self._segments[0][1] - self.tail_offset)
+
+    def discard_tail(self, include_head=False):
+        """delete the tail segment without reading it
+
+        :param include_head: discard the tail segment even if it is also the head segment
+        :return: the amount of unread data which is discarded (unit: byte)
+        """
+        if len(self._segments) == 0 or (len(self._segments) == 1 and not include_head):
+            return 0
+        tail = self._segments[0]
+        discarded = tail[1] - self.tail_offset
+        self._dropped += discarded
+        self.tail_offset = tail[1]
+        if len(self._segments) == 1:
+            # the next append creates a new head segment (the writer side is held by the caller)
+            self.close()
+            os.remove(self.segment_path(tail[0]))
+            self._segments.popleft()
+            self._physical_released += tail[4]
+            self.tail_offset = 0
+        else:
+            self._release_tail()
+        self._save_cursor()
+        return discarded
+
+    def discard_through(self, segment_id):
+        """delete the segments from the tail up to and including segment_id without reading them
+        (e.g., a segment which failed its checksum verification; discarding the head segment needs the writer side)
+
+        :return: the amount of unread data which is discarded (unit: byte)
+        """
+        discarded = 0
+        while len(self._segments) > 0 and self._segments[0][0] <= segment_id:
+            discarded += self.discard_tail(include_head=True)
+        return discarded
+
+    def _release_tail(self):
+        # a segment is deleted when it is completely read and sealed
+        # (the writer has moved on to a later segment, so the head segment is never deleted here)
+        tail = self._segments[0]
+        if self.tail_offset < tail[1] or len(self._segments) == 1:
+            return False
+        self._close_segment_fd(tail[0])
+        self._tail_map = None
+        self._tail_data = None
+        self._decompressed.pop(tail[0], None)
+        os.remove(self.segment_path(tail[0]))
+        self._segments.popleft()
+        self._physical_released += tail[4]
+        self.tail_offset = 0
+        return True
@@ -0,0 +1,187 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : ShardedSoftwareDefinedCache.py
+# description     : python ShardedSoftwareDefinedCache class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This ShardedSoftwareDefinedCache spreads objects and streams across several directories
+#                   (e.g., one directory per disk) to scale with disks and cores.
+# ==============================================================================
+import json
+import os
+
+from ConsistentHashRing import ConsistentHashRing
+import SoftwareDefinedCache as SDC
+
+
+class ShardedSoftwareDefinedCache:
+
+    def __init__(self, directories, capacity=None, **kwargs):
+        """initialize this class
+
+        Keys of objects and ids of streams are routed to the directories by consistent hashing.
+        Keyed objects are kept by the shards: one SoftwareDefinedCache per directory, with its own locks and threads.
+        Each byte stream is a SoftwareDefinedCache of its own in <directory>/<stream id> (see add_stream()),
+        since streams sharing one FIFO would interleave their data.
+
+        :param directories: the dirs of the shards (e.g., one per disk)
+        :param capacity: the total capacity of the shards, split evenly across them (unit: MB),
+                         or None for no shards (i.e., byte streams only)
+        :param kwargs: the other options of SoftwareDefinedCache, applied to every shard and stream
+        """
+        self.directories = list(directories)
+        self.shards = []
+        if capacity is not None:
+            if capacity < len(self.directories):
+                raise ValueError("capacity (%s MB) must be at least 1 MB per shard" % capacity)
+            shard_capacity, remainder = divmod(capacity, len(self.directories))
+            self.shards = [SDC.SoftwareDefinedCache(directory, shard_capacity + (1 if index < remainder else 0),
+                                                    **kwargs)
+                           for index, directory in enumerate(self.directories)]
+        self.streams = {}
+        self._kwargs = kwargs
+        self._shards_by_directory = dict(zip(self.directories, self.shards))
+        self._ring = ConsistentHashRing(self.directories)
+
+    def shard_for(self, key):
+        """
+        :param key: the key of an object
+        :return: the shard (SoftwareDefinedCache) serving key
+        """
+        if not self.shards:
+            raise ValueError("there are no shards for keyed objects (capacity is None)")
+        return self._shards_by_directory[self._ring.get_node(key)]
+
+    def add_stream(self, stream_id, capacity, **kwargs):
+        """create the cache of a byte stream in the directory that stream_id is routed to
+
+        :param stream_id: the id of the stream
+        :param capacity: the capacity of the stream (unit: MB)
+        :param kwargs: the options of SoftwareDefinedCache overriding those of this class
+        :return: the cache (SoftwareDefinedCache) of the stream
+        """
+        if stream_id in self.streams:
+            raise ValueError("stream %s already exists" % stream_id)
+        directory = os.path.join(self._ring.get_node(stream_id), stream_id)
+        self.streams[stream_id] = SDC.SoftwareDefinedCache(directory, capacity, **dict(self._kwargs, **kwargs))
+        return self.streams[stream_id]
+
+    def remove_stream(self, stream_id):
+        """close the cache of a byte stream and forget it (its segment files are kept)
+        """
+        self.streams.pop(stream_id).close()
+
+    def _caches(self):
+        return self.shards + list(self.streams.values())
+
+    def initialize(self):
+        for cache in self._caches():
+            cache.initialize()
+
+    def run(self):
+        # every shard and stream runs its own writer and expiry threads
+        for cache in self._caches():
+            cache.run()
+
+    def truncate(self):
+        """delete all data of the byte streams (keyed objects are kept)
+        """
+        for stream in self.streams.values():
+            stream.truncate()
+
+    def close(self):
+        """stop the threads and close the files of every shard and stream
+        """
+        for cache in self._caches():
+            cache.close()
+
+    # FIFO byte streams (stream_id: the id given to add_stream())
+    def put_to_write_buffer(self, data, stream_id, timeout=None):
+        return self.streams[stream_id].put_to_write_buffer(data, timeout)
+
+    def store_data(self, data, stream_id):
+        self.streams[stream_id].store_data(data)
+
+    def read_first_data(self, stream_id):
+        return self.streams[stream_id].read_first_data()
+
+    def read_bytes(self, size, stream_id):
+        return self.streams[stream_id].read_bytes(size)
+
+    def read_views(self, size, stream_id):
+        return self.streams[stream_id].read_views(size)
+
+    def read_chunks(self, size, stream_id, chunk_size=SDC.DEFAULT_CHUNK_SIZE):
+        return self.streams[stream_id].read_chunks(size, chunk_size)
+
+    # keyed objects
+    def put(self, key, value, ttl=None):
+        return self.shard_for(key).put(key, value, ttl)
+
+    def get(self, key):
+        return self.shard_for(key).get(key)
+
+    def delete(self, key):
+        return self.shard_for(key).delete(key)
+
+    def contains(self, key):
+        return self.shard_for(key).contains(key)
+
+    # for monitoring cache status
+    def get_cache_status(self):
+        shard_status = [json.loads(shard.get_cache_status()) for shard in self.shards]
+        stream_status = {stream_id: json.loads(stream.get_cache_status())
+                         for stream_id, stream in self.streams.items()}
+        all_status = shard_status + list(stream_status.values())
+        cache_status = {
+            "shards": len(self.shards),
+            "streams": len(self.streams),
+            "capacity": sum(status["capacity"] for status in all_status),
+            "used": sum(status["used"] for status in all_status),
+            "available": sum(status["available"] for status in all_status),
+            "object_capacity": sum(status["object_capacity"] for status in shard_status),
+            "objects": sum(status["objects"] for status in shard_status),
+            "objects_used": sum(status["objects_used"] for status in shard_status),
+            "shard_status": shard_status,
+            "stream_status": stream_status
+        }
+        return json.dumps(cache_status)
+
+    @property
+    def capacity(self):
+        return sum(cache.capacity for cache in self._caches())
+
+    @property
+    def used(self):
+        return sum(cache.used for cache in self._caches())
@@ -38,196 +38,597 @@
 # notes           : This SoftwareDefinedCache is an implementation of a cache managed by software
 #                   in the Python Programming Language.
 # ==============================================================================
-from datetime import datetime
+import logging
 import os
 import sys
 import threading
 import time
 import json
 
+from Codec import create_codec
+from HotTier import DEFAULT_HOT_TIER_MAX_AGE, HotTier
+from Metrics import Metrics
+from ObjectStore import ObjectStore
+from ReadAhead import DEFAULT_READ_AHEAD_TIME, ReadAhead
+from SegmentLog import DEFAULT_SEGMENT_SIZE, DEFAULT_VERIFY_SAMPLE_RATE, VERIFY_POLICIES, ChecksumError, SegmentLog
+from WriteBuffer import DEFAULT_BATCH_LATENCY, DEFAULT_BATCH_SIZE, DEFAULT_HIGH_WATER_MARK, DEFAULT_MAX_SIZE, \
+    WriteBuffer
+
+logger = logging.getLogger(__name__)
+
+# never: leave it to the OS, batch: fsync after every flush, interval: fsync at most every fsync_interval
+FSYNC_POLICIES = ("never", "batch", "interval")
+# the chunk size of read_chunks() (unit: byte)
+DEFAULT_CHUNK_SIZE = 256 << 10
+# logical: the capacity limits the cached data, physical: the capacity limits the data on disk (after compression)
+CAPACITY_ACCOUNTINGS = ("logical", "physical")
+
 
 class SoftwareDefinedCache:
 
-    def __init__(self, directory, capacity, data_retention_period=900):
+    def __init__(self, directory, capacity, data_retention_period=900, segment_size=None, use_mmap=False,
+                 write_buffer_high_water_mark=DEFAULT_HIGH_WATER_MARK, write_buffer_max_size=DEFAULT_MAX_SIZE,
+                 flush_batch_size=DEFAULT_BATCH_SIZE, flush_latency=DEFAULT_BATCH_LATENCY,
+                 fsync_policy="never", fsync_interval=1.0, object_capacity=None, eviction_policy="lru",
+                 expiry_interval=1.0, expiry_time_slice=0.005, hot_tier_size=0,
+                 hot_tier_max_age=DEFAULT_HOT_TIER_MAX_AGE, codec=None, capacity_accounting="logical",
+                 metrics_interval=None, read_ahead_size=0, read_ahead_time=DEFAULT_READ_AHEAD_TIME,
+                 transform_pool=None, verify_policy="recovery", verify_sample_rate=DEFAULT_VERIFY_SAMPLE_RATE):
         """initialize this class
 
         :param directory: the dir to create files for cache
         :param capacity: the capacity of the cache (unit: MB)
-        :param data_retention_period: the data retention period to delete data (unit: second)
+        :param data_retention_period: the data retention period to delete data (unit: second),
+                                      which is also the default TTL of keyed objects
+        :param segment_size: the size of a preallocated segment file (unit: byte, default: min(64 MB, capacity))
+        :param use_mmap: read segments through memory maps (read_views() returns zero-copy memoryviews)
+        :param write_buffer_high_water_mark: the buffered size to block producers (unit: byte)
+        :param write_buffer_max_size: the memory cap of the write-buffer (unit: byte)
+        :param flush_batch_size: flush the write-buffer when this amount of data is buffered (unit: byte)
+        :param flush_latency: flush the write-buffer when this time has passed since the first pending byte (unit: second)
+        :param fsync_policy: when flushed data is synced to disk ("never", "batch" or "interval")
+        :param fsync_interval: the fsync period of the "interval" policy (unit: second)
+        :param object_capacity: the capacity of the keyed objects (unit: MB, default: capacity)
+        :param eviction_policy: the eviction policy of the keyed objects ("lru", "lfu", "arc", "tinylfu"
+                                or an EvictionPolicy instance)
+        :param expiry_interval: the period of the expiry thread (unit: second)
+        :param expiry_time_slice: the maximum time the expiry thread works at once (unit: second)
+        :param hot_tier_size: the size of the in-memory tier of the byte stream (unit: byte, 0: disk only).
+                              Data is written to disk only when it is demoted from this tier (full or aged out),
+                              so data in this tier is lost on a crash.
+        :param hot_tier_max_age: the maximum time data stays in the in-memory tier (unit: second)
+        :param codec: the codec to compress sealed segments of the byte stream (None, "zlib", "lzma" or a Codec)
+        :param capacity_accounting: whether capacity limits the "logical" (cached) or "physical" (on disk) bytes
+        :param metrics_interval: the period to log a snapshot of the metrics (unit: second, None: no snapshots)
+        :param read_ahead_size: the maximum size of the read-ahead buffer of the disk tier (unit: byte, 0: disabled).
+                                A background thread prefetches the data sequential consumers will request next.
+        :param read_ahead_time: the time of requests to prefetch at the observed request size and rate (unit: second)
+        :param transform_pool: a TransformPool to compress and decompress segments in worker processes
+                               (None: in the writer and reader threads); it can be shared by several caches
+        :param verify_policy: which blocks of the disk tier are checked against their crc32 before they are read
+                              ("always", "sampled", "recovery": the segments restored at startup, or "never").
+                              The segment of a corrupt block is discarded, and the read is a miss.
+        :param verify_sample_rate: the fraction of blocks verified by the "sampled" policy
         """
-        self._lock = threading.Lock()
-        self._used_lock = threading.Lock()
-        self._buffer_lock = threading.Lock()
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError("Unknown fsync policy: %s" % fsync_policy)
+        if capacity_accounting not in CAPACITY_ACCOUNTINGS:
+            raise ValueError("Unknown capacity accounting: %s" % capacity_accounting)
+        if verify_policy not in VERIFY_POLICIES:
+            raise ValueError("Unknown verify policy: %s" % verify_policy)
+        # the writer side (appends at the head of the log, the hot tier and fsync) and the reader side
+        # (reads at the tail of the log, the read-ahead buffer and expiry) have their own locks,
+        # so a flush and a read run in parallel. A read which reaches the hot tier (the newest data)
+        # and the expiry of the head segment also take the writer lock, always after the reader lock.
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
         self._is_not_full_cache = threading.Condition()
-        self._is_not_empty_buffer = threading.Condition()
+        self._closed = threading.Event()
+        self._threads = []
         self.directory = directory
         self.capacity = (capacity << 20)
-        self._used = 0
+        self.capacity_accounting = capacity_accounting
+        # used = _stored_bytes (advanced by the writer side) - _removed_bytes (advanced by the reader side);
+        # each counter has a single writer, so used is read without a lock
+        self._stored_bytes = 0
+        self._removed_bytes = 0
         self.data_retention_period = data_retention_period
-        self.seek_start_point = 0
-        self._buffer = bytearray()
+        self.expiry_interval = expiry_interval
+        self.expiry_time_slice = expiry_time_slice
+        self.expired_bytes = 0
+        self._buffer = WriteBuffer(write_buffer_high_water_mark, write_buffer_max_size, flush_batch_size, flush_latency)
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self._last_fsync_time = time.monotonic()
+        self._is_synced = True
+        self.flush_count = 0
+        self.fsync_count = 0
+        if segment_size is None:
+            segment_size = min(DEFAULT_SEGMENT_SIZE, self.capacity)
+        # log-structured store; the segment index is rebuilt from disk once at startup
+        self._log = SegmentLog(directory, segment_size, use_mmap, create_codec(codec), transform_pool=transform_pool,
+                               verify_policy=verify_policy, verify_sample_rate=verify_sample_rate)
+        self._log.sync_on_rotate = fsync_policy != "never"
+        self._stored_bytes = self._log.size
+        self._hot_tier = HotTier(hot_tier_size, hot_tier_max_age) if hot_tier_size > 0 else None
+        # reads served (partly) by each tier; a hot tier miss goes to the disk tier,
+        # and a disk tier miss is a read which could not be served (not enough data)
+        self.hot_tier_hits = 0
+        self.hot_tier_misses = 0
+        self.hot_tier_read_bytes = 0
+        self.disk_tier_hits = 0
+        self.disk_tier_misses = 0
+        self.disk_tier_read_bytes = 0
+        self.demoted_bytes = 0
+        # the unread data discarded with segments which failed their checksum verification
+        self.corrupt_bytes = 0
+        # data after the read cursor of the disk tier, prefetched by prefetch_data()
+        self._read_ahead = ReadAhead(read_ahead_size, read_ahead_time) if read_ahead_size > 0 else None
+        self._prefetch_wanted = threading.Event()
+        # keyed objects (get/put by key) are stored apart from the FIFO byte stream
+        if object_capacity is None:
+            object_capacity = capacity
+        self._objects = ObjectStore(os.path.join(directory, "objects"), object_capacity << 20, segment_size,
+                                    eviction_policy, data_retention_period)
+
+        self.metrics = Metrics()
+        self.metrics_interval = metrics_interval
+        self._put_latency = self.metrics.histogram("put_to_write_buffer")
+        self._flush_latency = self.metrics.histogram("flush")
+        self._read_latency = self.metrics.histogram("read_bytes")
+        self._put_bytes = self.metrics.counter("put_bytes")
+        self._rejected_puts = self.metrics.counter("rejected_puts")
+        self._flushed_bytes = self.metrics.counter("flushed_bytes")
+        self._consumed_bytes = self.metrics.counter("consumed_bytes")
+        self._read_hits = self.metrics.counter("read_hits")
+        self._read_misses = self.metrics.counter("read_misses")
+        self._prefetched_bytes = self.metrics.counter("prefetched_bytes")
+        self._read_ahead_hit_bytes = self.metrics.counter("read_ahead_hit_bytes")
+        self.metrics.gauge("write_buffer", lambda: len(self.buffer))
+        self.metrics.gauge("used", lambda: self.used)
+        self.metrics.gauge("utilization", lambda: self.utilization)
+        self.metrics.gauge("read_hit_ratio", lambda: self._ratio(self._read_hits.value, self._read_misses.value))
+        self.metrics.gauge("object_hit_ratio", lambda: self._ratio(self._objects.hit_count,
+                                                                   self._objects.miss_count))
 
     def initialize(self):
-        self._used = 0
-        self.seek_start_point = 0
-
-    def put_to_write_buffer(self, data):
-        with self._is_not_empty_buffer:
-            # print("Type of data: %s" % type(data))
-            self._buffer_lock.acquire()
-            self.buffer.extend(data)
-            print("Buffer len: %s" % len(self.buffer))
-            self._buffer_lock.release()
-            if len(self.buffer) > 0:
-                self._is_not_empty_buffer.notify()
+        """reload the byte stream from disk (the unread data and the read cursor are restored)
+        """
+        with self._read_lock, self._write_lock:
+            self._log.load()
+            if self._hot_tier is not None:
+                self._hot_tier.clear()
+            if self._read_ahead is not None:
+                self._read_ahead.clear()
+            self._removed_bytes = 0
+            self._stored_bytes = self._log.size
+
+    def truncate(self):
+        """delete all data of the byte stream (keyed objects are kept)
+        """
+        with self._read_lock, self._write_lock:
+            self._log.truncate()
+            if self._hot_tier is not None:
+                self._hot_tier.clear()
+            if self._read_ahead is not None:
+                self._read_ahead.clear()
+            self._removed_bytes = self._stored_bytes
+        with self._is_not_full_cache:
+            self._is_not_full_cache.notify()
+
+    def put_to_write_buffer(self, data, timeout=None):
+        """put data to the write-buffer (blocking while the buffer is above its high-water mark)
+
+        :return: True if data is buffered, False if it is rejected (timeout or memory cap of the write-buffer)
+        """
+        start_time = time.perf_counter()
+        result = self.buffer.put(data, timeout)
+        self._put_latency.record(time.perf_counter() - start_time)
+        if result:
+            self._put_bytes.inc(len(data))
+        else:
+            self._rejected_puts.inc()
+        return result
 
     def store_data_with_write_buffer(self):
+        """Running as a thread, this function flushes the write-buffer to the cache in batches (group commit).
+        """
         print("Thread start - store data with write-buffer")
-        with self._is_not_empty_buffer:
-            while True:
-                self._is_not_empty_buffer.wait()
-
-                with self._is_not_full_cache:
-                    if len(self.buffer) > 0:
-                        remaining_capacity = self.capacity - self.used
-                        if remaining_capacity > 0:
-                            self._buffer_lock.acquire()
-                            data = self.buffer[:remaining_capacity]
-                            self.buffer = self.buffer[remaining_capacity:]
-                            self._buffer_lock.release()
-                            self.store_data(data)
-                            print("Stored data length: %s" % format(len(data), ","))
-                        elif remaining_capacity == 0:   # Cache is full
-                            self._is_not_full_cache.wait()
-                        else:
-                            print("Unknown process (remaining_capacity < 0)")
-                    elif len(self.buffer) == 0:
-                        print("Buffer is empty! (%s)" % self.buffer)
-                    else:
-                        print("Unknown (Buffer is lower than 0)")
+        while True:
+            timeout = None
+            if self.fsync_policy == "interval" and not self._is_synced:
+                timeout = max(self._last_fsync_time + self.fsync_interval - time.monotonic(), 0)
+            if not self.buffer.wait_for_batch(timeout):
+                if self.buffer.closed:
+                    break
+                self._sync()
+                continue
+
+            with self._is_not_full_cache:
+                remaining_capacity = self.capacity - self.capacity_used
+                if remaining_capacity <= 0:
+                    if self.buffer.closed:   # Cache is full, and the rest of the write-buffer is dropped
+                        break
+                    # Cache is full (readers notify the condition after they have consumed data)
+                    self._is_not_full_cache.wait()
+                    continue
+
+            # the condition is not held while the batch is written, so readers are not blocked by the flush
+            start_time = time.perf_counter()
+            chunks = self.buffer.get(remaining_capacity)
+            self.store_data(chunks)
+            self.flush_count += 1
+            self._flushed_bytes.inc(sum(len(chunk) for chunk in chunks))
+            # nothing to sync if the batch stays in the hot tier
+            if not self._is_synced and (self.fsync_policy == "batch" or (
+                    self.fsync_policy == "interval" and
+                    time.monotonic() - self._last_fsync_time >= self.fsync_interval)):
+                self._sync()
+            self._flush_latency.record(time.perf_counter() - start_time)
+            self._apply_compressions()
+        if not self._is_synced:
+            self._sync()
+
+    def _apply_compressions(self):
+        # the segments compressed in the transform pool replace the raw segments while both sides are locked
+        with self._write_lock:
+            done = self._log.compressions_done
+        if done:
+            with self._read_lock, self._write_lock:
+                self._log.apply_compressions()
+
+    def _sync(self):
+        self._write_lock.acquire()
+        self._log.sync()
+        self.fsync_count += 1
+        self._last_fsync_time = time.monotonic()
+        self._is_synced = True
+        self._write_lock.release()
 
     # (Not covered here) recv data <- SDC Manager is in charge of communication with EDCrammer or a cloud service.
     # store data to cache
     def store_data(self, data):
-        # file name should includes milliseconds because caching is occurred quickly.
-        # [:-3] means convert microseconds to milliseconds
-        self._lock.acquire()
-        file_name = datetime.now().strftime("%Y%m%d%H%M%S.%f")[:-3]  # time.strftime("%Y%m%d%H%M%S")
-        full_path = os.path.join(self.directory, file_name)
-
-        f = open(full_path, 'wb')
-        f.write(data)
-
-        # read file size and convert byte to megabyte
-        self.used += os.path.getsize(full_path)
-
-        f.close()
-        self._lock.release()
+        # data (bytes-like object or a list of them) is appended to the head segment of the log
+        # (a new segment is created only when the head is full), or to the hot tier if it is enabled
+        chunks = data if isinstance(data, list) else [data]
+        self._write_lock.acquire()
+        if self._hot_tier is None:
+            self._write_to_log(chunks)
+        else:
+            for chunk in chunks:
+                # the hot tier keeps a reference, so a chunk is copied unless it is (a view of) bytes
+                # (e.g., a bytearray, a memoryview of one or another writable buffer may be reused by the caller)
+                if not isinstance(chunk, bytes) and not (isinstance(chunk, memoryview) and
+                                                         isinstance(chunk.obj, bytes)):
+                    chunk = bytes(chunk)
+                self._hot_tier.append(chunk)
+            self._demote(self._hot_tier.demote())
+        self._stored_bytes += sum(len(chunk) for chunk in chunks)
+        self._write_lock.release()
+
+    def _write_to_log(self, chunks):
+        # one vectored write per segment for all chunks
+        self._log.append(chunks)
+        self._is_synced = False
+
+    def _demote(self, chunks):
+        if len(chunks) > 0:
+            self._write_to_log(chunks)
+            self.demoted_bytes += sum(len(chunk) for chunk in chunks)
+
+    def demote_data(self, now=None):
+        """spill the data which has been in the hot tier for hot_tier_max_age to the disk tier
+        """
+        if self._hot_tier is None:
+            return
+        self._write_lock.acquire()
+        self._demote(self._hot_tier.demote(now))
+        self._write_lock.release()
 
     # !!! the other function to read data is necessary. (e.g., "index.html" file it self) it depends on a service.
-    # read first data from a directory
+    # read the rest of the first (tail) segment
     def read_first_data(self):
         data = False
         if self.used > 0:
-            self._lock.acquire()
-
-            files = sorted(os.listdir(self.directory))
-            if len(files) > 0:
-                file_name = files.pop(0)
-                full_path = os.path.join(self.directory, file_name)
-
-                f = open(full_path, 'rb')
-
-                data = f.read()
-                f.close()
-
-                self.used -= os.path.getsize(full_path)
-                os.remove(full_path)
-
-            self._lock.release()
+            self._read_lock.acquire()
+            # the writer can demote the hot tier to an empty disk tier until the writer side is locked
+            hot_tier_locked = self._hot_tier is not None and self._log.size == 0
+            if hot_tier_locked:
+                self._write_lock.acquire()
+
+            if self._log.size > 0 or self._hot_tier is None:
+                if self._log.segment_count > 0:
+                    try:
+                        data = self._log.read_tail_segment()
+                        self._removed_bytes += len(data)
+                        self.disk_tier_hits += 1
+                        self.disk_tier_read_bytes += len(data)
+                    except ChecksumError as e:
+                        # data is False (nothing is read)
+                        self._discard_corrupt_data(e.segment_id)
+                if self._hot_tier is not None:
+                    self.hot_tier_misses += 1
+            else:
+                # the disk tier is empty, so the oldest data is in the hot tier
+                data = b''.join(self._hot_tier.read(self._log.segment_size))
+                self._removed_bytes += len(data)
+                self.hot_tier_hits += 1
+                self.hot_tier_read_bytes += len(data)
+
+            if hot_tier_locked:
+                self._write_lock.release()
+            self._read_lock.release()
+            with self._is_not_full_cache:
+                self._is_not_full_cache.notify()
 
         return data
 
     def read_bytes(self, size):
-        data = b''
-        result = False
-        print("Utilization: %s" % self.used)
-        try:
-
-            if self.used >= size:
-                with self._is_not_full_cache:
-                    self._lock.acquire()
-                    # if used is bigger or equal with size, the below 2 lines are naturally passed.
-                    # files = sorted(os.listdir(self.directory))
-                    # if len(files) > 0:
-                    data_size = 0
-
-                    while data_size < size:
-                        files = sorted(os.listdir(self.directory))
-                        # always pop 0 because the read file is deleted when seek_pointer reaches EOF.
-                        file_name = files.pop(0)
-                        full_path = os.path.join(self.directory, file_name)
-
-                        f = open(full_path, 'rb')
-
-                        f.seek(self.seek_start_point)
-                        read_data = f.read(size - data_size)
-
-                        f.close()
-
-                        read_data_size = len(read_data)
-                        file_size = os.path.getsize(full_path)
-                        self.used -= read_data_size
-
-                        # update seek_start_point for future access
-                        self.seek_start_point += read_data_size
+        """read size bytes as one bytes-like object
 
-                        # print("Size: %s /// data_size: %s" %
-                        #       (size, data_size))
+        Without use_mmap, the disk tier is read directly into one buffer (bytearray) instead of joining
+        a copy of each segment.
 
-                        # print("Used: %s /// seek_start_point: %s /// file_size: %s" %
-                        #       (self.used, self.seek_start_point, file_size))
-
-                        if file_size <= self.seek_start_point:
-                            # print("!!!!!!!!!!!!!!!!DELETE %s" % full_path)
-                            os.remove(full_path)
-                            self.seek_start_point = 0
-
-                        data += read_data
-                        data_size += read_data_size
+        :return: (data, True) or (b'', False) if less than size bytes are cached
+        """
+        if self._log.use_mmap:
+            views, result = self._read(size)
+            return b''.join(views), result
+        views, result = self._read(size, join=True)
+        return (views[0] if len(views) == 1 else b''.join(views)), result
+
+    def read_chunks(self, size, chunk_size=DEFAULT_CHUNK_SIZE):
+        """read size bytes as an iterator of chunks of chunk_size bytes (the last chunk may be shorter)
+
+        A chunk is read (and consumed) only when it is requested, so the memory is bounded by chunk_size
+        and the first chunk can be sent while the next ones are read.
+        The chunks are contiguous only if nothing else reads this cache until the iterator is exhausted:
+        the reads of other callers (including other iterators) take the data between two chunks,
+        so concurrent streamed responses must be serialized by the caller (e.g., SDCManager.stream_data()).
+        The iterator stops early if the data is consumed by another reader or expires meanwhile.
+
+        :return: (iterator of bytes, True) or (empty iterator, False) if less than size bytes are cached
+        """
+        if self.used < size:
+            return iter(()), False
+        return self._iter_chunks(size, chunk_size), True
+
+    def _iter_chunks(self, size, chunk_size):
+        while size > 0:
+            data, result = self.read_bytes(min(chunk_size, size))
+            if not result:
+                return
+            yield data
+            size -= len(data)
+
+    def read_views(self, size):
+        """read size bytes as a list of bytes-like objects (one per segment) without joining them
+
+        With use_mmap, the views refer to the segment files directly,
+        so the data is copied only when a caller materializes it (e.g., b''.join(views)).
+        """
+        return self._read(size)
 
+    def _read(self, size, join=False):
+        # join: the disk tier is read into one buffer instead of one view per segment
+        views = []
+        result = False
+        start_time = time.perf_counter()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Utilization: %s", self.used)
+        try:
+            # only the writer side adds data while the reader lock is held, so used cannot drop below size
+            self._read_lock.acquire()
+            try:
+                if self.used >= size:
+                    views = self._read_tiers(size, join)
                     result = True
-                    self._lock.release()
+                else:
+                    self.disk_tier_misses += 1
+            except ChecksumError as e:
+                self._discard_corrupt_data(e.segment_id)
+                raise
+            finally:
+                self._read_lock.release()
+
+            if result:
+                with self._is_not_full_cache:
                     self._is_not_full_cache.notify()
+                self._read_hits.inc()
+                self._consumed_bytes.inc(size)
+            else:
+                self._read_misses.inc()
         except Exception as e:
             result = False
             print("!!!!! Exception: %s" % e)
 
-        return data, result
+        self._read_latency.record(time.perf_counter() - start_time)
+        return views, result
+
+    def _read_tiers(self, size, join=False):
+        # called with the reader lock held.
+        # If used is bigger or equal with size, the data is read sequentially from the tail.
+        # The disk tier holds the oldest data, and the hot tier the rest; the writer side is locked
+        # only if the disk tier is short, so that the hot tier is not demoted while it is read.
+        hot_tier_locked = self._hot_tier is not None and self._log.size < size
+        if hot_tier_locked:
+            self._write_lock.acquire()
+        try:
+            views = []
+            disk_size = min(size, self._log.size)
+            if disk_size > 0:
+                views = self._read_disk_tier(disk_size, join)
+                self.disk_tier_hits += 1
+                self.disk_tier_read_bytes += disk_size
+                if self._hot_tier is not None:
+                    self.hot_tier_misses += 1
+            if disk_size < size and self._hot_tier is not None:
+                views += self._hot_tier.read(size - disk_size)
+                self.hot_tier_hits += 1
+                self.hot_tier_read_bytes += size - disk_size
+        finally:
+            if hot_tier_locked:
+                self._write_lock.release()
+        self._removed_bytes += sum(len(view) for view in views)
+        return views
+
+    def _read_disk_tier(self, size, join=False):
+        # called with the reader lock held; the prefetched part is consumed without reading the segments again
+        read_log = (lambda length: [self._log.read(length)]) if join else self._log.read_views
+        if self._read_ahead is None:
+            return read_log(size)
+        position = self._log.position
+        self._read_ahead.observe(position, size)
+        views = self._read_ahead.read(position, size)
+        prefetched = self._log.consume(sum(len(view) for view in views))
+        self._read_ahead_hit_bytes.inc(prefetched)
+        if prefetched < size:
+            views += read_log(size - prefetched)
+        self._prefetch_wanted.set()
+        return views
+
+    def _discard_corrupt_data(self, segment_id):
+        # called with the reader lock held; the unread data up to the end of the corrupt segment is discarded
+        # (a verification failure consumes nothing, so the next read starts after the corrupt segment)
+        logger.error("Corrupt segment: %s (the unread data through it is discarded)", segment_id)
+        head_locked = segment_id == self._log.head_segment_id
+        if head_locked:
+            self._write_lock.acquire()
+        discarded = self._log.discard_through(segment_id)
+        if head_locked:
+            self._write_lock.release()
+        if self._read_ahead is not None:
+            self._read_ahead.clear()
+        self._removed_bytes += discarded
+        self.corrupt_bytes += discarded
+
+    def prefetch_data(self):
+        """Running as a thread, this function fills the read-ahead buffer after each read of the disk tier.
+        The reader lock is released between chunks, so readers wait for one chunk at most (and the writer never).
+        """
+        print("Thread start - prefetch data")
+        while True:
+            self._prefetch_wanted.wait()
+            self._prefetch_wanted.clear()
+            if self._closed.is_set():
+                break
+            while True:
+                data = b''
+                self._read_lock.acquire()
+                position, size = self._read_ahead.next_range(self._log.position, self._log.size)
+                if size > 0:
+                    data = self._log.peek(position, min(size, DEFAULT_CHUNK_SIZE))
+                    self._read_ahead.fill(position, data)
+                    self._prefetched_bytes.inc(len(data))
+                self._read_lock.release()
+                if len(data) == 0 or self._closed.is_set():
+                    break
+
+    # keyed objects (e.g., "index.html")
+    def put(self, key, value, ttl=None):
+        """store value with key (other objects are evicted by the eviction policy if necessary)
+
+        :param ttl: the time to live of value (unit: second, default: data_retention_period)
+        :return: True if value is stored, False if value is bigger than the capacity for objects
+        """
+        return self._objects.put(key, value, ttl)
+
+    def get(self, key):
+        """read the value of key
+
+        :return: bytes, or None if key is not cached
+        """
+        return self._objects.get(key)
+
+    def delete(self, key):
+        return self._objects.delete(key)
+
+    def contains(self, key):
+        return self._objects.contains(key)
 
     def decay_data(self):
-        """Running as a thread, this function deletes data considering last data hit.
-        (e.g., certain period of time has passed since the last hit.)
+        """Running as a thread, this function deletes data whose time to live has passed.
+        (segments of the byte stream: data_retention_period since the last append, keyed objects: their TTL)
         """
-        # aging checking function will be added.
-        current_time = time.time()
+        print("Thread start - decay data")
+        while not self._closed.wait(self.expiry_interval):
+            self.demote_data()
+            self._apply_compressions()
+            while self.expire_data():
+                # more data has expired; the lock is released between time slices
+                time.sleep(0)
 
-        self._lock.acquire()
+    def expire_data(self, now=None):
+        """delete expired data for at most expiry_time_slice
 
-        files = sorted(os.listdir(self.directory))
-        for file_name in files:
-            full_path = os.path.join(self.directory, file_name)
-            no_hit_period = current_time - os.stat(full_path).st_atime
-            if no_hit_period > self.data_retention_period:
-                os.remove(full_path)
+        Segments are deleted from the tail, and objects in the order of their expiration times,
+        so the cost depends on the number of expired entries (not on the number of all entries).
 
-        self._lock.release()
+        :return: True if the time slice has run out before all expired data is deleted
+        """
+        if now is None:
+            now = time.time()
+        deadline = time.monotonic() + self.expiry_time_slice
+
+        while True:
+            self._read_lock.acquire()
+            modified_time = self._log.tail_modified_time()
+            expired = modified_time is not None and modified_time + self.data_retention_period <= now
+            if expired:
+                # discarding the head segment closes it, so only then the writer side is locked too
+                head_locked = self._log.segment_count == 1
+                if head_locked:
+                    self._write_lock.acquire()
+                discarded = self._log.discard_tail(include_head=True)
+                if head_locked:
+                    self._write_lock.release()
+                self._removed_bytes += discarded
+                self.expired_bytes += discarded
+            self._read_lock.release()
+            if not expired:
+                break
+            with self._is_not_full_cache:
+                self._is_not_full_cache.notify()
+            if time.monotonic() >= deadline:
+                return True
+
+        while self._objects.expire(now, limit=64) > 0:
+            if time.monotonic() >= deadline:
+                return True
+        return False
 
     def run(self):
-        # t1 = threading.Thread(target=self.decay_data)
         t1 = threading.Thread(target=self.store_data_with_write_buffer)
         t1.start()
-        # t1.join()
+        t2 = threading.Thread(target=self.decay_data)
+        t2.start()
+        self._threads = [t1, t2]
+        if self._read_ahead is not None:
+            t4 = threading.Thread(target=self.prefetch_data)
+            t4.start()
+            self._threads.append(t4)
+        if self.metrics_interval is not None:
+            t3 = threading.Thread(target=self.metrics.report, args=(self.metrics_interval, None, self._closed),
+                                  daemon=True)
+            t3.start()
+
+    def close(self):
+        """stop the threads of this cache and close its files
+        (the write-buffer is flushed as far as the capacity allows, and the hot tier is spilled to the disk tier)
+        """
+        self._closed.set()
+        self._prefetch_wanted.set()
+        self.buffer.close()
+        with self._is_not_full_cache:
+            self._is_not_full_cache.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.demote_data(float("inf"))
+        with self._read_lock, self._write_lock:
+            self._log.sync()
+            self._log.close()
+        self._objects.close()
 
     # for monitoring cache status
     def get_cache_status(self):
@@ -235,28 +636,83 @@ class SoftwareDefinedCache:
             "directory": self.directory,
             "capacity": self.capacity,
             "used": self.used,
-            "available": self.capacity-self.used,
-            "data_retention_period": self.data_retention_period
+            "available": self.capacity-self.capacity_used,
+            "capacity_accounting": self.capacity_accounting,
+            "physical_used": self.physical_used,
+            "codec": None if self._log.codec is None else self._log.codec.name,
+            "transform_workers": 0 if self._log.transform_pool is None else self._log.transform_pool.workers,
+            "segment_size": self._log.segment_size,
+            "segments": self._log.segment_count,
+            "use_mmap": self._log.use_mmap,
+            "write_buffer": len(self.buffer),
+            "write_buffer_high_water_mark": self.buffer.high_water_mark,
+            "write_buffer_max_size": self.buffer.max_size,
+            "flush_batch_size": self.buffer.batch_size,
+            "flush_latency": self.buffer.batch_latency,
+            "fsync_policy": self.fsync_policy,
+            "fsync_interval": self.fsync_interval,
+            "flushes": self.flush_count,
+            "fsyncs": self.fsync_count,
+            "object_capacity": self._objects.capacity,
+            "objects": len(self._objects),
+            "objects_used": self._objects.used,
+            "eviction_policy": self._objects.eviction_policy.name,
+            "object_hits": self._objects.hit_count,
+            "object_misses": self._objects.miss_count,
+            "evictions": self._objects.eviction_count,
+            "expired_bytes": self.expired_bytes,
+            "expired_objects": self._objects.expiration_count,
+            "data_retention_period": self.data_retention_period,
+            "hot_tier_size": 0 if self._hot_tier is None else self._hot_tier.max_size,
+            "hot_tier_max_age": None if self._hot_tier is None else self._hot_tier.max_age,
+            "hot_tier_used": 0 if self._hot_tier is None else len(self._hot_tier),
+            "disk_tier_used": self._log.size,
+            "hot_tier_hits": self.hot_tier_hits,
+            "hot_tier_misses": self.hot_tier_misses,
+            "hot_tier_read_bytes": self.hot_tier_read_bytes,
+            "disk_tier_hits": self.disk_tier_hits,
+            "disk_tier_misses": self.disk_tier_misses,
+            "disk_tier_read_bytes": self.disk_tier_read_bytes,
+            "demoted_bytes": self.demoted_bytes,
+            "verify_policy": self._log.verify_policy,
+            "verified_bytes": self._log.verified_bytes,
+            "corrupt_blocks": self._log.corrupt_blocks,
+            "corrupt_bytes": self.corrupt_bytes,
+            "read_ahead_size": 0 if self._read_ahead is None else self._read_ahead.max_size,
+            "read_ahead_window": 0 if self._read_ahead is None else self._read_ahead.window,
+            "read_ahead_used": 0 if self._read_ahead is None else len(self._read_ahead),
+            "metrics": self.metrics.snapshot(rates=False)
         }
         return json.dumps(cache_status)
 
     @property
     def used(self):
-        self._used_lock.acquire()
-        val = self._used
-        self._used_lock.release()
-        return val
+        # read in this order, so that a concurrent flush and read never make it negative
+        removed = self._removed_bytes
+        return self._stored_bytes - removed
+
+    @staticmethod
+    def _ratio(hits, misses):
+        return hits / (hits + misses) if hits + misses > 0 else None
+
+    @property
+    def physical_used(self):
+        # the data on disk (the read part of the tail segment is deleted with the segment) and in the hot tier
+        hot_tier_used = 0 if self._hot_tier is None else len(self._hot_tier)
+        return self._log.physical_size + hot_tier_used
+
+    @property
+    def capacity_used(self):
+        return self.used if self.capacity_accounting == "logical" else self.physical_used
 
-    @used.setter
-    def used(self, val):
-        self._used_lock.acquire()
-        self._used = val
-        self._used_lock.release()
+    @property
+    def utilization(self):
+        return self.capacity_used / self.capacity
+
+    @property
+    def seek_start_point(self):
+        return self._log.tail_offset
 
     @property
     def buffer(self):
         return self._buffer
-
-    @buffer.setter
-    def buffer(self, buffer):
-        self._buffer = buffer
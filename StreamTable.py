@@ -0,0 +1,161 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : StreamTable.py
+# description     : python CacheStream and StreamTable classes
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : These classes map the MQTT topics of many SDC_id / client_id pairs
+#                   to their cache streams in the Python Programming Language.
+# ==============================================================================
+import struct
+import threading
+
+CORE_TOPIC_PREFIX = "core/edge/"
+LOCAL_TOPIC_PREFIX = "edge/client/"
+
+# the topics subscribed per stream (core/edge/<SDC_id>/<name>, edge/client/<client_id>/<name>)
+CORE_TOPICS = ("data", "flow_control", "start_testing")
+LOCAL_TOPICS = ("data_req", "data_stream_req", "done_to_test")
+
+# A response of data_stream_req is published as chunks on edge/client/<client_id>/data_stream.
+# A chunk is the header (sequence number from 0, 1 if it is the last chunk) followed by the data.
+CHUNK_HEADER = struct.Struct("<IB")
+
+
+def encode_chunk(sequence, is_last, data):
+    return CHUNK_HEADER.pack(sequence, 1 if is_last else 0) + data
+
+
+def decode_chunk(payload):
+    """
+    :return: (sequence number, True if it is the last chunk, data)
+    """
+    sequence, is_last = CHUNK_HEADER.unpack_from(payload)
+    return sequence, is_last == 1, payload[CHUNK_HEADER.size:]
+
+
+def core_subscriptions():
+    # one wildcard subscription per topic name serves all streams
+    return [CORE_TOPIC_PREFIX + "+/" + name for name in CORE_TOPICS]
+
+
+def local_subscriptions():
+    return [LOCAL_TOPIC_PREFIX + "+/" + name for name in LOCAL_TOPICS]
+
+
+class CacheStream:
+
+    def __init__(self, sdc_id, client_id, sdc):
+        """initialize this class
+
+        A stream has its own cache (capacity quota and FIFO state) and its own flow control.
+
+        :param sdc_id: the id of the stream in the core-edge topics
+        :param client_id: the id of the client in the edge-client topics
+        :param sdc: the SoftwareDefinedCache of this stream
+        """
+        self.sdc_id = sdc_id
+        self.client_id = client_id
+        self.sdc = sdc
+        # held while a data_stream_req response is read and sent, so the chunks of concurrent responses
+        # do not interleave (each response is the next contiguous part of the stream)
+        self.stream_lock = threading.Lock()
+        # set by the manager
+        self.flow_controller = None
+        self.feedback_emitter = None
+        self.is_testing = True
+
+    def core_topic(self, name):
+        return CORE_TOPIC_PREFIX + self.sdc_id + "/" + name
+
+    def local_topic(self, name):
+        return LOCAL_TOPIC_PREFIX + self.client_id + "/" + name
+
+    @property
+    def utilization(self):
+        return self.sdc.utilization
+
+
+class StreamTable:
+
+    def __init__(self):
+        """initialize this class
+
+        The table maps every subscribed topic of a stream to (stream, topic name),
+        so a message on a wildcard subscription is dispatched by one dict lookup.
+        """
+        self._lock = threading.Lock()
+        self._streams = {}
+        self._topics = {}
+
+    def add(self, stream):
+        with self._lock:
+            if stream.sdc_id in self._streams:
+                raise ValueError("SDC_id %s is already served" % stream.sdc_id)
+            topics = {stream.core_topic(name): (stream, name) for name in CORE_TOPICS}
+            topics.update({stream.local_topic(name): (stream, name) for name in LOCAL_TOPICS})
+            for topic in topics:
+                if topic in self._topics:
+                    raise ValueError("client_id %s is already served" % stream.client_id)
+            # the dicts are replaced (not modified), so lookup() does not need the lock
+            streams = dict(self._streams)
+            streams[stream.sdc_id] = stream
+            table = dict(self._topics)
+            table.update(topics)
+            self._streams = streams
+            self._topics = table
+
+    def remove(self, sdc_id):
+        with self._lock:
+            streams = dict(self._streams)
+            stream = streams.pop(sdc_id)
+            self._topics = {topic: entry for topic, entry in self._topics.items() if entry[0] is not stream}
+            self._streams = streams
+            return stream
+
+    def get(self, sdc_id):
+        return self._streams.get(sdc_id)
+
+    def lookup(self, topic):
+        """find the stream of topic
+
+        :return: (stream, topic name), or (None, None) if no stream subscribes topic
+        """
+        return self._topics.get(topic, (None, None))
+
+    def __iter__(self):
+        return iter(list(self._streams.values()))
+
+    def __len__(self):
+        return len(self._streams)
@@ -0,0 +1,206 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : TransformPool.py
+# description     : python TransformPool class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.8
+# notes           : This class runs CPU-heavy transforms of segments and payloads (e.g., compression)
+#                   in worker processes, so that they do not hold the GIL of the MQTT and writer threads.
+#                   The data is exchanged through shared memory (multiprocessing.shared_memory).
+# ==============================================================================
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import os
+
+from SegmentLog import pread_into
+
+# a result at least this big is returned through shared memory instead of the result pipe (unit: byte)
+SHARED_RESULT_SIZE = 64 << 10
+
+
+def _attach(name):
+    # the creator unlinks the block, so it must not be tracked by this process
+    # (before Python 3.13 it is always tracked, but the workers share the resource tracker of the parent,
+    # where a block is tracked once however many processes attach it)
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name)
+
+
+def _run_transform(transform, name, size):
+    # runs in a worker process
+    block = _attach(name)
+    try:
+        view = block.buf[:size]
+        try:
+            result = transform(view)
+        finally:
+            view.release()
+    finally:
+        block.close()
+    if isinstance(result, (bytes, bytearray, memoryview)) and len(result) >= SHARED_RESULT_SIZE:
+        output = shared_memory.SharedMemory(create=True, size=len(result))
+        output.buf[:len(result)] = result
+        # the parent unlinks the block after it has copied the result
+        output.close()
+        return _SharedResult(output.name, len(result))
+    return result
+
+
+class _SharedResult:
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def read(self):
+        # tracked (by default) because this process unlinks it
+        block = shared_memory.SharedMemory(self.name)
+        try:
+            return bytes(block.buf[:self.size])
+        finally:
+            block.close()
+            block.unlink()
+
+
+class TransformFuture:
+
+    def __init__(self, future, block):
+        """initialize this class
+
+        The result of a transform; the shared memory of its input is released when the transform is done.
+        """
+        self._future = future
+        self._block = block
+        self._result = None
+        self._has_result = False
+        future.add_done_callback(self._release)
+
+    def done(self):
+        return self._future.done()
+
+    def result(self, timeout=None):
+        """wait for the transform
+
+        :return: the return value of the transform
+        :raise: the exception raised by the transform
+        """
+        if not self._has_result:
+            result = self._future.result(timeout)
+            if isinstance(result, _SharedResult):
+                result = result.read()
+            self._result = result
+            self._has_result = True
+        return self._result
+
+    def _release(self, future):
+        self._block.close()
+        self._block.unlink()
+        self._block = None
+
+
+class TransformPool:
+
+    def __init__(self, workers=None):
+        """initialize this class
+
+        A transform is a picklable callable (e.g., a module-level function, or a bound method or
+        functools.partial of picklable objects) which receives a memoryview of the input.
+        The input is copied (or read from a file) once into a shared memory block, which the worker maps,
+        and a big bytes-like result comes back through another block, so no data goes through the pipes.
+
+        The workers are forked eagerly, here, so a pool has to be created before any thread is started
+        (e.g., at the module level of SDCManager, before the caches and the MQTT clients run):
+        forking a multi-threaded process can leave a lock held by another thread locked forever in the child.
+        "fork" is chosen explicitly (rather than "spawn" or "forkserver"), because these re-import the main module
+        in every worker, and SDCManager opens its caches at import time.
+
+        :param workers: the number of worker processes (default: the number of CPUs)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        start_method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(start_method))
+        # the workers have to inherit the resource tracker of this process (see _attach()),
+        # so it is started before them
+        resource_tracker.ensure_running()
+        # with "fork", the first task starts all workers at once (instead of when the first transform comes)
+        self._executor.submit(os.getpid).result()
+
+    def submit(self, transform, data):
+        """run transform(data) in a worker process
+
+        :return: TransformFuture
+        """
+        block = self._create_block(len(data))
+        block.buf[:len(data)] = data
+        return self._submit(transform, block, len(data))
+
+    def submit_file(self, transform, fd, offset, size):
+        """run transform on size bytes of a file at offset, which are read directly into shared memory
+
+        :return: TransformFuture
+        """
+        block = self._create_block(size)
+        view = block.buf[:size]
+        try:
+            pread_into(fd, view, offset)
+        except Exception:
+            view.release()
+            block.close()
+            block.unlink()
+            raise
+        view.release()
+        return self._submit(transform, block, size)
+
+    def run(self, transform, data):
+        return self.submit(transform, data).result()
+
+    @staticmethod
+    def _create_block(size):
+        # an empty block is not allowed
+        return shared_memory.SharedMemory(create=True, size=max(size, 1))
+
+    def _submit(self, transform, block, size):
+        try:
+            future = self._executor.submit(_run_transform, transform, block.name, size)
+        except Exception:
+            block.close()
+            block.unlink()
+            raise
+        return TransformFuture(future, block)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,187 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : WriteBuffer.py
+# description     : python WriteBuffer class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : This WriteBuffer is a bounded chunk queue between the producers (MQTT messages)
+#                   and the writer thread of SoftwareDefinedCache.
+# ==============================================================================
+from collections import deque
+import threading
+import time
+
+DEFAULT_HIGH_WATER_MARK = 8 << 20
+DEFAULT_MAX_SIZE = 16 << 20
+DEFAULT_BATCH_SIZE = 256 << 10
+DEFAULT_BATCH_LATENCY = 0.01
+
+
+class WriteBuffer:
+
+    def __init__(self, high_water_mark=DEFAULT_HIGH_WATER_MARK, max_size=DEFAULT_MAX_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, batch_latency=DEFAULT_BATCH_LATENCY):
+        """initialize this class
+
+        Chunks are enqueued and dequeued in O(1) without copying bytes; other bytes-like objects are copied
+        once when they are enqueued, because the caller may reuse a mutable buffer before it is flushed.
+        Producers are blocked while the buffered size is at or above the high-water mark,
+        and data which would exceed the memory cap (max_size) is rejected.
+        A batch is ready when batch_size bytes are buffered or batch_latency has passed since the first pending byte.
+
+        :param high_water_mark: the buffered size to block producers (unit: byte)
+        :param max_size: the maximum buffered size (unit: byte)
+        :param batch_size: the buffered size to flush a batch (unit: byte)
+        :param batch_latency: the maximum time data waits for a batch (unit: second)
+        """
+        if high_water_mark > max_size:
+            raise ValueError("high_water_mark (%s) is bigger than max_size (%s)" % (high_water_mark, max_size))
+        if batch_size > high_water_mark:
+            raise ValueError("batch_size (%s) is bigger than high_water_mark (%s)" % (batch_size, high_water_mark))
+        self.high_water_mark = high_water_mark
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.batch_latency = batch_latency
+        self._chunks = deque()
+        self._size = 0
+        self._first_pending_time = 0
+        self.closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def __len__(self):
+        return self._size
+
+    def put(self, data, timeout=None):
+        """enqueue data, waiting while the buffer is above the high-water mark
+
+        :param data: bytes-like object (copied unless it is bytes)
+        :param timeout: the maximum time to wait (unit: second, None: wait until there is room)
+        :return: True if data is buffered, False if it is rejected (timeout, memory cap or closed buffer)
+        """
+        if not isinstance(data, bytes):
+            # e.g., a bytearray or a memoryview of one, which may change before the data is flushed
+            data = bytes(data)
+        if len(data) == 0:
+            return True
+        with self._not_full:
+            if timeout is None:
+                while self._size >= self.high_water_mark and not self.closed:
+                    self._not_full.wait()
+            else:
+                deadline = time.monotonic() + timeout
+                while self._size >= self.high_water_mark and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._not_full.wait(remaining)
+
+            if self.closed or self._size + len(data) > self.max_size:
+                return False
+
+            was_empty = self._size == 0
+            self._chunks.append(memoryview(data))
+            self._size += len(data)
+            # the writer is woken up only to start the latency timer or when a batch is full
+            if was_empty:
+                self._first_pending_time = time.monotonic()
+                self._not_empty.notify()
+            elif self._size >= self.batch_size > self._size - len(data):
+                self._not_empty.notify()
+        return True
+
+    def get(self, size):
+        """dequeue up to size bytes
+
+        :param size: the maximum amount of data to dequeue (unit: byte)
+        :return: a list of chunks (memoryviews of the enqueued data)
+        """
+        chunks = []
+        with self._lock:
+            while size > 0 and len(self._chunks) > 0:
+                chunk = self._chunks[0]
+                if len(chunk) <= size:
+                    self._chunks.popleft()
+                else:
+                    self._chunks[0] = chunk[size:]
+                    chunk = chunk[:size]
+                chunks.append(chunk)
+                size -= len(chunk)
+                self._size -= len(chunk)
+            if self._size > 0:
+                # the rest of the data starts a new batch
+                self._first_pending_time = time.monotonic()
+            if self._size < self.high_water_mark:
+                self._not_full.notify_all()
+        return chunks
+
+    def wait_for_batch(self, timeout=None):
+        """wait until a batch is ready (batch_size bytes are buffered or batch_latency has passed)
+
+        :param timeout: the maximum time to wait (unit: second, None: wait until a batch is ready)
+        :return: True if a batch is ready (after close, True until the buffer is drained)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._not_empty:
+            while True:
+                now = time.monotonic()
+                if self._size >= self.batch_size or (self.closed and self._size > 0):
+                    return True
+                if self.closed:
+                    return False
+                wait_time = None
+                if self._size > 0:
+                    wait_time = self._first_pending_time + self.batch_latency - now
+                    if wait_time <= 0:
+                        return True
+                if deadline is not None:
+                    if deadline <= now:
+                        return False
+                    wait_time = deadline - now if wait_time is None else min(wait_time, deadline - now)
+                self._not_empty.wait(wait_time)
+
+    def clear(self):
+        with self._lock:
+            self._chunks.clear()
+            self._size = 0
+            self._not_full.notify_all()
+
+    def close(self):
+        """reject new data and wake up the producers and the writer (the buffered data is left to be drained)
+        """
+        with self._lock:
+            self.closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
@@ -0,0 +1,92 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : test_AsyncSoftwareDefinedCache.py
+# description     : python tests of the AsyncSoftwareDefinedCache class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.8
+# notes           : These tests check that the data is read back in order while the disk I/O of the segments
+#                   runs outside the event loop.
+# ==============================================================================
+import asyncio
+import os
+import threading
+
+import AsyncSoftwareDefinedCache as ASDC
+
+CHUNK_SIZE = 16 << 10
+READ_SIZE = 64 << 10
+
+
+async def exchange(directory, total_size, reader_count, io_threads):
+    sdc = ASDC.AsyncSoftwareDefinedCache(directory, 4, segment_size=256 << 10, flush_batch_size=CHUNK_SIZE)
+    await sdc.start()
+    for name in ("append", "read_views"):
+        function = getattr(sdc._log, name)
+
+        def record(*args, function=function):
+            io_threads.add(threading.current_thread())
+            return function(*args)
+        setattr(sdc._log, name, record)
+
+    stream = os.urandom(total_size)
+    reads = []
+
+    async def produce():
+        for offset in range(0, total_size, CHUNK_SIZE):
+            assert await sdc.put(stream[offset:offset + CHUNK_SIZE])
+
+    async def consume():
+        while sum(len(data) for data in reads) < total_size:
+            data, result = await sdc.read_bytes(READ_SIZE)
+            if result:
+                reads.append(data)
+            else:
+                await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(asyncio.gather(produce(), *[consume() for _ in range(reader_count)]), 60)
+    await sdc.close()
+    return stream, reads
+
+
+def test_concurrent_reads_and_flushes_return_the_stream(tmp_path):
+    io_threads = set()
+    stream, reads = asyncio.run(exchange(str(tmp_path), 2 << 20, 3, io_threads))
+
+    # every read is a distinct slice of the stream, and together they cover it exactly once
+    offsets = sorted(stream.find(data) for data in reads)
+    assert offsets == list(range(0, len(stream), READ_SIZE))
+    assert b''.join(stream[offset:offset + READ_SIZE] for offset in offsets) == stream
+    # the segments are appended and read outside the event loop
+    assert len(io_threads) > 0
+    assert threading.main_thread() not in io_threads
@@ -0,0 +1,98 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : test_ObjectStore.py
+# description     : python tests of the ObjectStore class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : These tests check the size limits of the values of an ObjectStore.
+# ==============================================================================
+import pytest
+
+import ObjectStore
+
+OBJECT_COUNT = 8
+OBJECT_SIZE = 4 << 10
+
+
+@pytest.mark.parametrize("segment_size", [64 << 10, 1 << 20])
+def test_value_bigger_than_a_segment_is_rejected_before_eviction(tmp_path, segment_size):
+    # the value fits in the capacity, but its record (header, key and value) does not fit in a segment
+    store = ObjectStore.ObjectStore(str(tmp_path), segment_size * 4, segment_size)
+    for i in range(OBJECT_COUNT):
+        assert store.put("key-%s" % i, bytes([i]) * OBJECT_SIZE)
+
+    assert not store.put("big", bytes(segment_size))
+    assert store.eviction_count == 0
+    assert store.get("big") is None
+    for i in range(OBJECT_COUNT):
+        assert store.get("key-%s" % i) == bytes([i]) * OBJECT_SIZE
+    store.close()
+
+
+def test_value_bigger_than_the_capacity_is_rejected(tmp_path):
+    store = ObjectStore.ObjectStore(str(tmp_path), 64 << 10, 1 << 20)
+    assert store.put("key", bytes(OBJECT_SIZE))
+
+    assert not store.put("big", bytes((64 << 10) + 1))
+    assert store.eviction_count == 0
+    assert store.get("key") == bytes(OBJECT_SIZE)
+    store.close()
+
+
+def test_largest_record_fits_in_a_segment(tmp_path):
+    segment_size = 64 << 10
+    store = ObjectStore.ObjectStore(str(tmp_path), segment_size * 4, segment_size)
+    value = bytes(segment_size - ObjectStore.RECORD_HEADER.size - len(b"key"))
+
+    assert store.put("key", value)
+    assert store.get("key") == value
+    store.close()
+
+
+def test_arc_adapts_to_a_ghost_hit_before_choosing_victims(tmp_path):
+    size = 1000
+    store = ObjectStore.ObjectStore(str(tmp_path), 3 * size, 1 << 20, eviction_policy="arc")
+    store.put("a", bytes(size))
+    store.put("b", bytes(size))
+    store.put("c", bytes(size))
+    assert store.get("c") is not None  # c is seen twice (t2)
+    store.put("d", bytes(size))  # a is evicted from t1 to its ghost list (b1)
+    assert not store.contains("a")
+
+    # the b1 ghost hit grows the target of t1 to 2 * size, so t1 (b, d) is not above it
+    # and the frequently used c (t2) is evicted first
+    assert store.put("a", bytes(2 * size))
+    assert not store.contains("c")
+    assert store.contains("d")
+    store.close()
@@ -0,0 +1,84 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : test_SegmentLog.py
+# description     : python tests of the SegmentLog class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : These tests check that the files of deleted segments are not kept open.
+# ==============================================================================
+import os
+
+import pytest
+
+import SegmentLog
+
+SEGMENT_SIZE = 64 << 10
+
+
+def deleted_open_files(directory):
+    # the files of directory which are deleted but still open in this process (their disk space is not freed)
+    fd_directory = "/proc/self/fd"
+    paths = []
+    for name in os.listdir(fd_directory):
+        try:
+            path = os.readlink(os.path.join(fd_directory, name))
+        except OSError:
+            continue
+        if path.startswith(directory) and path.endswith(" (deleted)"):
+            paths.append(path)
+    return paths
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc/self/fd")
+@pytest.mark.parametrize("release", ["consume", "discard_through", "remove_segment"])
+def test_deleted_segments_are_closed(tmp_path, release):
+    log = SegmentLog.SegmentLog(str(tmp_path), SEGMENT_SIZE)
+    for _ in range(4):
+        log.append(os.urandom(SEGMENT_SIZE // 2))
+    segment_ids = log.segment_ids()
+    assert len(segment_ids) > 1
+
+    # the sealed segments are deleted without being read, so their descriptors are never used by a reader
+    if release == "consume":
+        log.consume(log.size)
+    elif release == "discard_through":
+        log.discard_through(segment_ids[-2])
+    else:
+        for segment_id in segment_ids[1:-1]:
+            log.remove_segment(segment_id)
+        log.discard_tail()
+
+    assert log.segment_ids() == segment_ids[-1:]
+    assert deleted_open_files(os.path.realpath(str(tmp_path))) == []
+    log.close()
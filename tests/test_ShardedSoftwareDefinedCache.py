@@ -0,0 +1,86 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : test_ShardedSoftwareDefinedCache.py
+# description     : python tests of the ShardedSoftwareDefinedCache class
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : These tests check the split of the capacity and the routing of the streams.
+# ==============================================================================
+import os
+
+import pytest
+
+from ShardedSoftwareDefinedCache import ShardedSoftwareDefinedCache
+
+
+def test_capacity_is_split_across_shards(tmp_path):
+    cache = ShardedSoftwareDefinedCache([str(tmp_path / ("shard%s" % i)) for i in range(3)], 10)
+    cache.close()
+    assert [shard.capacity for shard in cache.shards] == [4 << 20, 3 << 20, 3 << 20]
+    assert cache.capacity == 10 << 20
+
+    with pytest.raises(ValueError):
+        ShardedSoftwareDefinedCache([str(tmp_path / ("shard%s" % i)) for i in range(3)], 2)
+
+
+def test_streams_are_routed_by_id_and_kept_apart(tmp_path):
+    directories = [str(tmp_path / ("disk%s" % i)) for i in range(4)]
+    cache = ShardedSoftwareDefinedCache(directories)
+    stream_ids = ["stream%s" % i for i in range(16)]
+    for stream_id in stream_ids:
+        cache.add_stream(stream_id, 1)
+    for stream_id in stream_ids:
+        cache.store_data(stream_id.encode() * 10, stream_id)
+
+    used_directories = {os.path.dirname(cache.streams[stream_id].directory) for stream_id in stream_ids}
+    results = {stream_id: cache.read_bytes(len(stream_id) * 10, stream_id) for stream_id in stream_ids}
+    cache.close()
+    assert len(used_directories) > 1
+    assert used_directories <= set(directories)
+    for stream_id, (data, result) in results.items():
+        assert result
+        assert bytes(data) == stream_id.encode() * 10
+
+
+def test_read_chunks(tmp_path):
+    cache = ShardedSoftwareDefinedCache([str(tmp_path / "disk0"), str(tmp_path / "disk1")])
+    cache.add_stream("stream", 1)
+    cache.store_data(bytes(range(256)) * 4, "stream")
+
+    chunks, result = cache.read_chunks(1024, "stream", chunk_size=300)
+    chunks = list(chunks)
+    cache.close()
+    assert result
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 124]
+    assert b"".join(chunks) == bytes(range(256)) * 4
@@ -0,0 +1,99 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : test_concurrency.py
+# description     : python tests of the concurrent reads and writes of SoftwareDefinedCache
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : A producer and concurrent readers exchange a byte stream through the reader and writer sides
+#                   of the cache, and every byte they read back is checked.
+# ==============================================================================
+import threading
+import time
+
+import pytest
+
+import SoftwareDefinedCache as SDC
+
+TOTAL_SIZE = 8 << 20
+CHUNK_SIZE = 64 << 10
+READ_SIZE = 256 << 10
+
+
+def offset_stream(size):
+    # a sequence of 8-byte offsets, so each read tells where it starts
+    return b''.join(i.to_bytes(8, "little") for i in range(0, size, 8))
+
+
+@pytest.mark.parametrize("reader_count", [1, 2, 4])
+@pytest.mark.parametrize("options", [{}, {"use_mmap": True}, {"hot_tier_size": 1 << 20}],
+                         ids=["pread", "mmap", "hot_tier"])
+def test_concurrent_readers_read_each_byte_once(tmp_path, reader_count, options):
+    stream = offset_stream(TOTAL_SIZE)
+    sdc = SDC.SoftwareDefinedCache(str(tmp_path), 4, segment_size=1 << 20, **options)
+    sdc.run()
+    offsets = []
+    corrupted = []
+    done = threading.Event()
+
+    def produce():
+        for offset in range(0, TOTAL_SIZE, CHUNK_SIZE):
+            assert sdc.put_to_write_buffer(stream[offset:offset + CHUNK_SIZE])
+
+    def consume():
+        while not done.is_set():
+            data, result = sdc.read_bytes(READ_SIZE)
+            if not result:
+                time.sleep(0.0005)
+                continue
+            offset = int.from_bytes(data[:8], "little")
+            if data != stream[offset:offset + READ_SIZE]:
+                corrupted.append(offset)
+            offsets.append(offset)
+            if len(offsets) * READ_SIZE >= TOTAL_SIZE:
+                done.set()
+
+    threads = [threading.Thread(target=produce)] + [threading.Thread(target=consume) for _ in range(reader_count)]
+    for thread in threads:
+        thread.start()
+    completed = done.wait(60)
+    done.set()
+    for thread in threads:
+        thread.join()
+    sdc.close()
+
+    assert completed
+    assert corrupted == []
+    # the reads are exact slices of the stream and cover it exactly once
+    assert sorted(offsets) == list(range(0, TOTAL_SIZE, READ_SIZE))
+    assert sdc.used == 0
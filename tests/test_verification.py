@@ -0,0 +1,81 @@
+# This file is part of Qualified Caching-as-a-Service.
+# BSD 3-Clause License
+#
+# Copyright (c) 2019, Intelligent-distributed Cloud and Security Laboratory (ICNS Lab.)
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# title           : test_verification.py
+# description     : python tests of the checksum verification of SoftwareDefinedCache
+# author          : Yunkon(Alvin) Kim
+# date            : 20190130
+# version         : 0.1
+# python_version  : 3.6
+# notes           : A byte of a restored segment is flipped, and the cache must not return its data.
+# ==============================================================================
+import logging
+import os
+
+import SegmentLog
+import SoftwareDefinedCache as SDC
+
+SEGMENT_SIZE = 64 << 10
+
+
+def flip_byte(path, position):
+    with open(path, 'r+b') as f:
+        header = f.read(SegmentLog.SEGMENT_HEADER.size)
+        data_offset = SegmentLog.SEGMENT_HEADER.unpack(header)[4]
+        f.seek(data_offset + position)
+        value = f.read(1)
+        f.seek(data_offset + position)
+        f.write(bytes([value[0] ^ 1]))
+
+
+def test_corrupt_segment_is_discarded_and_logged(tmp_path, caplog):
+    stream = os.urandom(4 * SEGMENT_SIZE)
+    sdc = SDC.SoftwareDefinedCache(str(tmp_path), 4, segment_size=SEGMENT_SIZE)
+    sdc.store_data(stream)
+    sdc.close()
+    tail_path = os.path.join(str(tmp_path), sorted(name for name in os.listdir(str(tmp_path))
+                                                   if name.endswith(SegmentLog.SEGMENT_SUFFIX))[0])
+    flip_byte(tail_path, 100)
+
+    # the restored segments are verified with the default policy ("recovery")
+    sdc = SDC.SoftwareDefinedCache(str(tmp_path), 4, segment_size=SEGMENT_SIZE)
+    with caplog.at_level(logging.ERROR, logger=SDC.__name__):
+        data, result = sdc.read_bytes(1000)
+    assert not result
+    assert any("Corrupt segment" in record.getMessage() for record in caplog.records)
+
+    # the data after the corrupt segment is still read
+    remaining = sdc.used
+    assert 0 < remaining < len(stream)
+    data, result = sdc.read_bytes(remaining)
+    sdc.close()
+    assert result
+    assert bytes(data) == stream[len(stream) - remaining:]